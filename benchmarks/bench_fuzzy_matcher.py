@@ -0,0 +1,119 @@
+"""Benchmark of the CISS make/model/damage matching.
+
+Compares calling fuzzywuzzy's partial_ratio for every vehicle and event (the old
+ScraperCISS.__parse_case path) with FuzzyMatcher on a synthetic corpus of cases.
+
+Usage: python benchmarks/bench_fuzzy_matcher.py [num_cases]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fuzzywuzzy import fuzz
+
+from app.scrape import FuzzyMatcher
+
+THRESHOLD = 90
+
+MAKES = [
+    "Toyota", "Honda", "Ford", "Chevrolet", "Nissan", "Hyundai", "Kia", "Subaru",
+    "Volkswagen", "BMW", "Mercedes-Benz", "Dodge", "Jeep", "RAM", "GMC", "Mazda",
+]
+MODELS = [
+    "Camry", "Corolla", "RAV4", "Civic", "Accord", "CR-V", "F-150", "Escape",
+    "Silverado 1500", "Malibu", "Altima", "Sentra", "Elantra", "Sonata", "Forester",
+    "Jetta", "3 Series", "C-Class", "Grand Cherokee", "Wrangler", "Sierra 1500",
+]
+DAMAGE_PLANES = [
+    "Front", "Left", "Right", "Back (rear)", "Top", "Undercarriage", "Unknown",
+    "Not Coded", "Front - Center", "Left - Side",
+]
+
+
+def make_corpus(num_cases: int, seed: int = 0) -> list[dict]:
+    """Generate case documents with the fields the matching reads."""
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(num_cases):
+        vehicles = [
+            {
+                "VPICMakeDesc": rng.choice(MAKES).upper(),
+                "VPICModelDesc": rng.choice(MODELS).upper(),
+            }
+            for _ in range(rng.randint(1, 4))
+        ]
+        events = [
+            {
+                "AreaDamageDesc": rng.choice(DAMAGE_PLANES),
+                "VehContactDamageDesc": rng.choice(DAMAGE_PLANES),
+            }
+            for _ in range(rng.randint(1, 6))
+        ]
+        cases.append({"Vehicles": vehicles, "Events": events})
+    return cases
+
+
+def baseline(cases: list[dict], make: str, model: str, damage: str) -> list:
+    results = []
+    for case in cases:
+        for vehicle in case["Vehicles"]:
+            results.append(
+                fuzz.partial_ratio(vehicle["VPICMakeDesc"].lower(), make.lower())
+                >= THRESHOLD
+                and fuzz.partial_ratio(vehicle["VPICModelDesc"].lower(), model.lower())
+                >= THRESHOLD
+            )
+        for event in case["Events"]:
+            results.append(fuzz.partial_ratio(damage, event["AreaDamageDesc"]) >= THRESHOLD)
+            results.append(
+                fuzz.partial_ratio(damage, event["VehContactDamageDesc"]) >= THRESHOLD
+            )
+    return results
+
+
+def matcher(cases: list[dict], make: str, model: str, damage: str) -> list:
+    make_matcher = FuzzyMatcher(make, THRESHOLD)
+    model_matcher = FuzzyMatcher(model, THRESHOLD)
+    damage_matcher = FuzzyMatcher(damage, THRESHOLD, case_sensitive=True)
+
+    results = []
+    for case in cases:
+        vehicles = case["Vehicles"]
+        make_matches = make_matcher.match_many(v["VPICMakeDesc"] for v in vehicles)
+        model_matches = model_matcher.match_many(v["VPICModelDesc"] for v in vehicles)
+        results.extend(a and b for a, b in zip(make_matches, model_matches))
+
+        events = case["Events"]
+        primary = damage_matcher.match_many(e["AreaDamageDesc"] for e in events)
+        contacted = damage_matcher.match_many(e["VehContactDamageDesc"] for e in events)
+        for a, b in zip(primary, contacted):
+            results.extend((a, b))
+    return results
+
+
+def bench(func, *args, repeat: int = 5) -> tuple[float, list]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    num_cases = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    cases = make_corpus(num_cases)
+    params = ("Toyota", "Camry", "Front")
+
+    base_time, base_result = bench(baseline, cases, *params)
+    new_time, new_result = bench(matcher, cases, *params)
+
+    mismatches = sum(a != b for a, b in zip(base_result, new_result))
+    print(f"Cases: {num_cases}, comparisons: {len(base_result)}")
+    print(f"fuzzywuzzy per call: {base_time * 1e3:8.2f} ms")
+    print(f"FuzzyMatcher:        {new_time * 1e3:8.2f} ms ({base_time / new_time:.1f}x)")
+    print(f"Differing results:   {mismatches}")
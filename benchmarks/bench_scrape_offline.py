@@ -0,0 +1,463 @@
+"""Offline end-to-end scrape benchmark.
+
+Runs a NASS or CISS scraper with the request handler against a local fake crashviewer
+(benchmarks/fake_crashviewer.py) for scenarios of increasing case counts, storing the events
+and case documents it emits in a temporary database the way the scrape menu does. The images
+and EDR files of the events found can optionally be downloaded afterwards. For each scenario,
+reports the wall time, cases/s, events/s, CPU time, peak RSS and the time spent writing to
+the database.
+
+Every scenario runs in a fresh process, with the server in another, so the CPU time and peak
+RSS reported are the scrape's own.
+
+Usage: python benchmarks/bench_scrape_offline.py [--database NASS|CISS] [--cases N [N ...]]
+    [--rate-limit S] [--images SET [SET ...]] [--edr] [--json PATH] [server options]
+"""
+
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.request import urlopen
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from PyQt6.QtCore import QCoreApplication, QObject, QThread, QTimer, pyqtSlot
+from requests import Response
+
+from app.scrape import (
+    ENDPOINTS,
+    DownloadQueueItem,
+    ImageBatchJob,
+    Priority,
+    RequestHandler,
+    RequestQueueItem,
+    SCRAPERS,
+)
+from app.models import CaseDocument, DatabaseHandler, Event, ImageCache, Profile
+
+from fake_crashviewer import (
+    MAKES,
+    MATCH_MAKE,
+    YEARS,
+    add_arguments,
+    config_from_args,
+    server_args,
+)
+
+SERVER_SCRIPT = Path(__file__).resolve().parent / "fake_crashviewer.py"
+SCENARIO_TIMEOUT_SECS = 3600  # A scenario still running after this long is stopped
+
+
+def search_kwargs(database: str) -> dict:
+    """Get the scraper arguments searching for the make of the fake server's matching cases.
+    CISS compares model years with the selected option values, so its years are explicit."""
+    make = (MAKES[MATCH_MAKE][0].upper(), MATCH_MAKE)
+    if database == "CISS":
+        years = (str(YEARS[0]), YEARS[0]), (str(YEARS[-1]), YEARS[-1])
+    else:
+        years = ("All", -1), ("All", -1)
+    return {
+        "make": make,
+        "model": ("All", -1),
+        "start_model_year": years[0],
+        "end_model_year": years[1],
+        "primary_damage": ("All", -1),
+        "secondary_damage": ("All", -1),
+        "min_dv": 0,
+        "max_dv": 0,
+    }
+
+
+def peak_rss_mb() -> float | None:
+    """Get the peak resident set size of this process in MiB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _windows_peak_rss_mb() -> float | None:
+    try:
+        import ctypes
+        from ctypes import wintypes
+    except ImportError:
+        return None
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        ok = ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        )
+    except (AttributeError, OSError):
+        return None
+    return counters.PeakWorkingSetSize / 1024**2 if ok else None
+
+
+class _Recorder(QObject):
+    """Stores what a scraper emits in the database like the scrape menu does, timing the
+    writes, and counts the EDR downloads of the benchmark."""
+
+    def __init__(self, db_handler: DatabaseHandler, profile: Profile):
+        super().__init__()
+        self._db_handler = db_handler
+        self._profile = profile
+
+        self.events: list[Event] = []
+        self.event_write_secs = 0.0
+        self.documents = 0
+        self.document_write_secs = 0.0
+        self.edr_total = 0
+        self.edr_done = 0
+        self.edr_failed = 0
+
+    @pyqtSlot(Event, Response)
+    def add_event(self, event: Event, response: Response):
+        start = time.perf_counter()
+        self._db_handler.add_event(event, self._profile)
+        self.event_write_secs += time.perf_counter() - start
+        self.events.append(event)
+
+    @pyqtSlot(CaseDocument)
+    def add_case_document(self, document: CaseDocument):
+        start = time.perf_counter()
+        self._db_handler.add_case_document(document)
+        self.document_write_secs += time.perf_counter() - start
+        self.documents += 1
+
+    def edr_requests(self, root: Path) -> list[DownloadQueueItem]:
+        """Get a download for the EDR file of every vehicle with events."""
+        requests = []
+        for scraper_type, case_id, vehicle_num in sorted(
+            {(event.scraper_type, event.case_id, event.vehicle_num) for event in self.events}
+        ):
+            scraper = SCRAPERS[scraper_type]
+            if scraper_type == "CISS":
+                url = scraper.edr_url.format(obj_id=case_id, filename="EDR.CDRx")
+            else:
+                url = scraper.edr_url.format(veh_num=vehicle_num, edr_id=1, case_id=case_id)
+            requests.append(
+                DownloadQueueItem(
+                    scraper.endpoint_url("edr", url),
+                    priority=Priority.IMMEDIATE.value,
+                    dest=root / f"{scraper_type}_{case_id}_{vehicle_num}.edr",
+                    extra_data={"for": "benchmark_edr"},
+                    callback=self._edr_saved,
+                )
+            )
+        self.edr_total = len(requests)
+        return requests
+
+    def edr_finished(self) -> bool:
+        return self.edr_done + self.edr_failed >= self.edr_total
+
+    @pyqtSlot(RequestQueueItem, Response)
+    def handle_response(self, request: RequestQueueItem, response: Response):
+        if request.extra_data.get("for") == "benchmark_edr":
+            request.callback(request, response)
+
+    @pyqtSlot(RequestQueueItem)
+    def handle_failure(self, request: RequestQueueItem):
+        if request.extra_data.get("for") == "benchmark_edr":
+            self.edr_failed += 1
+            self._check_edr_finished()
+
+    def _edr_saved(self, request: DownloadQueueItem, response: Response):
+        self.edr_done += 1
+        self._check_edr_finished()
+
+    def _check_edr_finished(self):
+        if self.edr_finished():
+            QCoreApplication.quit()
+
+
+def _exec_until(app: QCoreApplication, done) -> bool:
+    """Run the event loop until it is quit, unless done() is already true.
+
+    Returns:
+        bool: False if the scenario timed out.
+    """
+    if done():
+        return True
+    timed_out = []
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(lambda: (timed_out.append(True), app.quit()))
+    timer.start(SCENARIO_TIMEOUT_SECS * 1000)
+    app.exec()
+    timer.stop()
+    return not timed_out
+
+
+def run_scenario(args: argparse.Namespace) -> dict:
+    """Scrape every case of the fake server at args.url, in this process."""
+    logging.basicConfig(level=args.log_level, format="%(levelname)s %(name)s: %(message)s")
+    app = QCoreApplication([])
+    ENDPOINTS.configure(args.url)
+
+    req_handler = RequestHandler()
+    # The fake server needs no politeness delay, so the rate limit may go below the app's minimum
+    req_handler.MIN_RATE_LIMIT = 0
+    req_handler.update_rate_limit(args.rate_limit)
+
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as temp_dir:
+        temp_dir = Path(temp_dir)
+        db_handler = DatabaseHandler(temp_dir / "benchmark.db")
+        now = int(time.time())
+        profile = Profile(
+            name=f"Benchmark {args.database} {args.cases[0]}",
+            params=json.dumps({"Scrape 1": {"database": args.database}}),
+            multi=False,
+            created=now,
+            modified=now,
+        )
+        db_handler.add_profile(profile)
+        recorder = _Recorder(db_handler, profile)
+
+        scraper = SCRAPERS[args.database](req_handler, **search_kwargs(args.database))
+        thread = QThread()
+        scraper.moveToThread(thread)
+        scraper.event_parsed.connect(recorder.add_event)
+        scraper.case_fetched.connect(recorder.add_case_document)
+        scraper.completed.connect(app.quit)
+        thread.started.connect(scraper.start)
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        thread.start()
+        completed = _exec_until(app, lambda: False)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        if not completed:
+            req_handler.clear_requests()
+        thread.quit()
+        thread.wait()
+
+        cases = scraper.success_cases + scraper.failed_cases
+        case_latency = (
+            req_handler.stats.snapshot()["by_priority"]
+            .get(str(Priority.CASE.value), {})
+            .get("intervals", {})
+            .get("total", {})
+        )
+        result = {
+            "database": args.database,
+            "cases_listed": args.cases[0],
+            "completed": completed,
+            "cases_found": scraper.cases_found,
+            "cases": cases,
+            "success_cases": scraper.success_cases,
+            "failed_cases": scraper.failed_cases,
+            "events": scraper.total_events,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "cases_per_s": cases / wall if wall > 0 else 0.0,
+            "events_per_s": scraper.total_events / wall if wall > 0 else 0.0,
+            "case_p50_ms": case_latency.get("p50_ms", 0.0),
+            "case_p99_ms": case_latency.get("p99_ms", 0.0),
+            "db_events_s": recorder.event_write_secs,
+            "db_documents_s": recorder.document_write_secs,
+            "documents": recorder.documents,
+        }
+
+        if args.images and completed:
+            job = ImageBatchJob(
+                req_handler,
+                ImageCache(temp_dir / "images"),
+                recorder.events,
+                args.images,
+                db_handler,
+            )
+            job.finished.connect(app.quit)
+            start = time.perf_counter()
+            job.start()
+            _exec_until(app, lambda: not job.running)
+            elapsed = time.perf_counter() - start
+            result.update(
+                images=job.images_done,
+                images_failed=job.images_failed,
+                images_s=elapsed,
+                images_mb_per_s=job.bytes_downloaded / 1e6 / elapsed if elapsed > 0 else 0.0,
+            )
+
+        if args.edr and completed:
+            req_handler.response_received.connect(recorder.handle_response)
+            req_handler.request_failed.connect(recorder.handle_failure)
+            edr_dir = temp_dir / "edr"
+            edr_dir.mkdir()
+            start = time.perf_counter()
+            req_handler.batch_enqueue(recorder.edr_requests(edr_dir))
+            _exec_until(app, recorder.edr_finished)
+            result.update(
+                edr=recorder.edr_done,
+                edr_failed=recorder.edr_failed,
+                edr_s=time.perf_counter() - start,
+            )
+
+        result["peak_rss_mb"] = peak_rss_mb()
+        result["cpu_total_s"] = time.process_time() - cpu_start
+        req_handler.stop()
+        db_handler.close_connection()
+    return result
+
+
+def start_server(args: argparse.Namespace, cases: int) -> tuple[subprocess.Popen, str]:
+    """Start the fake crashviewer in a separate process.
+
+    Returns:
+        tuple[subprocess.Popen, str]: The server process and its URL.
+    """
+    server = subprocess.Popen(
+        [sys.executable, str(SERVER_SCRIPT), *server_args(config_from_args(args, cases))],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = server.stdout.readline()
+    if not line.startswith("Serving on "):
+        server.kill()
+        raise RuntimeError(f"The fake crashviewer failed to start: {line!r}")
+    return server, line.removeprefix("Serving on ").strip()
+
+
+def benchmark(args: argparse.Namespace, cases: int) -> dict:
+    """Run a scenario in a fresh process, against a fresh server."""
+    server, url = start_server(args, cases)
+    try:
+        command = [
+            sys.executable,
+            __file__,
+            "--scenario",
+            url,
+            "--database", args.database,
+            "--cases", str(cases),
+            "--rate-limit", str(args.rate_limit),
+            "--log-level", args.log_level,
+        ]  # fmt: skip
+        if args.images:
+            command += ["--images", *args.images]
+        if args.edr:
+            command.append("--edr")
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Scenario of {cases} cases failed:\n{result.stderr}")
+        if result.stderr:
+            print(result.stderr, end="", file=sys.stderr)
+        scenario = json.loads(result.stdout.strip().splitlines()[-1])
+
+        with urlopen(f"{url}/_stats") as response:
+            scenario["server"] = json.load(response)
+    finally:
+        server.terminate()
+        server.wait()
+    return scenario
+
+
+def print_results(results: list[dict]):
+    columns = [
+        ("Cases", lambda r: f"{r['cases']}/{r['cases_found']}"),
+        ("Events", lambda r: str(r["events"])),
+        ("Wall s", lambda r: f"{r['wall_s']:.2f}"),
+        ("Cases/s", lambda r: f"{r['cases_per_s']:.1f}"),
+        ("Events/s", lambda r: f"{r['events_per_s']:.1f}"),
+        ("CPU s", lambda r: f"{r['cpu_s']:.2f}"),
+        ("Case p50/p99 ms", lambda r: f"{r['case_p50_ms']:.0f}/{r['case_p99_ms']:.0f}"),
+        ("DB events s", lambda r: f"{r['db_events_s']:.2f}"),
+        ("DB docs s", lambda r: f"{r['db_documents_s']:.2f}"),
+        (
+            "Peak RSS MiB",
+            lambda r: f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "n/a",
+        ),
+    ]
+    if any("images" in r for r in results):
+        columns.append(
+            (
+                "Images (MB/s)",
+                lambda r: f"{r.get('images', 0)} ({r.get('images_mb_per_s', 0):.1f})",
+            )
+        )
+    if any("edr" in r for r in results):
+        columns.append(("EDR", lambda r: f"{r.get('edr', 0)}"))
+
+    rows = [[header for header, _ in columns]]
+    for result in results:
+        rows.append([value(result) for _, value in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+    for result in results:
+        if not result["completed"]:
+            print(f"The scenario of {result['cases_listed']} cases timed out.")
+        errors = sum(
+            count
+            for statuses in result["server"].values()
+            for status, count in statuses.items()
+            if status == "500"
+        )
+        if errors:
+            print(f"{result['cases_listed']} cases: {errors} server errors injected.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database", choices=["NASS", "CISS"], default="CISS")
+    parser.add_argument(
+        "--cases", type=int, nargs="+", default=[100, 1000, 10000], help="Cases per scenario"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help=f"Seconds between requests (the app uses {RequestHandler.DEFAULT_RATE_LIMIT})",
+    )
+    parser.add_argument(
+        "--images", nargs="*", default=[], help="Image sets to download (e.g. Front)"
+    )
+    parser.add_argument("--edr", action="store_true", help="Download EDR files")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    parser.add_argument("--log-level", default="ERROR")
+    parser.add_argument("--scenario", metavar="URL", help=argparse.SUPPRESS)
+    add_arguments(parser)
+    parser.set_defaults(latency=0.02, jitter=0.01)
+    args = parser.parse_args()
+
+    if args.scenario:
+        args.url = args.scenario
+        print(json.dumps(run_scenario(args)))
+        return
+
+    results = []
+    for cases in args.cases:
+        print(f"Scraping {cases} {args.database} cases...", flush=True)
+        results.append(benchmark(args, cases))
+    print()
+    print_results(results)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=4), encoding="utf-8")
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
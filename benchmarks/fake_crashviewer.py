@@ -0,0 +1,436 @@
+"""Local stand-in for crashviewer.nhtsa.dot.gov, for benchmarking scrapes offline.
+
+Serves NASS and CISS search pages, model lists, case list pages, case documents (XML and
+JSON), images and EDR files generated from the sample documents in benchmarks/fixtures. The
+documents have the structure the scrapers parse, with the case ID, vehicle makes, model
+years, delta-V and crush values varied per case (deterministically, from the seed), so a
+configurable share of cases match the benchmark's search. Every response can be delayed by
+a fixed latency plus random jitter, and a share of case, image and EDR requests can be
+answered with a server error. Case list and search pages never fail, as a failed case list
+page ends a scrape.
+
+Once listening, the server prints "Serving on <url>" so scripts starting it can read the
+port it was given. The app can be pointed at it with the base URL setting.
+
+Usage: python benchmarks/fake_crashviewer.py [--port N] [--cases N] [--page-size N]
+    [--latency S] [--jitter S] [--error-rate P] [--match-rate P] [--image-size B]
+    [--edr-size B] [--seed N]
+"""
+
+import argparse
+import copy
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import random
+import re
+from string import Template
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+import xml.etree.ElementTree as ET
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+FIRST_CASE_ID = 100000  # Case IDs are numbered from here, in the order they are listed
+
+# key: make value, value: make name and its models (key: model value, value: model name).
+# The first model of the first make is the one the sample documents' vehicle 1 has.
+MAKES = {
+    49: ("Toyota", {38: "Camry", 39: "Corolla", 40: "RAV4"}),
+    37: ("Honda", {32: "Civic", 33: "Accord", 34: "CR-V"}),
+    12: ("Ford", {20: "F-150", 21: "Escape", 22: "Focus"}),
+}
+MATCH_MAKE = 49  # Make of vehicle 1 in matching cases. Other cases get another make.
+YEARS = range(1990, 2025)
+MAX_EVENTS = 3  # Cases have between 1 and this many events between their two vehicles
+
+
+@dataclass
+class ServerConfig:
+    cases: int = 100  # Cases listed across the case list pages
+    page_size: int = 40  # Cases per case list page
+    latency: float = 0.0  # Seconds every response is delayed by
+    jitter: float = 0.0  # Maximum extra random delay in seconds
+    error_rate: float = 0.0  # Share of case, image and EDR requests answered with a 500
+    match_rate: float = 0.8  # Share of cases whose vehicle 1 has MATCH_MAKE
+    image_size: int = 64 * 1024  # Bytes per image
+    edr_size: int = 16 * 1024  # Bytes per EDR file
+    seed: int = 0
+
+
+class _Documents:
+    """Generates the documents served, varying the sample documents per case."""
+
+    def __init__(self, config: ServerConfig):
+        self._config = config
+        self._ciss_case = json.loads((FIXTURES_DIR / "ciss_case.json").read_text("utf-8"))
+        self._nass_case = ET.parse(FIXTURES_DIR / "nass_case.xml").getroot()
+        self._case_list = Template((FIXTURES_DIR / "case_list.html").read_text("utf-8"))
+
+        makes = "\n".join(
+            f'        <option value="{value}">{name}</option>'
+            for value, (name, _) in MAKES.items()
+        )
+        years = "\n".join(f'        <option value="{year}">{year}</option>' for year in YEARS)
+        self.search = {
+            database: Template(
+                (FIXTURES_DIR / f"{database.lower()}_search.html").read_text("utf-8")
+            )
+            .substitute(makes=makes, years=years)
+            .encode()
+            for database in ("CISS", "NASS")
+        }
+
+        rng = random.Random(config.seed)
+        self.image = rng.randbytes(config.image_size)
+        self.edr = rng.randbytes(config.edr_size)
+
+    def case_ids(self, page: int) -> range:
+        """Get the IDs of the cases listed on a case list page (numbered from 1)."""
+        start = min(max(page - 1, 0) * self._config.page_size, self._config.cases)
+        end = min(start + self._config.page_size, self._config.cases)
+        return range(FIRST_CASE_ID + start, FIRST_CASE_ID + end)
+
+    def case_list(self, page: int, case_href: str) -> bytes:
+        rows = "\n".join(
+            f'        <tr><td><a href="{case_href.format(case_id=case_id)}">{case_id}</a></td>'
+            f"<td>2019-06-{case_id % 28 + 1:02}</td><td>2</td></tr>"
+            for case_id in self.case_ids(page)
+        )
+        return self._case_list.substitute(rows=rows).encode()
+
+    def _case_values(self, case_id: int) -> dict:
+        """Get the values varied per case, the same on every request for the case."""
+        rng = random.Random(self._config.seed * 1_000_003 + case_id)
+        if rng.random() < self._config.match_rate:
+            make = MATCH_MAKE
+        else:
+            make = rng.choice([value for value in MAKES if value != MATCH_MAKE])
+        name, models = MAKES[make]
+        model = rng.choice(list(models))
+        events = []
+        for _ in range(rng.randint(1, MAX_EVENTS)):
+            total = rng.randint(8, 70)
+            lateral = rng.randint(-total // 3, total // 3)
+            crush = sorted(rng.randint(0, 60) for _ in range(6))
+            # Peak crush in the middle of the profile
+            crush = crush[::2] + crush[::-2]
+            events.append(
+                {
+                    "total": total,
+                    "lateral": lateral,
+                    "longitudinal": -int((total**2 - lateral**2) ** 0.5),
+                    "crush": crush,
+                    "smashl": rng.randint(80, 170),
+                }
+            )
+        return {
+            "make": make,
+            "make_name": name,
+            "model": model,
+            "model_name": models[model],
+            "year": rng.choice(YEARS),
+            "events": events,
+        }
+
+    def ciss_case(self, case_id: int) -> bytes:
+        values = self._case_values(case_id)
+        case = copy.deepcopy(self._ciss_case)
+        case["CaseId"] = case_id
+        case["CaseNum"] = f"1-10-2019-{case_id:06}"
+
+        vehicle = case["Vehicles"][0]
+        vehicle["VPICMakeDesc"] = values["make_name"].upper()
+        vehicle["MakeDesc"] = values["make_name"]
+        vehicle["VPICModelDesc"] = values["model_name"].upper()
+        vehicle["ModelDesc"] = values["model_name"]
+        vehicle["ModelYear"] = str(values["year"])
+
+        sample_event = case["Events"][0]
+        sample_cdcs = case["CDCs"]
+        sample_crush = case["CrushProfiles"]
+        case["Events"], case["CDCs"], case["CrushProfiles"] = [], [], []
+        for seq_num, event in enumerate(values["events"], start=1):
+            case["Events"].append({**sample_event, "SeqNum": seq_num})
+            for cdc in sample_cdcs:
+                case["CDCs"].append({**cdc, "SeqNum": seq_num})
+            for crush in sample_crush:
+                case["CrushProfiles"].append({**crush, "SeqNum": seq_num})
+
+            # Vehicle 1's CDC and crush profile of the event
+            cdc = case["CDCs"][-len(sample_cdcs)]
+            cdc["DVTotal"] = f"{event['total']} km/h"
+            cdc["DVLat"] = f"{event['lateral']} km/h"
+            cdc["DVLong"] = f"{event['longitudinal']} km/h"
+            crush = case["CrushProfiles"][-len(sample_crush)]
+            for i, value in enumerate(event["crush"], start=1):
+                crush[f"AvgC{i}"] = str(value)
+            crush["SmashL"] = f"{event['smashl']} cm"
+        return json.dumps(case).encode()
+
+    def nass_case(self, case_id: int) -> bytes:
+        values = self._case_values(case_id)
+        case = copy.deepcopy(self._nass_case)
+        case.set("caseID", str(case_id))
+        case.find("Case").set("CaseStr", f"2015-11-{case_id:06}")
+
+        vehicle_sum = case.find("VehicleSum[@VehicleNumber='1']")
+        vehicle_sum.find("Make").set("value", str(values["make"]))
+        vehicle_sum.find("Make").text = values["make_name"]
+        vehicle_sum.find("Model").set("value", str(values["model"]))
+        vehicle_sum.find("Model").text = values["model_name"]
+        vehicle_sum.find("Year").text = str(values["year"])
+
+        exterior_forms = case.findall("VehicleExteriorForms/VehicleExteriorForm")
+        exterior = exterior_forms[0]
+        general = case.find("GeneralVehicleForms/GeneralVehicleForm[@VehicleNumber='1']")
+        for form in (exterior, general):
+            form.find("Make").text = values["make_name"]
+            form.find("Model").text = values["model_name"]
+            form.find("ModelYear").text = str(values["year"])
+
+        # Repeat the sample event, and each vehicle's CDC and crush profile of it, per event
+        sample_event = case.find("EventSum")
+        event_index = list(case).index(sample_event)
+        case.remove(sample_event)
+        samples = [
+            (form, form.find("CDCevent"), form.find("CrushObject")) for form in exterior_forms
+        ]
+        for form, cdc, crush in samples:
+            form.remove(cdc)
+            form.remove(crush)
+
+        for event_num, event in enumerate(values["events"], start=1):
+            event_sum = copy.deepcopy(sample_event)
+            event_sum.set("EventNumber", str(event_num))
+            case.insert(event_index + event_num - 1, event_sum)
+
+            for form, sample_cdc, sample_crush in samples:
+                cdc = copy.deepcopy(sample_cdc)
+                cdc.set("eventNumber", str(event_num))
+                crush = copy.deepcopy(sample_crush)
+                crush.find("EventNumber").text = str(event_num)
+                if form is exterior:
+                    cdc.find("Total").text = str(event["total"])
+                    cdc.find("Lateral").text = str(event["lateral"])
+                    cdc.find("Longitudinal").text = str(event["longitudinal"])
+                    for i, value in enumerate(event["crush"], start=1):
+                        crush.find(f"AVG_C{i}").set("value", str(value))
+                    crush.find("SMASHL").set("value", str(event["smashl"]))
+                form.append(cdc)
+                form.append(crush)
+        return ET.tostring(case, encoding="utf-8", xml_declaration=True)
+
+    @staticmethod
+    def models(make: int | None) -> bytes:
+        _, models = MAKES.get(make, ("", {}))
+        return json.dumps(
+            [{"Key": value, "Value": name} for value, name in models.items()]
+        ).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeCrashviewer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query, keep_blank_values=True)
+        # Query strings like "?GetXML&caseid=1" have flags without values
+        flags = {key for key, values in query.items() if values == [""]}
+        route, body, content_type, can_fail = self._route(parts.path, query, flags)
+
+        server = self.server
+        delay = server.config.latency + random.uniform(0, server.config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        status = 200
+        if body is None:
+            status, body, content_type = 404, b"Not Found", "text/plain"
+        elif can_fail and random.random() < server.config.error_rate:
+            status, body, content_type = 500, b"Internal Server Error", "text/plain"
+        server.count(route, status)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if route == "nass_case":
+            self.send_header("Set-Cookie", "ASP.NET_SessionId=benchmark; path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(
+        self, path: str, query: dict, flags: set
+    ) -> tuple[str, bytes | None, str, bool]:
+        """Get the route name, body, content type, and whether error injection applies."""
+        documents = self.server.documents
+
+        def value(key: str, default: str = "") -> str:
+            return query.get(key, [default])[0]
+
+        def number(key: str) -> int | None:
+            match = re.match(r"-?\d+", value(key))
+            return int(match.group()) if match else None
+
+        html = "text/html; charset=utf-8"
+        if path == "/CISS/Index":
+            page = number("currentPage") or 1
+            href = "/CISS/Details?Study=CISS&CaseId={case_id}"
+            return "ciss_case_list", documents.case_list(page, href), html, False
+        if path == "/LegacyCDS":
+            page = number("currentPage") or 1
+            href = "/nass-cds/CaseForm.aspx?xsl=main.xsl&CaseID={case_id}"
+            return "nass_case_list", documents.case_list(page, href), html, False
+        if path == "/CISS/SearchFilter":
+            return "ciss_search", documents.search["CISS"], html, False
+        if path == "/LegacyCDS/Search":
+            return "nass_search", documents.search["NASS"], html, False
+        if path == "/SCI/GetvPICVehicleModelbyMake/":
+            return "ciss_models", documents.models(number("makeIds")), "application/json", False
+        if path == "/LegacyCDS/GetVehicleModels/":
+            make = next(
+                (key for key, (name, _) in MAKES.items() if name.lower() == value("make").lower()),
+                None,
+            )
+            return "nass_models", documents.models(make), "application/json", False
+
+        if path == "/CISS/CISSCrashData":
+            body = self._case(number("crashId"), documents.ciss_case)
+            return "ciss_case", body, "application/json; charset=utf-8", True
+        if path == "/nass-cds/CaseForm.aspx" and "GetXML" in flags:
+            body = self._case(number("caseid"), documents.nass_case)
+            return "nass_case", body, "text/xml; charset=utf-8", True
+        if path == "/nass-cds/CaseForm.aspx" and "ViewPage" in flags:
+            return "nass_edr", documents.edr, "text/html; charset=utf-8", True
+        if re.fullmatch(r"/photos/\d+/Image", path) or path == "/nass-cds/GetBinary.aspx":
+            return "image", documents.image, "image/jpeg", True
+        if re.fullmatch(r"/File/\d+", path):
+            return "ciss_edr", documents.edr, "application/octet-stream", True
+        if path == "/_stats":
+            return "stats", json.dumps(self.server.stats()).encode(), "application/json", False
+        return "unknown", None, "text/plain", False
+
+    def _case(self, case_id: int | None, document) -> bytes | None:
+        config = self.server.config
+        if case_id is None or not FIRST_CASE_ID <= case_id < FIRST_CASE_ID + config.cases:
+            return None
+        return document(case_id)
+
+
+class FakeCrashviewer(ThreadingHTTPServer):
+    """HTTP server answering the crashviewer requests the app makes with generated documents.
+
+    Requests served are counted by route and status, and can be read from the "/_stats" path.
+    """
+
+    daemon_threads = True
+    # Scrapes open a connection per request, many of them at once
+    request_queue_size = 128
+
+    def __init__(self, config: ServerConfig, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.config = config
+        self.documents = _Documents(config)
+        self._lock = threading.Lock()
+        # key: (route, status), value: requests served
+        self._counts: dict[tuple[str, int], int] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, route: str, status: int):
+        with self._lock:
+            self._counts[(route, status)] = self._counts.get((route, status), 0) + 1
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Get the requests served, keyed by route, then by status."""
+        stats = {}
+        with self._lock:
+            for (route, status), count in sorted(self._counts.items()):
+                stats.setdefault(route, {})[str(status)] = count
+        return stats
+
+    def start(self) -> threading.Thread:
+        """Serve requests in a background thread until shutdown() is called."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the server configuration options to an argument parser."""
+    defaults = ServerConfig()
+    parser.add_argument("--page-size", type=int, default=defaults.page_size)
+    parser.add_argument(
+        "--latency", type=float, default=defaults.latency, help="Seconds per response"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=defaults.jitter, help="Max extra random seconds"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=defaults.error_rate,
+        help="Share of case, image and EDR requests answered with a 500",
+    )
+    parser.add_argument(
+        "--match-rate",
+        type=float,
+        default=defaults.match_rate,
+        help="Share of cases matching the benchmark search",
+    )
+    parser.add_argument("--image-size", type=int, default=defaults.image_size)
+    parser.add_argument("--edr-size", type=int, default=defaults.edr_size)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace, cases: int) -> ServerConfig:
+    return ServerConfig(
+        cases=cases,
+        page_size=args.page_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        match_rate=args.match_rate,
+        image_size=args.image_size,
+        edr_size=args.edr_size,
+        seed=args.seed,
+    )
+
+
+def server_args(config: ServerConfig) -> list[str]:
+    """Get the command line arguments to start this script with a configuration."""
+    return [
+        arg
+        for name, value in asdict(config).items()
+        for arg in (f"--{name.replace('_', '-')}", str(value))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--cases", type=int, default=ServerConfig.cases)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeCrashviewer(config_from_args(args, args.cases), args.host, args.port)
+    print(f"Serving on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Startup benchmark.
+
+Reports the modules that take the longest to import when the main window is imported
+(using `python -X importtime`) and the wall time from process start until the main window
+has been shown and painted, compared against a target.
+
+Usage: python benchmarks/startup_importtime.py [--top N] [--runs N] [--offscreen]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+# Target wall time from process start to the first paint of the main window
+TARGET_FIRST_PAINT_SECS = 1.5
+
+# Builds the main window the same way main.py does, then reports once the window receives its
+# first paint event and exits. The process exits right away rather than quitting the app, as
+# quitting closes the main window, which asks for confirmation in a modal dialog.
+FIRST_PAINT_SCRIPT = """
+import os
+import sys
+from PyQt6.QtCore import QObject, QEvent
+from PyQt6.QtWidgets import QApplication
+
+from app.main_window import MainWindow
+
+
+class PaintWatcher(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            print("painted", flush=True)
+            os._exit(0)
+        return False
+
+
+app = QApplication(sys.argv)
+app.setStyle("fusion")
+window = MainWindow()
+watcher = PaintWatcher()
+window.installEventFilter(watcher)
+window.show()
+app.exec()
+"""
+
+
+def import_times(module: str) -> list[tuple[int, int, str]]:
+    """Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        list[tuple[int, int, str]]: (self us, cumulative us, module) for every imported module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}:\n{result.stderr}")
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return times
+
+
+def time_to_first_paint(offscreen: bool) -> float:
+    env = os.environ.copy()
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", FIRST_PAINT_SCRIPT],
+        cwd=SRC_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    elapsed = None
+    for line in process.stdout:
+        if line.strip() == "painted":
+            elapsed = time.perf_counter() - start
+            break
+    process.wait(timeout=30)
+    if elapsed is None:
+        raise RuntimeError("The main window was never painted.")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=20, help="number of modules to list")
+    parser.add_argument("--runs", type=int, default=3, help="number of first paint runs")
+    parser.add_argument(
+        "--offscreen", action="store_true", help="use Qt's offscreen platform"
+    )
+    args = parser.parse_args()
+
+    times = import_times("app.main_window")
+    total = next(cumulative for _, cumulative, name in times if name.strip() == "app.main_window")
+    print(f"Import of app.main_window: {total / 1e3:.1f} ms cumulative")
+    print(f"{'self [ms]':>10} {'cumul [ms]':>11}  module")
+    for self_us, cumulative_us, name in sorted(times, key=lambda t: t[1], reverse=True)[
+        : args.top
+    ]:
+        print(f"{self_us / 1e3:10.1f} {cumulative_us / 1e3:11.1f}  {name}")
+
+    heavy = ("matplotlib", "PIL", "bs4", "numpy", "fuzzywuzzy", "rapidfuzz")
+    loaded = sorted({name.strip().split(".")[0] for _, _, name in times} & set(heavy))
+    print(f"Heavy modules imported at startup: {', '.join(loaded) or 'none'}")
+
+    paints = [time_to_first_paint(args.offscreen) for _ in range(args.runs)]
+    best = min(paints)
+    status = "OK" if best <= TARGET_FIRST_PAINT_SECS else "OVER TARGET"
+    print(
+        f"Time to first paint: {best:.3f}s (best of {args.runs}), "
+        f"target {TARGET_FIRST_PAINT_SECS:.1f}s: {status}"
+    )
+    sys.exit(0 if best <= TARGET_FIRST_PAINT_SECS else 1)
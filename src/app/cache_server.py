@@ -0,0 +1,611 @@
+"""Shared caching proxy for crashviewer.
+
+A headless service that desktop clients use as their base URL (the baseUrl setting), so that
+each crashviewer response is fetched from NHTSA only once across a team. Requests are only
+accepted for the endpoints the scrapers request (see the scrapers' URL attributes), and are
+answered from an on-disk store when possible. Otherwise they are fetched from the upstream
+site with a RequestHandler, which rate limits every fetch of every client together and shares
+the upstream requests fairly between clients. Concurrent requests for the same URL share a
+single upstream fetch.
+
+Searches, vehicle models and case lists are refetched once older than --list-ttl. Case
+documents, images and EDR files are kept until older than --document-ttl (forever by default).
+Only successful responses are stored; failed upstream requests are answered with a 502.
+
+NASS images can only be fetched with the session cookie set with a recent case document, so
+the proxy keeps a session per case, refreshing the case document upstream whenever an image
+is not stored and the session is missing or has expired. Cookies sent by clients are ignored.
+
+Clients wait for their response while the fetch is queued behind everyone else's, so their
+request timeout may need to be raised when the proxy is busy.
+
+The store can be inspected at /_cache/stats, which also includes the request handler's
+statistics.
+
+Usage: python -m app.cache_server [--host HOST] [--port N] [--store DIR] [--upstream URL]
+    [--rate-limit S] [--timeout S] [--wait S] [--list-ttl S] [--document-ttl S]
+    [--log-level LEVEL]
+(run from the src directory)
+"""
+
+import argparse
+from dataclasses import dataclass, field
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal, pyqtSlot
+from requests import Response
+
+from app.scrape import (
+    DEFAULT_BASE_URL,
+    ENDPOINTS,
+    DownloadQueueItem,
+    Priority,
+    RequestHandler,
+    RequestQueueItem,
+    SCRAPERS,
+    normalize_base_url,
+)
+
+# key: endpoint name, value: scraper attribute holding the endpoint's URL template
+ENDPOINT_URL_ATTRS = {
+    "search": "search_url",
+    "models": "models_url",
+    "case_list": "case_list_url",
+    "case": "case_url_raw",
+    "image": "img_url",
+    "edr": "edr_url",
+}
+# Endpoints whose responses change as cases are added to crashviewer
+LIST_ENDPOINTS = ("search", "models", "case_list")
+# Priority of upstream fetches, by endpoint. Fetches of other endpoints are IMMEDIATE.
+ENDPOINT_PRIORITIES = {
+    "case_list": Priority.CASE_LIST,
+    "case": Priority.CASE,
+    "image": Priority.IMAGE,
+}
+# Response headers stored and sent back to clients
+STORED_HEADERS = ("Content-Type", "Content-Disposition", "Last-Modified")
+
+STATS_PATH = "/_cache/stats"
+
+
+@dataclass(frozen=True)
+class Route:
+    """An endpoint of a database, matched by the path and query parameter names of its URL
+    template."""
+
+    database: str
+    endpoint: str
+    path: re.Pattern
+    query_keys: frozenset[str]
+    # Query parameter holding the case ID, if the template has one
+    case_id_key: str | None = None
+
+    @classmethod
+    def from_template(cls, database: str, endpoint: str, template: str) -> "Route":
+        path, _, query = template.partition("?")
+        # Placeholders (e.g. "{obj_id}") match a single path segment
+        pattern = "[^/]+".join(re.escape(part) for part in re.split(r"\{\w+\}", path))
+        query = parse_qsl(query, keep_blank_values=True)
+        case_id_key = next((key for key, value in query if value == "{case_id}"), None)
+        return cls(
+            database,
+            endpoint,
+            re.compile(pattern),
+            frozenset(key for key, _ in query),
+            case_id_key,
+        )
+
+    def case_id(self, target: str) -> str | None:
+        """Get the case ID in the query of a request target matching the route."""
+        if self.case_id_key is None:
+            return None
+        return dict(parse_qsl(urlsplit(target).query, keep_blank_values=True)).get(
+            self.case_id_key
+        )
+
+
+class RouteTable:
+    """The endpoints of every scraper, built from their URL templates."""
+
+    def __init__(self):
+        routes = []
+        for database, scraper in SCRAPERS.items():
+            for endpoint, attr in ENDPOINT_URL_ATTRS.items():
+                template = getattr(scraper, attr, None)
+                if isinstance(template, str):
+                    routes.append(Route.from_template(database, endpoint, template))
+        # Templates sharing a path (e.g. NASS case documents and EDR pages) are told apart by
+        # their query parameters, so the ones with the most parameters are tried first
+        self._routes = sorted(routes, key=lambda route: -len(route.query_keys))
+
+    def match(self, target: str) -> Route | None:
+        """Get the route of a request target (path and query), or None if no endpoint has it."""
+        parts = urlsplit(target)
+        keys = {key for key, _ in parse_qsl(parts.query, keep_blank_values=True)}
+        for route in self._routes:
+            if route.path.fullmatch(parts.path) and route.query_keys <= keys:
+                return route
+        return None
+
+
+@dataclass
+class StoredResponse:
+    body_path: Path
+    headers: dict[str, str]
+    fetched_at: float  # time.time() of the fetch
+    size: int
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ResponseStore:
+    """Responses stored on disk, keyed by request target.
+
+    Each response is a body file and a JSON metadata file next to it, in a directory named
+    after the first characters of the target's hash. Both files are written atomically, the
+    body first, so a response is only found once it is complete. Several processes can share
+    a store, although each fetches its own misses.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def body_path(self, target: str) -> Path:
+        key = hashlib.sha256(target.encode("utf-8")).hexdigest()
+        return self.root / key[:2] / key
+
+    def _metadata_path(self, target: str) -> Path:
+        body_path = self.body_path(target)
+        return body_path.with_name(body_path.name + ".json")
+
+    def get(self, target: str, ttl: float | None) -> StoredResponse | None:
+        """Get the stored response of a request target.
+
+        Args:
+            target (str): Path and query of the request.
+            ttl (float | None): Maximum age of the response in seconds. None if it never
+                expires.
+
+        Returns:
+            StoredResponse | None: The response, or None if it is not stored or has expired.
+        """
+        try:
+            metadata = json.loads(self._metadata_path(target).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        entry = StoredResponse(
+            self.body_path(target),
+            metadata["headers"],
+            metadata["fetched_at"],
+            metadata["size"],
+        )
+        if ttl is not None and entry.age() > ttl:
+            return None
+        if not entry.body_path.is_file():
+            return None
+        return entry
+
+    def put(self, target: str, endpoint: str, response: Response, size: int) -> StoredResponse:
+        """Store the metadata of a response whose body has been downloaded to body_path()."""
+        entry = StoredResponse(
+            self.body_path(target),
+            {
+                name: response.headers[name]
+                for name in STORED_HEADERS
+                if name in response.headers
+            },
+            time.time(),
+            size,
+        )
+        metadata = {
+            "target": target,
+            "endpoint": endpoint,
+            "url": response.url,
+            "headers": entry.headers,
+            "fetched_at": entry.fetched_at,
+            "size": size,
+        }
+        path = self._metadata_path(target)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return entry
+
+
+@dataclass(eq=False)
+class _Fetch:
+    """An upstream fetch of a request target, shared by every client waiting for it."""
+
+    target: str
+    route: Route
+    client: str
+    done: threading.Event = field(default_factory=threading.Event)
+    entry: StoredResponse | None = None
+    # Called in the main thread with the fetch once it is done
+    followers: list = field(default_factory=list)
+
+
+class Upstream(QObject):
+    """Fetches request targets missing from the store from the upstream site.
+
+    Lives in the main thread with the request handler. The HTTP server's threads call get(),
+    which starts fetches through a queued signal and waits for them to finish.
+    """
+
+    fetch_requested = pyqtSignal(object)
+
+    def __init__(
+        self,
+        req_handler: RequestHandler,
+        store: ResponseStore,
+        list_ttl: float | None,
+        document_ttl: float | None,
+        wait: float,
+    ):
+        super().__init__()
+        self._logger = logging.getLogger(__name__)
+        self._req_handler = req_handler
+        self._store = store
+        self._list_ttl = list_ttl
+        self._document_ttl = document_ttl
+        self._wait = wait
+
+        self._lock = threading.Lock()
+        # key: request target, value: its ongoing fetch
+        self._pending: dict[str, _Fetch] = {}
+        self.counts = {"hits": 0, "misses": 0, "coalesced": 0, "failures": 0, "timeouts": 0}
+        # Session cookies set with case documents. key: (database, case ID),
+        # value: cookie and time.monotonic() it was set. Only used in the main thread.
+        self._sessions: dict[tuple[str, str], tuple[str, float]] = {}
+
+        self.fetch_requested.connect(self._start_fetch)
+        self._req_handler.response_received.connect(self._handle_response)
+        self._req_handler.request_failed.connect(self._handle_failure)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counts, "pending": len(self._pending)}
+
+    def ttl(self, route: Route) -> float | None:
+        return self._list_ttl if route.endpoint in LIST_ENDPOINTS else self._document_ttl
+
+    def get(self, target: str, route: Route, client: str) -> tuple[StoredResponse | None, bool]:
+        """Get the response of a request target, from the store or upstream. Called from the
+        HTTP server's threads.
+
+        Args:
+            target (str): Path and query of the request.
+            route (Route): Route the target matches.
+            client (str): Address of the client, which upstream requests are shared by.
+
+        Raises:
+            TimeoutError: If the upstream fetch did not finish within the wait time.
+
+        Returns:
+            tuple[StoredResponse | None, bool]: The response, or None if the upstream fetch
+                failed, and whether it was stored already.
+        """
+        entry = self._store.get(target, self.ttl(route))
+        if entry is not None:
+            self._count("hits")
+            return entry, True
+
+        with self._lock:
+            fetch = self._pending.get(target)
+            started = fetch is None
+            if started:
+                # Another client's fetch may have finished since the store was checked
+                entry = self._store.get(target, self.ttl(route))
+                if entry is not None:
+                    self.counts["hits"] += 1
+                    return entry, True
+                fetch = _Fetch(target, route, client)
+                self._pending[target] = fetch
+            self.counts["misses" if started else "coalesced"] += 1
+
+        if started:
+            self.fetch_requested.emit(fetch)
+        if not fetch.done.wait(self._wait):
+            self._count("timeouts")
+            raise TimeoutError(f"Fetching {target} took longer than {self._wait}s.")
+        return fetch.entry, False
+
+    @pyqtSlot(object)
+    def _start_fetch(self, fetch: _Fetch):
+        route = fetch.route
+        scraper = SCRAPERS[route.database]
+        headers = {}
+        if route.endpoint == "image" and scraper.image_document_max_age is not None:
+            case_id = route.case_id(fetch.target)
+            session = self._sessions.get((route.database, case_id))
+            if session is None or time.monotonic() - session[1] > scraper.image_document_max_age:
+                self._refresh_session(route.database, case_id, fetch)
+                return
+            headers["Cookie"] = session[0]
+        self._enqueue(fetch, headers)
+
+    def _refresh_session(self, database: str, case_id: str, waiting: _Fetch):
+        """Fetch a case document upstream to start a new session for its images, then
+        continue the fetch waiting for it."""
+
+        def resume(document: _Fetch):
+            session = self._sessions.get((database, case_id))
+            if document.entry is None or session is None:
+                self._logger.error(
+                    f"Failed to start a session for the images of {database} case {case_id}."
+                )
+                self._finish(waiting, None)
+            else:
+                self._enqueue(waiting, {"Cookie": session[0]})
+
+        scraper = SCRAPERS[database]
+        target = scraper.case_url_raw.format(case_id=case_id)
+        with self._lock:
+            document = self._pending.get(target)
+            if document is None:
+                route = Route.from_template(database, "case", scraper.case_url_raw)
+                document = _Fetch(target, route, waiting.client)
+                self._pending[target] = document
+                start = True
+            else:
+                start = False
+        document.followers.append(resume)
+        if start:
+            self._logger.debug(f"Refreshing the session of {database} case {case_id}.")
+            self._enqueue(document, {})
+
+    def _enqueue(self, fetch: _Fetch, headers: dict):
+        route = fetch.route
+        priority = ENDPOINT_PRIORITIES.get(route.endpoint, Priority.IMMEDIATE)
+        self._req_handler.enqueue_request(
+            DownloadQueueItem(
+                ENDPOINTS.url(route.database, route.endpoint, fetch.target),
+                headers=headers,
+                priority=priority.value,
+                extra_data={
+                    "for": "cache_server",
+                    RequestHandler.FAIR_QUEUE_KEY: fetch.client,
+                    "fetch": fetch,
+                },
+                dest=self._store.body_path(fetch.target),
+            )
+        )
+
+    def _finish(self, fetch: _Fetch, entry: StoredResponse | None):
+        with self._lock:
+            if self._pending.get(fetch.target) is fetch:
+                del self._pending[fetch.target]
+            if entry is None:
+                self.counts["failures"] += 1
+        fetch.entry = entry
+        fetch.done.set()
+        for follower in fetch.followers:
+            follower(fetch)
+
+    @pyqtSlot(RequestQueueItem, Response)
+    def _handle_response(self, request: RequestQueueItem, response: Response):
+        fetch: _Fetch = request.extra_data.get("fetch")
+        if request.extra_data.get("for") != "cache_server" or fetch is None:
+            return
+
+        route = fetch.route
+        try:
+            entry = self._store.put(fetch.target, route.endpoint, response, request.bytes_written)
+        except OSError as e:
+            self._logger.error(f"Failed to store the response of {fetch.target}: {e}")
+            entry = None
+
+        if route.endpoint == "case" and SCRAPERS[route.database].image_document_max_age:
+            cookie = response.headers.get("Set-Cookie")
+            if cookie:
+                self._sessions[(route.database, route.case_id(fetch.target))] = (
+                    cookie,
+                    time.monotonic(),
+                )
+        self._finish(fetch, entry)
+
+    @pyqtSlot(RequestQueueItem)
+    def _handle_failure(self, request: RequestQueueItem):
+        fetch: _Fetch = request.extra_data.get("fetch")
+        if request.extra_data.get("for") == "cache_server" and fetch is not None:
+            self._finish(fetch, None)
+
+
+class _ProxyRequestHandler(BaseHTTPRequestHandler):
+    server: "CacheServer"
+
+    def do_GET(self):
+        if self.path == STATS_PATH:
+            self._send_stats()
+            return
+
+        route = self.server.routes.match(self.path)
+        if route is None:
+            self.send_error(404, "Not a crashviewer endpoint")
+            return
+
+        try:
+            entry, hit = self.server.upstream.get(self.path, route, self.client_address[0])
+        except TimeoutError as e:
+            self.send_error(504, str(e))
+            return
+        if entry is None:
+            self.send_error(502, "Upstream request failed")
+            return
+
+        try:
+            body = entry.body_path.open("rb")
+        except OSError:
+            # The response was replaced or removed from the store since it was found
+            self.send_error(503, "Stored response unavailable, retry")
+            return
+        with body:
+            self.send_response(200)
+            for name, value in entry.headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(os.fstat(body.fileno()).st_size))
+            self.send_header("X-Cache", "HIT" if hit else "MISS")
+            self.end_headers()
+            shutil.copyfileobj(body, self.wfile)
+
+    def _send_stats(self):
+        body = json.dumps(
+            {
+                "cache": self.server.upstream.stats(),
+                "requests": self.server.req_handler.stats.snapshot(),
+            },
+            indent=2,
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(f"{self.address_string()} - {format % args}")
+
+
+class CacheServer(ThreadingHTTPServer):
+    """HTTP server answering each client request in its own thread from the upstream."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, address: tuple[str, int], upstream: Upstream, req_handler: RequestHandler
+    ):
+        super().__init__(address, _ProxyRequestHandler)
+        self.routes = RouteTable()
+        self.upstream = upstream
+        self.req_handler = req_handler
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def _ttl(value: str) -> float | None:
+    """Parse a TTL in seconds. Negative values never expire."""
+    ttl = float(value)
+    return None if ttl < 0 else ttl
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared caching proxy for crashviewer.")
+    parser.add_argument("--host", default="0.0.0.0", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on.")
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=Path("crashviewer_cache"),
+        help="Directory the responses are stored in.",
+    )
+    parser.add_argument(
+        "--upstream",
+        default=DEFAULT_BASE_URL,
+        help="Base URL responses missing from the store are fetched from.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=RequestHandler.DEFAULT_RATE_LIMIT,
+        help="Minimum seconds between upstream requests, shared by every client.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=RequestHandler.DEFAULT_TIMEOUT,
+        help="Timeout of upstream requests in seconds.",
+    )
+    parser.add_argument(
+        "--wait",
+        type=float,
+        default=300,
+        help="Seconds a client waits for an upstream fetch before receiving a 504.",
+    )
+    parser.add_argument(
+        "--list-ttl",
+        type=_ttl,
+        default=86400,
+        help="Seconds searches, vehicle models and case lists are kept. Negative to keep them forever.",
+    )
+    parser.add_argument(
+        "--document-ttl",
+        type=_ttl,
+        default=None,
+        help="Seconds case documents, images and EDR files are kept. Kept forever by default.",
+    )
+    parser.add_argument("--log-level", default="INFO", help="Logging level.")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s - %(name)s - %(message)s",
+    )
+    logger = logging.getLogger(__name__)
+
+    try:
+        ENDPOINTS.configure(normalize_base_url(args.upstream))
+    except ValueError as e:
+        parser.error(str(e))
+
+    app = QCoreApplication(sys.argv)
+    req_handler = RequestHandler()
+    req_handler.update_rate_limit(args.rate_limit)
+    req_handler.update_timeout(args.timeout)
+    upstream = Upstream(
+        req_handler,
+        ResponseStore(args.store),
+        args.list_ttl,
+        args.document_ttl,
+        args.wait,
+    )
+    server = CacheServer((args.host, args.port), upstream, req_handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(
+        f"Serving {ENDPOINTS.base_url} on {server.url}, storing responses in "
+        f"'{args.store.resolve()}'."
+    )
+
+    # Qt's event loop does not return to Python on its own, so the interpreter is woken up
+    # periodically to handle Ctrl+C
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    wake_timer = QTimer()
+    wake_timer.timeout.connect(lambda: None)
+    wake_timer.start(200)
+
+    app.exec()
+    logger.info("Shutting down.")
+    server.shutdown()
+    server.server_close()
+    req_handler.stop()
+
+
+if __name__ == "__main__":
+    main()
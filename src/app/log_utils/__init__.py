@@ -1,2 +1,3 @@
-from .color_formatter import ColorFormatter
 from .log_handler import QtLogHandler
+from .log_list import LogList
+from .file_log import FileLogSink, JsonLinesFormatter
@@ -0,0 +1,128 @@
+import copy
+import gzip
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import os
+from pathlib import Path
+from queue import SimpleQueue
+import shutil
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as a single line of JSON."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry)
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Queues records for the file handler to format.
+
+    QueueHandler formats records before queueing them, which would bake its own format into
+    the message written by the file handler. Only the message arguments are merged here, and
+    tracebacks are rendered to exc_text, as traceback objects are not kept past the call.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class FileLogSink:
+    """Writes log records to a size-capped, rotating log file from a background thread.
+
+    Records are put on a queue by a QueueHandler on the root logger, which is cheap enough
+    to call from any thread, and written to disk by a QueueListener thread. The handler can
+    be installed before the log directory is known; records logged until start() is called
+    are kept in the queue and written once the listener starts.
+    """
+
+    TEXT_FILENAME = "app.log"
+    JSON_FILENAME = "app.jsonl"
+    TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(threadName)s - %(name)s - %(message)s"
+
+    def __init__(self):
+        self._queue = SimpleQueue()
+        self.handler = _RecordQueueHandler(self._queue)
+        self._listener: QueueListener | None = None
+        self._file_handler: RotatingFileHandler | None = None
+
+        self.log_path: Path | None = None
+
+    def start(
+        self,
+        log_dir: Path,
+        max_bytes: int,
+        backup_count: int,
+        compress: bool = True,
+        json_lines: bool = False,
+    ):
+        """Start writing queued records to a log file in a directory, stopping any previous listener.
+
+        Args:
+            log_dir (Path): Directory to write the log files to.
+            max_bytes (int): Size at which the log file is rotated.
+            backup_count (int): Number of rotated log files to keep.
+            compress (bool, optional): Gzip rotated log files. Defaults to True.
+            json_lines (bool, optional): Write one JSON object per record instead of plain text.
+                Defaults to False.
+        """
+        self.stop()
+
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = log_dir / (self.JSON_FILENAME if json_lines else self.TEXT_FILENAME)
+
+        file_handler = RotatingFileHandler(
+            self.log_path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        file_handler.setFormatter(
+            JsonLinesFormatter() if json_lines else logging.Formatter(self.TEXT_FORMAT)
+        )
+        if compress:
+            file_handler.namer = self._gzip_namer
+            file_handler.rotator = self._gzip_rotator
+
+        self._file_handler = file_handler
+        self._listener = QueueListener(self._queue, file_handler)
+        self._listener.start()
+
+    def stop(self):
+        """Write all queued records and stop the listener thread."""
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+        if self._file_handler:
+            self._file_handler.close()
+            self._file_handler = None
+
+    @staticmethod
+    def _gzip_namer(name: str) -> str:
+        return name + ".gz"
+
+    @staticmethod
+    def _gzip_rotator(source: str, dest: str):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
@@ -1,33 +1,51 @@
 import logging
+from queue import Empty, SimpleQueue
 
-from PyQt6.QtCore import QObject, QThreadPool, QRunnable, pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 
 
 class QtLogHandler(logging.Handler, QObject):
-    log_message = pyqtSignal(str)
+    """Forwards log records to the GUI in batches.
+
+    Records can be logged from any thread. They are formatted and put on a queue, which a
+    timer in the handler's (GUI) thread drains periodically, emitting every message
+    collected since the last drain in a single signal, in the order they were logged.
+    Each message is emitted as a (level, formatted message) tuple.
+    """
+
+    log_messages = pyqtSignal(list)
+
+    FLUSH_INTERVAL_MS = 100
 
     def __init__(self):
         logging.Handler.__init__(self)
         QObject.__init__(self)
-        self.threadpool = QThreadPool()
+        self._queue: SimpleQueue[tuple[int, str]] = SimpleQueue()
 
-    def emit(self, record):
-        task = LogTask(self, record)
-        self.threadpool.start(task)
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
 
-    def handle(self, record):
-        msg = self.format(record)
-        self.log_message.emit(msg)
+    def emit(self, record):
+        try:
+            self._queue.put_nowait((record.levelno, self.format(record)))
+        except Exception:
+            self.handleError(record)
 
     def flush(self):
-        pass
-
-
-class LogTask(QRunnable):
-    def __init__(self, handler: QtLogHandler, record):
-        super().__init__()
-        self.handler = handler
-        self.record = record
-
-    def run(self):
-        self.handler.handle(self.record)
+        """Emit all queued messages as one batch."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Empty:
+                break
+
+        if batch:
+            self.log_messages.emit(batch)
+
+    def close(self):
+        self._timer.stop()
+        self.flush()
+        super().close()
@@ -0,0 +1,118 @@
+from collections import deque
+import logging
+from typing import NamedTuple
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, QVariant
+from PyQt6.QtGui import QColor
+
+
+class LogLine(NamedTuple):
+    seq: int  # Increasing number used to tell which lines have been evicted
+    level: int
+    text: str
+
+
+class LogList(QAbstractListModel):
+    """List model over the most recent log lines.
+
+    Lines are kept in a fixed-capacity ring buffer, so memory use and the cost of appending
+    do not grow with the length of the session. The lines shown can be filtered by minimum
+    level and a case-insensitive search string.
+    """
+
+    DEFAULT_CAPACITY = 50_000
+
+    level_colors = {
+        logging.DEBUG: QColor(200, 200, 255),  # light blue
+        logging.INFO: QColor("white"),
+        logging.WARNING: QColor(255, 255, 100),  # light yellow
+        logging.ERROR: QColor(255, 100, 100),  # light red
+        logging.CRITICAL: QColor("red"),
+    }
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        super().__init__()
+
+        self._lines: deque[LogLine] = deque(maxlen=capacity)
+        # Lines that pass the filters, in the same order as self._lines
+        self._rows: deque[LogLine] = deque()
+        self._next_seq = 0
+
+        self._min_level = logging.NOTSET
+        self._search = ""
+
+    def rowCount(self, parent: QModelIndex = ...) -> int:
+        return len(self._rows)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < self.rowCount()):
+            return QVariant()
+
+        line = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return line.text
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            return self.level_colors.get(line.level, QColor("white"))
+
+        return QVariant()
+
+    def _accepts(self, line: LogLine) -> bool:
+        return line.level >= self._min_level and (
+            not self._search or self._search in line.text.lower()
+        )
+
+    def append_messages(self, messages: list[tuple[int, str]]):
+        """Append a batch of (level, formatted message) tuples, evicting the oldest lines
+        once the buffer is full. Multi-line messages are split into one line per row."""
+        new_lines = []
+        for level, message in messages:
+            for text in message.splitlines() or [""]:
+                new_lines.append(LogLine(self._next_seq, level, text))
+                self._next_seq += 1
+        if not new_lines:
+            return
+
+        # Only the newest lines can survive a batch larger than the buffer
+        new_lines = new_lines[-self._lines.maxlen :]
+        self._lines.extend(new_lines)
+
+        # Drop visible rows whose lines have been evicted from the buffer
+        oldest_seq = self._lines[0].seq
+        evicted = 0
+        for line in self._rows:
+            if line.seq >= oldest_seq:
+                break
+            evicted += 1
+        if evicted:
+            self.beginRemoveRows(QModelIndex(), 0, evicted - 1)
+            for _ in range(evicted):
+                self._rows.popleft()
+            self.endRemoveRows()
+
+        accepted = [line for line in new_lines if self._accepts(line)]
+        if accepted:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(accepted) - 1)
+            self._rows.extend(accepted)
+            self.endInsertRows()
+
+    def set_filter(self, min_level: int = None, search: str = None):
+        """Set the minimum level and/or search string of the lines shown."""
+        if min_level is not None:
+            self._min_level = min_level
+        if search is not None:
+            self._search = search.lower()
+
+        self.beginResetModel()
+        self._rows = deque(line for line in self._lines if self._accepts(line))
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines.clear()
+        self._rows.clear()
+        self.endResetModel()
+
+    def to_text(self) -> str:
+        """Get every buffered line, regardless of the filters, as plain text."""
+        return "\n".join(line.text for line in self._lines)
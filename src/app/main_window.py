@@ -5,14 +5,18 @@ from datetime import datetime
 from PyQt6.QtWidgets import QWidget, QApplication, QMessageBox
 from PyQt6.QtGui import QCloseEvent
 
-from app.log_utils import QtLogHandler, ColorFormatter
-from app.pages import MainMenu, LogsWindow, ProfileMenu, ScrapeMenu, SettingsMenu
+from app.log_utils import QtLogHandler, FileLogSink
+from app.pages import MainMenu, LogsWindow, PerformanceWindow, SettingsMenu
 from app.scrape import RequestHandler
 from app.models import DatabaseHandler
 from app.ui import Ui_MainWindow
 
 
 class MainWindow(QWidget):
+    LOGS_DIR = "logs"
+    # Request timings are saved here when a scrape completes
+    REQUEST_STATS_DIR = Path(LOGS_DIR) / "requests"
+
     def __init__(self):
         super().__init__()
 
@@ -27,64 +31,108 @@ class MainWindow(QWidget):
         self._logs_window = LogsWindow()
         self._log_handler = QtLogHandler()
         self._log_handler.setFormatter(
-            ColorFormatter("%(levelname)s - %(name)s - %(message)s")
+            logging.Formatter("%(levelname)s - %(name)s - %(message)s")
         )
         self._log_handler.setLevel(logging.DEBUG)
-        self._log_handler.log_message.connect(self._logs_window.handle_logger_message)
+        self._log_handler.log_messages.connect(self._logs_window.handle_logger_messages)
+        # Records are queued until the log file location is known from the settings
+        self._file_log = FileLogSink()
         logging.basicConfig(
             level=logging.DEBUG,
-            handlers=[self._log_handler, logging.FileHandler("app.log")],
+            handlers=[self._log_handler, self._file_log.handler],
         )
         self._logger = logging.getLogger(__name__)
-        # Clear the logs file
-        open("app.log", "w").close()
-        self._logger.info(
-            "This logs file serves to record all logs from the most recent application run."
-        )
         self._logger.info(f"Application started at {datetime.now()}")
 
+        self._performance_window = PerformanceWindow(self._req_handler.stats)
+
         # Setup menus
         self._mainMenuPage = MainMenu()
         self._settingsMenuPage = SettingsMenu(self._req_handler)
         data_dir = self._settingsMenuPage.get_save_path()
-        self._scrapeMenuPage = ScrapeMenu(self._req_handler, self._db_handler, data_dir)
-        self._profilesMenuPage = ProfileMenu(
-            self._req_handler, self._db_handler, data_dir
-        )
+        self._start_file_log(data_dir)
+        self._req_handler.stats.dump_dir = data_dir / self.REQUEST_STATS_DIR
         self.ui.stackedWidget.addWidget(self._mainMenuPage)
-        self.ui.stackedWidget.addWidget(self._scrapeMenuPage)
-        self.ui.stackedWidget.addWidget(self._profilesMenuPage)
         self.ui.stackedWidget.addWidget(self._settingsMenuPage)
 
+        # The scrape and profile menus (and the heavy modules they import) are created
+        # the first time they are navigated to
+        self._scrapeMenuPage = None
+        self._profilesMenuPage = None
+
         # Setup signals
-        back_btns = [
-            self._scrapeMenuPage.back,
-            self._profilesMenuPage.back,
-            self._settingsMenuPage.back,
-        ]
-        for btn in back_btns:
-            btn.connect(
-                lambda: self.ui.stackedWidget.setCurrentWidget(self._mainMenuPage)
-            )
+        self._settingsMenuPage.back.connect(self._show_main_menu)
 
-        self._mainMenuPage.new.connect(
-            lambda: self.ui.stackedWidget.setCurrentWidget(self._scrapeMenuPage)
-        )
-        self._mainMenuPage.existing.connect(
-            lambda: self.ui.stackedWidget.setCurrentWidget(self._profilesMenuPage)
-        )
+        self._mainMenuPage.new.connect(self._show_scrape_menu)
+        self._mainMenuPage.existing.connect(self._show_profiles_menu)
         self._mainMenuPage.settings.connect(
             lambda: self.ui.stackedWidget.setCurrentWidget(self._settingsMenuPage)
         )
         self._mainMenuPage.logs.connect(self._logs_window.show)
+        self._mainMenuPage.performance.connect(self._performance_window.show)
 
         self._settingsMenuPage.save_path_changed.connect(
-            self._profilesMenuPage.data_dir_changed
+            lambda path: self._start_file_log(Path(path))
         )
         self._settingsMenuPage.save_path_changed.connect(
-            self._scrapeMenuPage.data_dir_changed
+            lambda path: setattr(
+                self._req_handler.stats, "dump_dir", Path(path) / self.REQUEST_STATS_DIR
+            )
         )
 
+    def _show_main_menu(self):
+        self.ui.stackedWidget.setCurrentWidget(self._mainMenuPage)
+
+    def _show_scrape_menu(self):
+        if not self._scrapeMenuPage:
+            from app.pages import ScrapeMenu
+
+            self._scrapeMenuPage = ScrapeMenu(
+                self._req_handler,
+                self._db_handler,
+                self._settingsMenuPage.get_save_path(),
+            )
+            self.ui.stackedWidget.addWidget(self._scrapeMenuPage)
+            self._scrapeMenuPage.back.connect(self._show_main_menu)
+            self._settingsMenuPage.save_path_changed.connect(
+                self._scrapeMenuPage.data_dir_changed
+            )
+            self._scrapeMenuPage.set_profiling(
+                *self._settingsMenuPage.get_profiling_settings()
+            )
+            self._settingsMenuPage.profiling_changed.connect(
+                self._scrapeMenuPage.set_profiling
+            )
+        self.ui.stackedWidget.setCurrentWidget(self._scrapeMenuPage)
+
+    def _show_profiles_menu(self):
+        if not self._profilesMenuPage:
+            from app.pages import ProfileMenu
+
+            self._profilesMenuPage = ProfileMenu(
+                self._req_handler,
+                self._db_handler,
+                self._settingsMenuPage.get_save_path(),
+            )
+            self.ui.stackedWidget.addWidget(self._profilesMenuPage)
+            self._profilesMenuPage.back.connect(self._show_main_menu)
+            self._settingsMenuPage.save_path_changed.connect(
+                self._profilesMenuPage.data_dir_changed
+            )
+        self.ui.stackedWidget.setCurrentWidget(self._profilesMenuPage)
+
+    def _start_file_log(self, data_dir: Path):
+        try:
+            self._file_log.start(
+                data_dir / self.LOGS_DIR, **self._settingsMenuPage.get_log_settings()
+            )
+            logging.getLogger().addHandler(self._file_log.handler)
+            self._logger.info(f"Writing logs to '{self._file_log.log_path}'.")
+        except Exception as e:
+            # Stop queueing records that will never be written
+            logging.getLogger().removeHandler(self._file_log.handler)
+            self._logger.error(f"Failed to open log file in '{data_dir}': {e}")
+
     def closeEvent(self, event: QCloseEvent):
         """Safely close all threads/processes"""
 
@@ -98,12 +146,15 @@ class MainWindow(QWidget):
 
         if reply == QMessageBox.StandardButton.Yes:
             # Logger
-            self._logger.removeHandler(self._log_handler)
-            self._log_handler.threadpool.waitForDone()
+            logging.getLogger().removeHandler(self._log_handler)
+            self._log_handler.close()
+            logging.getLogger().removeHandler(self._file_log.handler)
+            self._file_log.stop()
 
             # Request handler
             self._req_handler.stop()
-            self._scrapeMenuPage.cleanup()
+            if self._scrapeMenuPage:
+                self._scrapeMenuPage.cleanup()
 
             # Database connection
             self._db_handler.close_connection()
@@ -1,6 +1,30 @@
-from .schema import Profile, ProfileEvent, Base, Event
+import importlib
+
+from .schema import Profile, ProfileEvent, Base, Event, CachedOptions, CaseDocument
+from .case_documents import make_case_document, case_document_response
 from .db_handler import DatabaseHandler
 from .scatterplot import ScatterPlotModel
 from .event_list import EventList
 from .profile_list import ProfileList
 from .event_table import EventTable
+from .event_export import EventExportWorker, CSVExportWorker, arrow_available
+from .profile_bundle import BundleExportWorker, BundleImportWorker, import_bundle
+
+# Names whose modules import heavy dependencies (numpy, PIL, pyarrow) are only imported on first use
+_LAZY_NAMES = {
+    "MetricCoefficients": ".derived_metrics",
+    "compute_metrics": ".derived_metrics",
+    "compute_event_metrics": ".derived_metrics",
+    "ImageCache": ".image_cache",
+    "ParquetExportWorker": ".arrow_io",
+    "FeatherExportWorker": ".arrow_io",
+    "read_event_file": ".arrow_io",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
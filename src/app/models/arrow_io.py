@@ -0,0 +1,174 @@
+import json
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet and Feather export and import need pyarrow
+    pa = None
+    pq = None
+
+from app.models import DatabaseHandler, Event, Profile, EventExportWorker
+
+# Numeric columns that only hold whole numbers. The other numeric columns may hold rounded
+# floats (e.g. curb weights), so they are stored as doubles.
+INTEGER_COLUMNS = ("case_id", "vehicle_num", "event_num", "model_year", "a_veh_num")
+# String columns with few distinct values, which are dictionary-encoded in Parquet files
+DICTIONARY_COLUMNS = (
+    "scraper_type",
+    "make",
+    "model",
+    "dmg_loc",
+    "underride",
+    "edr",
+    "a_make",
+    "a_model",
+    "a_year",
+    "a_dmg_loc",
+)
+IGNORED_COLUMN = "ignored"
+# Schema metadata key of the exported profile's name, parameters and timestamps
+PROFILE_METADATA_KEY = b"nhtsa_scrape.profile"
+ROW_GROUP_SIZE = 64 * 1024
+
+
+def _require_arrow():
+    if pa is None:
+        raise RuntimeError("The pyarrow package is needed for Parquet and Feather files.")
+
+
+def event_schema(profile: Profile) -> "pa.Schema":
+    """Get the schema of exported events, with the profile stored in its metadata. Database
+    IDs are left out, as they are only meaningful in the database they came from."""
+    _require_arrow()
+    fields = []
+    for column in Event.__table__.columns:
+        if column.key == "id":
+            continue
+        if column.type.python_type is str:
+            dtype = pa.string()
+        elif column.key in INTEGER_COLUMNS:
+            dtype = pa.int64()
+        else:
+            dtype = pa.float64()
+        fields.append(pa.field(column.key, dtype))
+    fields.append(pa.field(IGNORED_COLUMN, pa.bool_()))
+
+    metadata = {
+        "name": profile.name,
+        "params": profile.params,
+        "multi": profile.multi,
+        "created": profile.created,
+        "modified": profile.modified,
+    }
+    return pa.schema(fields, metadata={PROFILE_METADATA_KEY: json.dumps(metadata)})
+
+
+def _to_number(value, dtype: "pa.DataType"):
+    """Convert a stored value to the type of its column, or None if it is not a number
+    (e.g. "--" for a missing value)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(value) if pa.types.is_integer(dtype) else value
+
+
+def _record_batch(schema: "pa.Schema", headers: list[str], rows: list[tuple]):
+    """Convert rows of event columns (in table order, followed by the ignored status) to a
+    record batch with the given schema."""
+    columns = dict(zip([*headers, IGNORED_COLUMN], zip(*rows)))
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_floating(field.type) or pa.types.is_integer(field.type):
+            values = [_to_number(value, field.type) for value in values]
+        elif pa.types.is_string(field.type):
+            values = [None if value is None else str(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ArrowExportWorker(EventExportWorker):
+    """Base worker class to write the events of a profile to a columnar file. Every event of
+    the profile is written, with its ignored status, so the file can be imported as a copy of
+    the profile."""
+
+    def __init__(self, db_handler: DatabaseHandler, profile: Profile, data_dir: Path):
+        _require_arrow()
+        super().__init__(db_handler, profile, data_dir, include_ignored=True)
+        self._schema = event_schema(profile)
+
+    def _record_batches(self):
+        for rows in self._batches(ROW_GROUP_SIZE, with_ignored=True):
+            yield _record_batch(self._schema, self._headers, rows)
+
+
+class ParquetExportWorker(_ArrowExportWorker):
+    """Worker class to write the events of a profile to a zstd-compressed Parquet file, with a
+    row group per batch of rows read from the database."""
+
+    SUFFIX = ".parquet"
+
+    def _write(self, path: Path):
+        with pq.ParquetWriter(
+            path,
+            self._schema,
+            compression="zstd",
+            use_dictionary=list(DICTIONARY_COLUMNS),
+        ) as writer:
+            for batch in self._record_batches():
+                writer.write_batch(batch, row_group_size=ROW_GROUP_SIZE)
+
+
+class FeatherExportWorker(_ArrowExportWorker):
+    """Worker class to write the events of a profile to a zstd-compressed Feather (Arrow IPC)
+    file, with a record batch per batch of rows read from the database."""
+
+    SUFFIX = ".feather"
+
+    def _write(self, path: Path):
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.ipc.new_file(path, self._schema, options=options) as writer:
+            for batch in self._record_batches():
+                writer.write_batch(batch)
+
+
+def read_event_file(path: Path) -> tuple[Profile, Iterator[list[dict]]]:
+    """Read a Parquet or Feather file written by an export worker.
+
+    Returns:
+        tuple[Profile, Iterator[list[dict]]]: A new profile with the exported profile's name,
+            parameters and creation time, and the column values of the events in batches.
+
+    Raises:
+        ValueError: If the file was not exported from a profile.
+    """
+    _require_arrow()
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        parquet_file = pq.ParquetFile(path)
+        schema = parquet_file.schema_arrow
+        batches = parquet_file.iter_batches(batch_size=ROW_GROUP_SIZE)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        schema = reader.schema
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+    metadata = (schema.metadata or {}).get(PROFILE_METADATA_KEY)
+    if metadata is None:
+        raise ValueError(f"{path.name} was not exported from a profile.")
+    missing = {"scraper_type", "case_id", "vehicle_num", "event_num"} - set(schema.names)
+    if missing:
+        raise ValueError(f"{path.name} is missing the columns {', '.join(sorted(missing))}.")
+
+    metadata = json.loads(metadata)
+    profile = Profile(
+        name=metadata["name"],
+        params=metadata["params"],
+        multi=metadata["multi"],
+        created=metadata["created"],
+        modified=metadata["modified"],
+    )
+    return profile, (batch.to_pylist() for batch in batches)
@@ -0,0 +1,71 @@
+from datetime import datetime
+import gzip
+import json
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import zstandard
+except ImportError:  # Fall back to gzip, which compresses raw case documents less tightly
+    zstandard = None
+
+from app.models import CaseDocument
+
+ZSTD = "zstd"
+GZIP = "gzip"
+ZSTD_LEVEL = 9
+
+
+def compress(content: bytes) -> tuple[str, bytes]:
+    """Compress a document with zstd if it is installed, otherwise with gzip.
+
+    Returns:
+        tuple[str, bytes]: The encoding used and the compressed data.
+    """
+    if zstandard is not None:
+        return ZSTD, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    # A fixed mtime makes identical documents compress to identical data
+    return GZIP, gzip.compress(content, mtime=0)
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == GZIP:
+        return gzip.decompress(data)
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("The zstandard package is needed to read this case document.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown case document encoding '{encoding}'.")
+
+
+def make_case_document(scraper_type: str, case_id, response: Response) -> CaseDocument:
+    """Compress a fetched case document for storage."""
+    encoding, data = compress(response.content)
+    return CaseDocument(
+        scraper_type=scraper_type,
+        case_id=int(case_id),
+        fetched_at=int(datetime.now().timestamp()),
+        url=response.url,
+        headers=json.dumps(dict(response.headers)),
+        encoding=encoding,
+        data=data,
+    )
+
+
+def build_response(url: str, headers: dict, content: bytes) -> Response:
+    """Build a response for a stored document, so it can be passed to the same callbacks as
+    a response from the request handler."""
+    response = Response()
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    return response
+
+
+def case_document_response(document: CaseDocument) -> Response:
+    return build_response(
+        document.url,
+        json.loads(document.headers),
+        decompress(document.encoding, document.data),
+    )
@@ -1,12 +1,29 @@
 from datetime import datetime
+import json
 import logging
 from pathlib import Path
-from sqlalchemy import create_engine, select, inspect
+import time
+from typing import TYPE_CHECKING
+from sqlalchemy import and_, create_engine, delete, func, select, inspect, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from requests import Response
 
-from app.models import Profile, ProfileEvent, Base, Event
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from app.models import (
+    Profile,
+    ProfileEvent,
+    Base,
+    Event,
+    CachedOptions,
+    CaseDocument,
+    case_document_response,
+)
+
+if TYPE_CHECKING:
+    from app.models.derived_metrics import MetricCoefficients
 
 
 class DatabaseHandler(QObject):
@@ -16,11 +33,13 @@ class DatabaseHandler(QObject):
     event_added = pyqtSignal(Event, Profile)
     profile_event_deleted = pyqtSignal(ProfileEvent)
     event_ignore_toggled = pyqtSignal(ProfileEvent, bool)
+    QUERY_CHUNK_SIZE = 500  # Values bound in a single IN clause
 
     def __init__(self, db_path: Path):
         super().__init__()
         self._logger = logging.getLogger(__name__)
 
+        self._db_path = db_path
         self._engine = create_engine(f"sqlite:///{db_path}")
         Base.metadata.create_all(self._engine)
         Session = sessionmaker(bind=self._engine)
@@ -36,9 +55,21 @@ class DatabaseHandler(QObject):
             if self._session:
                 self._session.close()
                 self._session = None
+            self._engine.dispose()
         except Exception as e:
             self._logger.error(f"Error closing database connection: {e}")
 
+    def open_worker_handler(self) -> "DatabaseHandler":
+        """Open a handler with a session of its own on the same database, for a worker thread
+        to write with, as the session of this handler belongs to the GUI thread. The worker
+        must close it with close_connection() when done."""
+        return DatabaseHandler(self._db_path)
+
+    def expire_all(self):
+        """Reload the objects of the session on their next access, after another handler
+        has written to the database."""
+        self._session.expire_all()
+
     def get_profiles(self):
         """Get all profiles. Returns a list of tuples, each containing a profile's attributes."""
         try:
@@ -122,19 +153,137 @@ class DatabaseHandler(QObject):
             self._session.rollback()
             return -1
 
+    def import_profile(self, profile: Profile, batches) -> int:
+        """Add a profile with events read from another database, in a single transaction.
+        Events are upserted in bulk against their unique key, so events that are already
+        stored are updated and shared with the new profile, like events added by a scrape.
+
+        Args:
+            profile (Profile): The new profile.
+            batches (Iterable[list[dict]]): Column values of the events in batches. An
+                "ignored" value sets the ignored status of the event in the profile, and
+                other values that are not event columns are skipped.
+
+        Returns:
+            int: The number of events imported, or -1 on failure.
+        """
+        columns = [column for column in Event.__table__.columns.keys() if column != "id"]
+        upsert = sqlite_insert(Event.__table__)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=["case_id", "vehicle_num", "event_num"],
+            set_={column: upsert.excluded[column] for column in columns},
+        )
+        try:
+            self._session.add(profile)
+            self._session.flush()
+
+            imported = set()
+            for rows in batches:
+                values, ignored = {}, {}
+                for row in rows:
+                    key = _event_key(row["case_id"], row["vehicle_num"], row["event_num"])
+                    if key not in imported:
+                        values[key] = {column: row.get(column) for column in columns}
+                        ignored[key] = bool(row.get("ignored"))
+                if not values:
+                    continue
+                self._session.execute(upsert, list(values.values()))
+
+                # Look up the IDs of the upserted events in chunks, to stay under SQLite's
+                # limit on query parameters
+                ids = {}
+                case_ids = sorted({key[0] for key in values})
+                for i in range(0, len(case_ids), self.QUERY_CHUNK_SIZE):
+                    stmt = select(
+                        Event.id, Event.case_id, Event.vehicle_num, Event.event_num
+                    ).where(Event.case_id.in_(case_ids[i : i + self.QUERY_CHUNK_SIZE]))
+                    for event_id, *key in self._session.execute(stmt):
+                        ids[_event_key(*key)] = event_id
+
+                self._session.execute(
+                    sqlite_insert(ProfileEvent.__table__).on_conflict_do_nothing(),
+                    [
+                        {
+                            "profile_id": profile.id,
+                            "event_id": ids[key],
+                            "ignored": ignored[key],
+                        }
+                        for key in values
+                    ],
+                )
+                imported.update(values)
+
+            self._session.commit()
+            # Bulk upserts bypass the identity map, so reload any events already in the session
+            self._session.expire_all()
+            self.profile_added.emit(profile)
+            self._logger.info(f"Imported profile {profile.id} with {len(imported)} events.")
+            return len(imported)
+        except Exception as e:
+            self._logger.error(f"Error importing profile: {e}")
+            self._session.rollback()
+            return -1
+
+    def import_case_documents(self, documents: list[dict]) -> int:
+        """Add raw case documents read from another database in bulk, skipping documents
+        that are already stored.
+
+        Args:
+            documents (list[dict]): Column values of each document.
+
+        Returns:
+            int: The number of documents given, or -1 on failure.
+        """
+        if not documents:
+            return 0
+        try:
+            self._session.execute(
+                sqlite_insert(CaseDocument.__table__).on_conflict_do_nothing(), documents
+            )
+            self._session.commit()
+            return len(documents)
+        except Exception as e:
+            self._logger.error(f"Error importing case documents: {e}")
+            self._session.rollback()
+            return -1
+
     def delete_profile(self, profile: Profile):
+        self.delete_profiles([profile])
+
+    def delete_profiles(self, profiles: list[Profile]) -> bool:
+        """Delete profiles and the events no other profile uses, in a single transaction.
+        Deletion is done with a few set-based DELETE statements instead of loading the events.
+
+        Returns:
+            bool: True if the profiles were deleted.
+        """
+        if not profiles:
+            return True
+        ids = [profile.id for profile in profiles]
         try:
-            self._session.delete(profile)
-            for event in profile.events:
-                if not event.profiles:
-                    self._session.delete(event)
+            start = time.perf_counter()
+            for i in range(0, len(ids), self.QUERY_CHUNK_SIZE):
+                chunk = ids[i : i + self.QUERY_CHUNK_SIZE]
+                self._session.execute(
+                    delete(ProfileEvent).where(ProfileEvent.profile_id.in_(chunk))
+                )
+                self._session.execute(delete(Profile).where(Profile.id.in_(chunk)))
+            result = self._session.execute(
+                delete(Event).where(Event.id.not_in(select(ProfileEvent.event_id)))
+            )
             self._session.commit()
-            self.profile_deleted.emit(profile)
-            self._logger.info(f"Deleted profile {profile.id}.")
+
+            for profile in profiles:
+                self.profile_deleted.emit(profile)
+            self._logger.info(
+                f"Deleted profiles {', '.join(map(str, ids))} and {result.rowcount} "
+                f"unused events in {time.perf_counter() - start:.3f}s."
+            )
+            return True
         except Exception as e:
-            self._logger.error(f"Error deleting profile {profile.id}: {e}")
+            self._logger.error(f"Error deleting profiles {', '.join(map(str, ids))}: {e}")
             self._session.rollback()
-            return
+            return False
 
     def update_profile(
         self,
@@ -207,6 +356,428 @@ class DatabaseHandler(QObject):
             self._session.rollback()
             return False
 
+    def count_profile_events(self, profile: Profile, include_ignored: bool = True) -> int:
+        """Count the events of a profile, optionally including ignored events."""
+        try:
+            stmt = (
+                select(func.count())
+                .select_from(ProfileEvent)
+                .where(ProfileEvent.profile_id == profile.id)
+            )
+            if not include_ignored:
+                stmt = stmt.where(ProfileEvent.ignored.is_(False))
+            return self._session.execute(stmt).scalar_one()
+        except Exception as e:
+            self._logger.error(f"Error counting events for profile {profile.id}: {e}")
+            return 0
+
+    def iter_event_rows(
+        self,
+        profile_id: int,
+        include_ignored: bool = True,
+        batch_size: int = 1000,
+        with_ignored: bool = False,
+    ):
+        """Iterate over the column values of a profile's events in batches, streamed from a
+        cursor on a connection of its own. Rows are never loaded as events, so memory use does
+        not grow with the size of the profile, and the iterator can be consumed from any thread.
+
+        Args:
+            profile_id (int): ID of the profile.
+            include_ignored (bool, optional): Include ignored events. Defaults to True.
+            batch_size (int, optional): Number of rows fetched at a time. Defaults to 1000.
+            with_ignored (bool, optional): Add the ignored status of each event as a last
+                column. Defaults to False.
+
+        Yields:
+            list[tuple]: The next batch of rows, with the columns in table order.
+        """
+        columns = list(Event.__table__.columns)
+        if with_ignored:
+            columns.append(ProfileEvent.ignored)
+        stmt = (
+            select(*columns)
+            .join(ProfileEvent)
+            .where(ProfileEvent.profile_id == profile_id)
+        )
+        if not include_ignored:
+            stmt = stmt.where(ProfileEvent.ignored.is_(False))
+
+        with self._engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(stmt)
+            for rows in result.partitions():
+                yield [tuple(row) for row in rows]
+
+    def recompute_metrics(
+        self,
+        profile: Profile | None = None,
+        coefficients: "MetricCoefficients" = None,
+    ):
+        """Recompute the derived metrics (c_bar, NASS_dv, NASS_vc, e, TOT_dv) of all events in a profile,
+        or of every event if no profile is given, from their stored crush, delta-V and curb weights.
+        Returns the number of events updated, or -1 on failure."""
+        # Imported here so numpy is not loaded at startup
+        import numpy as np
+        from app.models.derived_metrics import (
+            DEFAULT_COEFFICIENTS,
+            DERIVED_COLUMNS,
+            SOURCE_COLUMNS,
+            compute_metrics,
+            to_float_array,
+        )
+
+        coefficients = coefficients or DEFAULT_COEFFICIENTS
+        try:
+            start = time.perf_counter()
+            stmt = select(Event.id, *(getattr(Event, col) for col in SOURCE_COLUMNS))
+            if profile:
+                stmt = stmt.join(ProfileEvent).where(ProfileEvent.profile_id == profile.id)
+            rows = self._session.execute(stmt).all()
+            if not rows:
+                return 0
+
+            ids, *columns = zip(*rows)
+            columns = dict(zip(SOURCE_COLUMNS, (to_float_array(col) for col in columns)))
+            metrics = compute_metrics(
+                np.column_stack([columns[f"crush{i}"] for i in range(1, 7)]),
+                columns["total_dv"],
+                columns["curb_wgt"],
+                columns["a_curb_wgt"],
+                coefficients,
+            )
+
+            # Leave events whose source data is incomplete untouched
+            valid = np.all(np.isfinite(np.column_stack(list(metrics.values()))), axis=1)
+            values = np.column_stack([metrics[col] for col in DERIVED_COLUMNS])[valid]
+            params = [
+                {"id": event_id, **dict(zip(DERIVED_COLUMNS, row))}
+                for event_id, row in zip(np.asarray(ids)[valid].tolist(), values.tolist())
+            ]
+
+            # Bulk UPDATE by primary key, executed as a single executemany
+            if params:
+                self._session.execute(update(Event), params)
+            if profile:
+                profile.modified = datetime.now().timestamp()
+            self._session.commit()
+            # Bulk updates bypass the identity map, so reload any events already in the session
+            self._session.expire_all()
+
+            self._logger.info(
+                f"Recomputed metrics for {len(params)}/{len(rows)} events in {time.perf_counter() - start:.3f}s."
+            )
+            if profile:
+                self.profile_updated.emit(profile)
+            return len(params)
+
+        except Exception as e:
+            self._logger.error(f"Error recomputing metrics: {e}")
+            self._session.rollback()
+            return -1
+
+    def get_cached_options(self, scraper_type: str, key: str):
+        """Get cached search options. Returns a tuple of the JSON-decoded data and the
+        timestamp it was fetched at, or None if nothing is cached for the key."""
+        try:
+            cached = self._session.get(CachedOptions, (scraper_type, key))
+            if not cached:
+                return None
+            return json.loads(cached.data), cached.fetched
+        except Exception as e:
+            self._logger.error(f"Error getting cached options '{key}' for {scraper_type}: {e}")
+            return None
+
+    def set_cached_options(self, scraper_type: str, key: str, data):
+        """Cache search options (any JSON-serializable data) for a scraper type."""
+        try:
+            self._session.merge(
+                CachedOptions(
+                    scraper_type=scraper_type,
+                    key=key,
+                    data=json.dumps(data),
+                    fetched=datetime.now().timestamp(),
+                )
+            )
+            self._session.commit()
+        except Exception as e:
+            self._logger.error(f"Error caching options '{key}' for {scraper_type}: {e}")
+            self._session.rollback()
+
+    def _latest_case_document(self, scraper_type: str, case_id: int) -> CaseDocument | None:
+        stmt = (
+            select(CaseDocument)
+            .where(
+                CaseDocument.scraper_type == scraper_type,
+                CaseDocument.case_id == case_id,
+            )
+            .order_by(CaseDocument.fetched_at.desc())
+            .limit(1)
+        )
+        return self._session.execute(stmt).scalar_one_or_none()
+
+    @pyqtSlot(CaseDocument)
+    def add_case_document(self, document: CaseDocument):
+        """Store a compressed raw case document. If the contents are the same as the latest
+        stored version of the case, that version is replaced, so only changed documents
+        build up a history."""
+        try:
+            latest = self._latest_case_document(document.scraper_type, document.case_id)
+            if (
+                latest
+                and latest.encoding == document.encoding
+                and latest.data == document.data
+            ):
+                self._session.delete(latest)
+                self._session.flush()
+            self._session.merge(document)
+            self._session.commit()
+        except Exception as e:
+            self._logger.error(
+                f"Error storing {document.scraper_type} case document {document.case_id}: {e}"
+            )
+            self._session.rollback()
+
+    def get_case_document(
+        self, scraper_type: str, case_id: int, max_age: float = None
+    ) -> Response | None:
+        """Get the latest stored raw document of a case as a response.
+
+        Args:
+            scraper_type (str): Database of the case.
+            case_id (int): ID of the case.
+            max_age (float, optional): Maximum age of the document in seconds. Defaults to no limit.
+
+        Returns:
+            Response | None: The document, or None if no (recent enough) document is stored.
+        """
+        try:
+            document = self._latest_case_document(scraper_type, case_id)
+            if not document or (
+                max_age is not None
+                and datetime.now().timestamp() - document.fetched_at > max_age
+            ):
+                return None
+            return case_document_response(document)
+        except Exception as e:
+            self._logger.error(
+                f"Error getting {scraper_type} case document {case_id}: {e}"
+            )
+            return None
+
+    def get_case_document_row(self, scraper_type: str, case_id: int) -> tuple | None:
+        """Get the latest stored raw document of a case, read on a connection of its own so it
+        can be called from any thread.
+
+        Returns:
+            tuple | None: The URL, headers, encoding and compressed data of the document, or
+                None if no document is stored.
+        """
+        stmt = (
+            select(
+                CaseDocument.url,
+                CaseDocument.headers,
+                CaseDocument.encoding,
+                CaseDocument.data,
+            )
+            .where(
+                CaseDocument.scraper_type == scraper_type,
+                CaseDocument.case_id == case_id,
+            )
+            .order_by(CaseDocument.fetched_at.desc())
+            .limit(1)
+        )
+        try:
+            with self._engine.connect() as connection:
+                row = connection.execute(stmt).first()
+            return tuple(row) if row else None
+        except Exception as e:
+            self._logger.error(
+                f"Error getting {scraper_type} case document {case_id}: {e}"
+            )
+            return None
+
+    def get_profile_case_documents(self, profile: Profile) -> tuple[list[tuple], int]:
+        """Get the latest stored raw document of every case with events in a profile.
+
+        Returns:
+            tuple[list[tuple], int]: The scraper type, case ID, URL, headers, encoding and
+                compressed data of each document, and the number of cases with no stored document.
+        """
+        try:
+            cases = (
+                select(Event.scraper_type, Event.case_id)
+                .join(ProfileEvent)
+                .where(ProfileEvent.profile_id == profile.id)
+                .distinct()
+                .subquery()
+            )
+            latest = (
+                select(
+                    CaseDocument.scraper_type,
+                    CaseDocument.case_id,
+                    func.max(CaseDocument.fetched_at).label("fetched_at"),
+                )
+                .join(
+                    cases,
+                    and_(
+                        CaseDocument.scraper_type == cases.c.scraper_type,
+                        CaseDocument.case_id == cases.c.case_id,
+                    ),
+                )
+                .group_by(CaseDocument.scraper_type, CaseDocument.case_id)
+                .subquery()
+            )
+            # Columns are selected instead of documents, so thousands of documents are not
+            # kept in the session
+            stmt = select(
+                CaseDocument.scraper_type,
+                CaseDocument.case_id,
+                CaseDocument.url,
+                CaseDocument.headers,
+                CaseDocument.encoding,
+                CaseDocument.data,
+            ).join(
+                latest,
+                and_(
+                    CaseDocument.scraper_type == latest.c.scraper_type,
+                    CaseDocument.case_id == latest.c.case_id,
+                    CaseDocument.fetched_at == latest.c.fetched_at,
+                ),
+            )
+            documents = [tuple(row) for row in self._session.execute(stmt)]
+            total = self._session.execute(
+                select(func.count()).select_from(cases)
+            ).scalar_one()
+            return documents, total - len(documents)
+        except Exception as e:
+            self._logger.error(
+                f"Error getting case documents for profile {profile.id}: {e}"
+            )
+            return [], 0
+
+    def iter_case_document_rows(self, profile_id: int, batch_size: int = 100):
+        """Iterate over every stored version of the raw documents of a profile's cases in
+        batches, streamed from a cursor on a connection of its own, like iter_event_rows().
+
+        Yields:
+            list[tuple]: The next batch of documents, with the columns in table order.
+        """
+        cases = (
+            select(Event.scraper_type, Event.case_id)
+            .join(ProfileEvent)
+            .where(ProfileEvent.profile_id == profile_id)
+            .distinct()
+            .subquery()
+        )
+        stmt = select(*CaseDocument.__table__.columns).join(
+            cases,
+            and_(
+                CaseDocument.scraper_type == cases.c.scraper_type,
+                CaseDocument.case_id == cases.c.case_id,
+            ),
+        )
+        with self._engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(stmt)
+            for rows in result.partitions():
+                yield [tuple(row) for row in rows]
+
+    def replace_profile_events(
+        self, profile: Profile, events: list[dict], cases: list[tuple[str, int]]
+    ) -> dict | None:
+        """Replace the events of some cases of a profile with newly parsed events, in a single
+        transaction. Events of other cases are left untouched, and events kept in the profile
+        keep their ignored status.
+
+        Args:
+            profile (Profile): The profile to update.
+            events (list[dict]): Column values of each parsed event.
+            cases (list[tuple[str, int]]): Scraper type and ID of each parsed case.
+
+        Returns:
+            dict | None: The keys (case ID, vehicle number, event number) of the "added" and
+                "removed" events, and the (column, old value, new value) of each "changed"
+                event, or None on failure.
+        """
+        try:
+            cases = {(scraper_type, str(case_id)) for scraper_type, case_id in cases}
+            current: dict[tuple, ProfileEvent] = {
+                _event_key(
+                    profile_event.event.case_id,
+                    profile_event.event.vehicle_num,
+                    profile_event.event.event_num,
+                ): profile_event
+                for profile_event in self.get_profile_events(profile)
+                if (profile_event.event.scraper_type, str(profile_event.event.case_id))
+                in cases
+            }
+            # Events found by more than one scrape of the profile are only added once
+            parsed = {
+                _event_key(values["case_id"], values["vehicle_num"], values["event_num"]): values
+                for values in events
+            }
+
+            diff = {"added": [], "removed": [], "changed": {}}
+            removed_events = []
+            for key, profile_event in current.items():
+                if key not in parsed:
+                    diff["removed"].append(key)
+                    removed_events.append(profile_event.event)
+                    profile.profile_event_associations.remove(profile_event)
+
+            for key, values in parsed.items():
+                if key in current:
+                    event = current[key].event
+                    changes = [
+                        (column, getattr(event, column), value)
+                        for column, value in values.items()
+                        if not _same_value(getattr(event, column), value)
+                    ]
+                    if changes:
+                        diff["changed"][key] = changes
+                        for column, _, value in changes:
+                            setattr(event, column, value)
+                    continue
+
+                # The event may already belong to another profile
+                event = Event(**values)
+                stmt = select(Event).where(
+                    Event.case_id == event.case_id,
+                    Event.vehicle_num == event.vehicle_num,
+                    Event.event_num == event.event_num,
+                )
+                if existing_event := self._session.execute(stmt).scalar_one_or_none():
+                    existing_event.update(event)
+                    event = existing_event
+                profile.events.append(event)
+                diff["added"].append(key)
+
+            # Delete the removed events that no other profile uses
+            self._session.flush()
+            for event in removed_events:
+                stmt = (
+                    select(func.count())
+                    .select_from(ProfileEvent)
+                    .where(ProfileEvent.event_id == event.id)
+                )
+                if not self._session.execute(stmt).scalar_one():
+                    self._session.expire(event)
+                    self._session.delete(event)
+
+            profile.modified = datetime.now().timestamp()
+            self._session.commit()
+            self.profile_updated.emit(profile)
+            self._logger.info(
+                f"Replaced the events of {len(cases)} cases in profile {profile.id}: "
+                f"{len(diff['added'])} added, {len(diff['removed'])} removed, "
+                f"{len(diff['changed'])} changed."
+            )
+            return diff
+
+        except Exception as e:
+            self._logger.error(f"Error replacing events of profile {profile.id}: {e}")
+            self._session.rollback()
+            return None
+
     def get_headers(self, table: Base):
         """Get the column names of a table."""
         try:
@@ -217,3 +788,19 @@ class DatabaseHandler(QObject):
 
     def __del__(self):
         self.close_connection()
+
+
+def _event_key(case_id, vehicle_num, event_num) -> tuple[int, int, int]:
+    """Get the key an event is unique by, as parsed values may be strings."""
+    return int(case_id), int(vehicle_num), int(event_num)
+
+
+def _same_value(stored, parsed) -> bool:
+    """Compare a stored column value with a newly parsed one. Parsed values may be strings or
+    floats where the database returns integers."""
+    if stored == parsed:
+        return True
+    try:
+        return float(stored) == float(parsed)
+    except (TypeError, ValueError):
+        return str(stored) == str(parsed)
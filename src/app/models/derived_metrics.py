@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+CM_TO_IN = 0.393701
+KMPH_TO_MPH = 0.621371
+KG_TO_LBS = 2.20462
+
+# Columns of the event table that are derived from the scraped data
+DERIVED_COLUMNS = ("c_bar", "NASS_dv", "NASS_vc", "e", "TOT_dv")
+# Columns of the event table the derived metrics are computed from
+SOURCE_COLUMNS = (
+    "crush1",
+    "crush2",
+    "crush3",
+    "crush4",
+    "crush5",
+    "crush6",
+    "total_dv",
+    "curb_wgt",
+    "a_curb_wgt",
+)
+
+
+@dataclass(frozen=True)
+class MetricCoefficients:
+    """Coefficients of the restitution curve e = scale * exp(c1 * vc + c2 * vc^2 + c3 * vc^3)."""
+
+    scale: float = 0.5992
+    c1: float = -0.1125
+    c2: float = 0.003889
+    c3: float = -0.0001153
+
+
+DEFAULT_COEFFICIENTS = MetricCoefficients()
+
+
+def compute_metrics(
+    crush,
+    total_dv,
+    curb_wgt,
+    a_curb_wgt,
+    coefficients: MetricCoefficients = DEFAULT_COEFFICIENTS,
+    decimals: int = 6,
+) -> dict[str, np.ndarray]:
+    """Computes the derived metrics for any number of events at once.
+
+    Args:
+        crush (array-like): Crush measurements C1-C6 in cm, shape (n, 6).
+        total_dv (array-like): Total delta-V in km/h, shape (n,).
+        curb_wgt (array-like): Curb weight of the vehicle of interest in lbs, shape (n,).
+        a_curb_wgt (array-like): Curb weight of the alternate vehicle in lbs, shape (n,).
+        coefficients (MetricCoefficients, optional): Coefficients of the restitution curve.
+            Defaults to DEFAULT_COEFFICIENTS.
+        decimals (int, optional): Number of decimals to round the results to. Defaults to 6.
+
+    Returns:
+        dict[str, np.ndarray]: Arrays of shape (n,) keyed by the names in DERIVED_COLUMNS.
+            Events with missing or non-numeric inputs get NaN.
+    """
+    crush = np.asarray(crush, dtype=np.float64).reshape(-1, 6)
+    total_dv = np.asarray(total_dv, dtype=np.float64)
+    curb_wgt = np.asarray(curb_wgt, dtype=np.float64)
+    a_curb_wgt = np.asarray(a_curb_wgt, dtype=np.float64)
+
+    # Average crush (converted to inches)
+    c_bar = CM_TO_IN * ((crush[:, 0] + crush[:, 5]) * 0.5 + crush[:, 1:5].sum(axis=1)) / 5
+
+    NASS_dv = total_dv * KMPH_TO_MPH
+    with np.errstate(divide="ignore", invalid="ignore"):
+        NASS_vc = NASS_dv / (a_curb_wgt / (curb_wgt + a_curb_wgt))
+
+    c = coefficients
+    # Horner form of c1 * vc + c2 * vc^2 + c3 * vc^3
+    with np.errstate(over="ignore", invalid="ignore"):
+        e = c.scale * np.exp(NASS_vc * (c.c1 + NASS_vc * (c.c2 + NASS_vc * c.c3)))
+    TOT_dv = NASS_dv * (1.0 + e)
+
+    metrics = {
+        "c_bar": c_bar,
+        "NASS_dv": NASS_dv,
+        "NASS_vc": NASS_vc,
+        "e": e,
+        "TOT_dv": TOT_dv,
+    }
+    return {key: np.round(value, decimals) for key, value in metrics.items()}
+
+
+def compute_event_metrics(
+    crush: list[float],
+    total_dv: float,
+    curb_wgt: float,
+    a_curb_wgt: float,
+    coefficients: MetricCoefficients = DEFAULT_COEFFICIENTS,
+) -> dict[str, float]:
+    """Computes the derived metrics for a single event. See compute_metrics().
+
+    Returns:
+        dict[str, float]: The derived metrics keyed by the names in DERIVED_COLUMNS.
+    """
+    metrics = compute_metrics(
+        [crush], [total_dv], [curb_wgt], [a_curb_wgt], coefficients
+    )
+    return {key: float(value[0]) for key, value in metrics.items()}
+
+
+def to_float_array(values) -> np.ndarray:
+    """Converts a sequence of database values to a float array, mapping missing
+    or non-numeric values (e.g. "--") to NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+
+    def to_float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    return np.fromiter((to_float(v) for v in values), dtype=np.float64, count=len(values))
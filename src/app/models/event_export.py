@@ -0,0 +1,157 @@
+from abc import ABC, abstractmethod
+import csv
+from datetime import datetime
+import gzip
+import importlib.util
+import io
+import os
+from pathlib import Path
+import tempfile
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
+
+from app.models import DatabaseHandler, Event, Profile
+
+
+def arrow_available() -> bool:
+    """Check if pyarrow is installed (needed for Parquet and Feather files) without importing it."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+class ExportSignals(QObject):
+    """Signals emitted by an EventExportWorker instance."""
+
+    # rows written, rows total
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(Path)
+    exception = pyqtSignal(Exception)
+
+
+class _Meta(type(ABC), type(QRunnable)):
+    """Metaclass for EventExportWorker."""
+
+
+class EventExportWorker(QRunnable, ABC, metaclass=_Meta):
+    """Base worker class to write the events of a profile to a file in a separate thread.
+
+    Rows are streamed from a database cursor and written as they are fetched, so memory use
+    stays the same no matter how many events are exported. The file is written under a
+    temporary name and renamed once complete, so a partial export is never left behind. An
+    existing file is never replaced; the export is given a numbered name instead.
+    """
+
+    SUFFIX = ""
+    BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        db_handler: DatabaseHandler,
+        profile: Profile,
+        data_dir: Path,
+        include_ignored: bool = False,
+    ):
+        """
+        Args:
+            db_handler (DatabaseHandler): Database handler to read the events with.
+            profile (Profile): Profile to export the events of.
+            data_dir (Path): Directory to save the file to.
+            include_ignored (bool, optional): Export ignored events. Defaults to False.
+        """
+        super().__init__()
+        self._db_handler = db_handler
+        # Only the ID is used off the GUI thread, as ORM objects belong to the GUI's session
+        self._profile_id = profile.id
+        self._total = db_handler.count_profile_events(profile, include_ignored)
+        self._headers = db_handler.get_headers(Event)
+        self._include_ignored = include_ignored
+
+        self.path = Path(data_dir) / self._file_name(profile)
+        self.signals = ExportSignals()
+
+    def _file_name(self, profile: Profile) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        return f"scrape_data_{timestamp}{self.SUFFIX}"
+
+    @pyqtSlot()
+    def run(self):
+        tmp_path = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".part"
+            )
+            os.close(fd)
+            tmp_path = Path(tmp_path)
+            self._write(tmp_path)
+            self.path = self._claim_free_path()
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            if tmp_path:
+                tmp_path.unlink(missing_ok=True)
+            self.signals.exception.emit(e)
+        else:
+            self.signals.finished.emit(self.path)
+
+    def _claim_free_path(self) -> Path:
+        """Create an empty file at the export's path, or at the first free numbered variant of
+        it (e.g. "scrape_data_20240101-120000(1).csv"), for the export to replace. Creating the
+        file claims its name, so an export never overwrites another one."""
+        stem = self.path.name.removesuffix(self.SUFFIX)
+        candidate = self.path
+        i = 1
+        while True:
+            try:
+                with open(candidate, "x"):
+                    return candidate
+            except FileExistsError:
+                candidate = self.path.with_name(f"{stem}({i}){self.SUFFIX}")
+                i += 1
+
+    def _batches(self, batch_size: int = None, with_ignored: bool = False):
+        """Iterate over the rows of the exported events in batches, emitting the progress
+        after each batch has been written."""
+        written = 0
+        for rows in self._db_handler.iter_event_rows(
+            self._profile_id,
+            self._include_ignored,
+            batch_size or self.BATCH_SIZE,
+            with_ignored,
+        ):
+            yield rows
+            written += len(rows)
+            self.signals.progress.emit(written, self._total)
+
+    @abstractmethod
+    def _write(self, path: Path):
+        """Write the events to a file."""
+
+
+class CSVExportWorker(EventExportWorker):
+    """Worker class to write the events of a profile to a CSV file, optionally gzipped."""
+
+    SUFFIX = ".csv"
+
+    def __init__(
+        self,
+        db_handler: DatabaseHandler,
+        profile: Profile,
+        data_dir: Path,
+        include_ignored: bool = False,
+        compress: bool = False,
+    ):
+        if compress:
+            self.SUFFIX = ".csv.gz"
+        super().__init__(db_handler, profile, data_dir, include_ignored)
+        self._compress = compress
+
+    def _write(self, path: Path):
+        with self._open(path) as f:
+            writer = csv.writer(f)
+            writer.writerow(self._headers)
+            for rows in self._batches():
+                writer.writerows(rows)
+
+    def _open(self, path: Path) -> io.TextIOBase:
+        if self._compress:
+            return io.TextIOWrapper(gzip.open(path, "wb"), newline="", encoding="utf-8")
+        return open(path, "w", newline="", encoding="utf-8")
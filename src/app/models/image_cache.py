@@ -0,0 +1,352 @@
+from collections import OrderedDict
+from io import BytesIO
+import json
+import logging
+import os
+from pathlib import Path
+from threading import RLock
+import time
+
+from PIL import Image
+
+
+class ImageCache:
+    """Disk-backed image store shared by every profile in a data directory.
+
+    Images are keyed by scraper type, case ID, vehicle number and image ID, so two profiles
+    containing the same case share a single copy. Each entry holds the original image bytes,
+    which are only decoded when requested, and a small JPEG thumbnail for the events list
+    that is generated on first use if it was not created when the image was stored.
+    An index file tracks entry sizes and access order so the least recently used entries
+    can be evicted once the cache grows past its size cap.
+    """
+
+    INDEX_FILENAME = "index.json"
+    INDEX_VERSION = 1
+    DEFAULT_MAX_BYTES = 1024**3  # 1 GiB
+    THUMBNAIL_HEIGHT = 160
+    THUMBNAIL_QUALITY = 80
+    FLUSH_INTERVAL_SECS = 5  # Minimum time between index writes when adding images
+
+    _instances: dict[Path, "ImageCache"] = {}
+
+    @classmethod
+    def for_dir(cls, cache_dir: Path) -> "ImageCache":
+        """Get the shared cache instance for a directory, creating it if needed.
+
+        Args:
+            cache_dir (Path): Directory the cache is stored in.
+
+        Returns:
+            ImageCache: The cache instance for the directory.
+        """
+        cache_dir = Path(cache_dir).resolve()
+        if cache_dir not in cls._instances:
+            cls._instances[cache_dir] = cls(cache_dir)
+        return cls._instances[cache_dir]
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self._logger = logging.getLogger(__name__)
+        self._lock = RLock()
+
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._index_path = self.cache_dir / self.INDEX_FILENAME
+
+        # key: entry key, value: entry metadata. Ordered from least to most recently used.
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._total_bytes = 0
+        self._dirty = False
+        self._last_flush = 0.0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(scraper_type: str, case_id: int, vehicle_num: int, img_id) -> str:
+        """Build the index key for an image."""
+        return f"{scraper_type}/{case_id}/{vehicle_num}/{img_id}"
+
+    def _entry_dir(self, scraper_type: str, case_id: int, vehicle_num: int) -> Path:
+        return self.cache_dir / scraper_type / str(case_id) / str(vehicle_num)
+
+    def _thumbnail_dest(
+        self, scraper_type: str, case_id: int, vehicle_num: int, img_id
+    ) -> Path:
+        entry_dir = self._entry_dir(scraper_type, case_id, vehicle_num)
+        return entry_dir / f"{img_id}.thumb.jpg"
+
+    def original_dest(
+        self, scraper_type: str, case_id: int, vehicle_num: int, img_id
+    ) -> Path:
+        """Get the path an image's original data is stored at. Images can be downloaded
+        directly to this path and then registered with add()."""
+        entry_dir = self._entry_dir(scraper_type, case_id, vehicle_num)
+        return entry_dir / f"{img_id}.orig"
+
+    def _load_index(self):
+        if not self._index_path.exists():
+            return
+
+        try:
+            index = json.loads(self._index_path.read_text())
+            if index.get("version") != self.INDEX_VERSION:
+                self._logger.warning("Image cache index version mismatch. Rebuilding.")
+                return
+            entries = sorted(index["entries"].items(), key=lambda i: i[1]["accessed"])
+        except Exception as e:
+            self._logger.error(f"Failed to read image cache index: {e}")
+            return
+
+        for key, entry in entries:
+            # Drop entries whose files were removed outside of the cache
+            if not (self.cache_dir / entry["original"]).exists():
+                continue
+            self._entries[key] = entry
+            self._total_bytes += entry["size"]
+
+    def flush(self):
+        """Write the index file if it has changed since it was last written."""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._index_path.with_suffix(".tmp")
+                tmp_path.write_text(
+                    json.dumps(
+                        {"version": self.INDEX_VERSION, "entries": self._entries}
+                    )
+                )
+                os.replace(tmp_path, self._index_path)
+                self._dirty = False
+                self._last_flush = time.time()
+            except Exception as e:
+                self._logger.error(f"Failed to write image cache index: {e}")
+
+    def contains(self, scraper_type: str, case_id: int, vehicle_num: int, img_id):
+        """Check whether an image is stored in the cache."""
+        key = self.make_key(scraper_type, case_id, vehicle_num, img_id)
+        with self._lock:
+            return key in self._entries
+
+    def image_ids(self, scraper_type: str, case_id: int, vehicle_num: int):
+        """Get the IDs of all cached images for a vehicle, in the order they were added.
+
+        Returns:
+            list: Image IDs for the vehicle.
+        """
+        prefix = self.make_key(scraper_type, case_id, vehicle_num, "")
+        with self._lock:
+            entries = [
+                (entry["added"], entry["img_id"])
+                for key, entry in self._entries.items()
+                if key.startswith(prefix)
+            ]
+        return [img_id for _, img_id in sorted(entries)]
+
+    def images(
+        self, scraper_type: str, case_id: int, vehicle_num: int
+    ) -> list[tuple[object, str, Path]]:
+        """Get every cached image of a vehicle, in the order they were added.
+
+        Returns:
+            list[tuple[object, str, Path]]: The ID, image set and original data path of each image.
+        """
+        prefix = self.make_key(scraper_type, case_id, vehicle_num, "")
+        with self._lock:
+            entries = [
+                (entry["added"], entry["img_id"], entry["img_set"], entry["original"])
+                for key, entry in self._entries.items()
+                if key.startswith(prefix)
+            ]
+        return [
+            (img_id, img_set, self.cache_dir / original)
+            for _, img_id, img_set, original in sorted(entries, key=lambda e: e[0])
+        ]
+
+    def put(
+        self,
+        scraper_type: str,
+        case_id: int,
+        vehicle_num: int,
+        img_id,
+        data: bytes,
+        img_set: str = "",
+        make_thumbnail: bool = True,
+    ) -> bool:
+        """Store an image and optionally generate its thumbnail.
+
+        Args:
+            scraper_type (str): Scraper type the image was fetched with.
+            case_id (int): Case the image belongs to.
+            vehicle_num (int): Vehicle the image belongs to.
+            img_id: ID of the image on the NHTSA site.
+            data (bytes): Original (encoded) image data.
+            img_set (str, optional): Image set the image belongs to. Defaults to "".
+            make_thumbnail (bool, optional): Generate the thumbnail now instead of on first use.
+                Defaults to True.
+
+        Returns:
+            bool: True if the image was stored successfully, False otherwise.
+        """
+        original_path = self.original_dest(scraper_type, case_id, vehicle_num, img_id)
+        try:
+            original_path.parent.mkdir(parents=True, exist_ok=True)
+            original_path.write_bytes(data)
+        except Exception as e:
+            self._logger.error(f"Failed to cache image {img_id} of case {case_id}: {e}")
+            return False
+
+        return self.add(
+            scraper_type,
+            case_id,
+            vehicle_num,
+            img_id,
+            img_set=img_set,
+            make_thumbnail=make_thumbnail,
+        )
+
+    def add(
+        self,
+        scraper_type: str,
+        case_id: int,
+        vehicle_num: int,
+        img_id,
+        img_set: str = "",
+        make_thumbnail: bool = True,
+    ) -> bool:
+        """Register an image whose original data has already been written to original_dest().
+
+        Args:
+            scraper_type (str): Scraper type the image was fetched with.
+            case_id (int): Case the image belongs to.
+            vehicle_num (int): Vehicle the image belongs to.
+            img_id: ID of the image on the NHTSA site.
+            img_set (str, optional): Image set the image belongs to. Defaults to "".
+            make_thumbnail (bool, optional): Generate the thumbnail now instead of on first use.
+                Defaults to True.
+
+        Returns:
+            bool: True if the image was registered successfully, False otherwise.
+        """
+        original_path = self.original_dest(scraper_type, case_id, vehicle_num, img_id)
+        thumbnail_path = self._thumbnail_dest(scraper_type, case_id, vehicle_num, img_id)
+
+        try:
+            if make_thumbnail:
+                with Image.open(original_path) as image:
+                    thumbnail_path.write_bytes(self._make_thumbnail(image))
+            else:
+                thumbnail_path.unlink(missing_ok=True)
+        except Exception as e:
+            self._logger.error(f"Failed to cache image {img_id} of case {case_id}: {e}")
+            original_path.unlink(missing_ok=True)
+            return False
+
+        key = self.make_key(scraper_type, case_id, vehicle_num, img_id)
+        size = original_path.stat().st_size
+        if thumbnail_path.exists():
+            size += thumbnail_path.stat().st_size
+        now = time.time()
+        with self._lock:
+            if old := self._entries.pop(key, None):
+                self._total_bytes -= old["size"]
+            self._entries[key] = {
+                "img_id": img_id,
+                "img_set": img_set,
+                "size": size,
+                "added": now,
+                "accessed": now,
+                "original": original_path.relative_to(self.cache_dir).as_posix(),
+                "thumbnail": thumbnail_path.relative_to(self.cache_dir).as_posix(),
+            }
+            self._total_bytes += size
+            self._dirty = True
+            self._evict()
+
+            if now - self._last_flush > self.FLUSH_INTERVAL_SECS:
+                self.flush()
+
+        return True
+
+    def _make_thumbnail(self, image: Image.Image) -> bytes:
+        image = image.convert("RGB")
+        w, h = image.size
+        image.thumbnail((round(w * self.THUMBNAIL_HEIGHT / h), self.THUMBNAIL_HEIGHT))
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=self.THUMBNAIL_QUALITY, optimize=True)
+        return buffer.getvalue()
+
+    def _touch(self, key: str):
+        with self._lock:
+            entry = self._entries[key]
+            entry["accessed"] = time.time()
+            self._entries.move_to_end(key)
+            self._dirty = True
+
+    def thumbnail_path(
+        self, scraper_type: str, case_id: int, vehicle_num: int, img_id
+    ) -> Path | None:
+        """Get the path of a cached image's thumbnail, or None if the image is not cached."""
+        key = self.make_key(scraper_type, case_id, vehicle_num, img_id)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._touch(key)
+            entry = self._entries[key]
+            path = self.cache_dir / entry["thumbnail"]
+            if path.exists():
+                return path
+
+            try:
+                with Image.open(self.cache_dir / entry["original"]) as image:
+                    path.write_bytes(self._make_thumbnail(image))
+            except Exception as e:
+                self._logger.error(f"Failed to create thumbnail for {key}: {e}")
+                return None
+            size = path.stat().st_size
+            entry["size"] += size
+            self._total_bytes += size
+            return path
+
+    def original_path(
+        self, scraper_type: str, case_id: int, vehicle_num: int, img_id
+    ) -> Path | None:
+        """Get the path of a cached image's original data, or None if the image is not cached."""
+        key = self.make_key(scraper_type, case_id, vehicle_num, img_id)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._touch(key)
+            return self.cache_dir / self._entries[key]["original"]
+
+    def load_original(
+        self, scraper_type: str, case_id: int, vehicle_num: int, img_id
+    ) -> Image.Image | None:
+        """Decode a cached image at full resolution.
+
+        Returns:
+            Image.Image | None: The decoded image, or None if it is not cached or could not be read.
+        """
+        path = self.original_path(scraper_type, case_id, vehicle_num, img_id)
+        if not path:
+            return None
+        try:
+            with Image.open(path) as image:
+                image.load()
+                return image.convert("RGB")
+        except Exception as e:
+            self._logger.error(f"Failed to load cached image {path}: {e}")
+            return None
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is within its size cap."""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry["size"]
+            for file in (entry["original"], entry["thumbnail"]):
+                try:
+                    (self.cache_dir / file).unlink(missing_ok=True)
+                except OSError as e:
+                    self._logger.error(f"Failed to remove cached image '{file}': {e}")
+            self._logger.debug(f"Evicted {key} from image cache.")
@@ -0,0 +1,345 @@
+from datetime import datetime
+import io
+import json
+from pathlib import Path
+import tarfile
+import tempfile
+import time
+from typing import IO, TYPE_CHECKING, Callable, Iterator
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
+
+from app.models import DatabaseHandler, Profile, EventExportWorker
+
+if TYPE_CHECKING:
+    from app.models.image_cache import ImageCache
+
+BUNDLE_VERSION = 1
+SUFFIX = ".tar.gz"
+MANIFEST_NAME = "manifest.json"
+EVENTS_NAME = "events.jsonl"
+DOCUMENTS_DIR = "documents"  # documents/<scraper type>/<case ID>/<fetched at>
+IMAGES_DIR = "images"  # images/<scraper type>/<case ID>/<vehicle number>/<image ID>
+EDR_DIR = "edr"  # edr/case_<case ID>/edr/<file name>, as saved in the profile's directory
+IMPORT_BATCH_SIZE = 1000
+
+# Extended tar header fields holding the columns of a document or image not in its name
+URL_HEADER = "nhtsa.url"
+HEADERS_HEADER = "nhtsa.headers"
+ENCODING_HEADER = "nhtsa.encoding"
+IMG_SET_HEADER = "nhtsa.img_set"
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes, pax_headers: dict = None):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    info.pax_headers = pax_headers or {}
+    tar.addfile(info, io.BytesIO(data))
+
+
+class BundleExportWorker(EventExportWorker):
+    """Worker class to write a profile to a compressed archive (a gzipped tar file) that can
+    be imported into another database.
+
+    The archive holds a manifest with the profile, the profile's events with their ignored
+    status, and optionally every stored version of the raw documents of its cases, the cached
+    images of its vehicles, and the EDR files saved to its directory. Members are written in
+    that order so the archive can be imported in a single pass.
+    """
+
+    SUFFIX = SUFFIX
+
+    def __init__(
+        self,
+        db_handler: DatabaseHandler,
+        profile: Profile,
+        data_dir: Path,
+        documents: bool = True,
+        image_cache: "ImageCache" = None,
+        edr: bool = True,
+    ):
+        """
+        Args:
+            db_handler (DatabaseHandler): Database handler to read the profile with.
+            profile (Profile): Profile to export.
+            data_dir (Path): Data directory, which the archive is saved to and the profile's
+                EDR files are read from.
+            documents (bool, optional): Include raw case documents. Defaults to True.
+            image_cache (ImageCache, optional): Image cache to include the images of the
+                profile's vehicles from. Defaults to None, which leaves out images.
+            edr (bool, optional): Include EDR files. Defaults to True.
+        """
+        super().__init__(db_handler, profile, data_dir, include_ignored=True)
+        self._manifest = {
+            "version": BUNDLE_VERSION,
+            "profile": {
+                "name": profile.name,
+                "params": profile.params,
+                "multi": profile.multi,
+                "created": profile.created,
+                "modified": profile.modified,
+            },
+        }
+        self._profile_dir = Path(data_dir) / profile.dir_name()
+        self._documents = documents
+        self._image_cache = image_cache
+        self._edr = edr
+
+    def _file_name(self, profile: Profile) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        return f"{profile.dir_name()}_{timestamp}{self.SUFFIX}"
+
+    def _write(self, path: Path):
+        with tarfile.open(path, "w:gz", format=tarfile.PAX_FORMAT) as tar:
+            _add_bytes(tar, MANIFEST_NAME, json.dumps(self._manifest).encode())
+            vehicles = self._add_events(tar)
+            if self._documents:
+                self._add_documents(tar)
+            if self._image_cache is not None:
+                self._add_images(tar, vehicles)
+            if self._edr:
+                self._add_edr(tar, {case for _, case, _ in vehicles})
+
+    def _add_events(self, tar: tarfile.TarFile) -> set[tuple[str, int, int]]:
+        """Add the events as JSON lines, spooled to a temporary file as tar members need a
+        known size.
+
+        Returns:
+            set[tuple[str, int, int]]: The scraper type, case ID and vehicle number of every
+                vehicle with events.
+        """
+        vehicles = set()
+        columns = [*self._headers, "ignored"]
+        with tempfile.TemporaryFile() as f:
+            for rows in self._batches(with_ignored=True):
+                for row in rows:
+                    values = dict(zip(columns, row))
+                    del values["id"]
+                    f.write(json.dumps(values).encode() + b"\n")
+                    vehicles.add(
+                        (values["scraper_type"], values["case_id"], values["vehicle_num"])
+                    )
+            info = tarfile.TarInfo(EVENTS_NAME)
+            info.size = f.tell()
+            info.mtime = int(time.time())
+            f.seek(0)
+            tar.addfile(info, f)
+        return vehicles
+
+    def _add_documents(self, tar: tarfile.TarFile):
+        for rows in self._db_handler.iter_case_document_rows(self._profile_id):
+            for scraper_type, case_id, fetched_at, url, headers, encoding, data in rows:
+                _add_bytes(
+                    tar,
+                    f"{DOCUMENTS_DIR}/{scraper_type}/{case_id}/{fetched_at}",
+                    data,
+                    {URL_HEADER: url, HEADERS_HEADER: headers, ENCODING_HEADER: encoding},
+                )
+
+    def _add_images(self, tar: tarfile.TarFile, vehicles: set[tuple[str, int, int]]):
+        for scraper_type, case_id, vehicle_num in sorted(vehicles):
+            images = self._image_cache.images(scraper_type, case_id, vehicle_num)
+            for img_id, img_set, original in images:
+                info = tar.gettarinfo(
+                    original,
+                    arcname=f"{IMAGES_DIR}/{scraper_type}/{case_id}/{vehicle_num}/{img_id}",
+                )
+                info.pax_headers = {IMG_SET_HEADER: img_set}
+                with open(original, "rb") as f:
+                    tar.addfile(info, f)
+
+    def _add_edr(self, tar: tarfile.TarFile, case_ids: set[int]):
+        for case_id in sorted(case_ids):
+            edr_dir = self._profile_dir / f"case_{case_id}" / "edr"
+            if not edr_dir.is_dir():
+                continue
+            for file in sorted(edr_dir.rglob("*")):
+                if file.is_file():
+                    relative = file.relative_to(self._profile_dir).as_posix()
+                    tar.add(file, arcname=f"{EDR_DIR}/{relative}")
+
+
+def _event_batches(f: IO[bytes]) -> Iterator[list[dict]]:
+    batch = []
+    for line in f:
+        batch.append(json.loads(line))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _safe_parts(name: str) -> list[str]:
+    """Split a member name into its parts.
+
+    Raises:
+        ValueError: If the name could lead outside of the directory it is extracted to.
+    """
+    parts = name.split("/")
+    if any(part in ("", ".", "..") or "\\" in part or ":" in part for part in parts):
+        raise ValueError(f"Unsafe member name '{name}'.")
+    return parts
+
+
+def import_bundle(
+    path: Path,
+    db_handler: DatabaseHandler,
+    data_dir: Path,
+    image_cache: "ImageCache" = None,
+    progress: Callable[[int, int], None] = None,
+) -> dict[str, int]:
+    """Import a profile from an archive written by a BundleExportWorker. The archive is read
+    in a single pass, without extracting it to disk first.
+
+    Args:
+        path (Path): Path of the archive.
+        db_handler (DatabaseHandler): Database handler to add the profile, events and
+            documents with.
+        data_dir (Path): Data directory to save the profile's EDR files to.
+        image_cache (ImageCache, optional): Image cache to add images to. Defaults to None,
+            which skips images.
+        progress (Callable[[int, int], None], optional): Called with the number of bytes of
+            the archive read so far and its size after each member. Defaults to None.
+
+    Returns:
+        dict[str, int]: The number of "events", "documents", "images" and "edr" files imported.
+
+    Raises:
+        ValueError: If the file is not a profile bundle, or the profile could not be imported.
+    """
+    counts = {"events": 0, "documents": 0, "images": 0, "edr": 0}
+    documents = []
+    size = Path(path).stat().st_size
+    with open(path, "rb") as raw, tarfile.open(fileobj=raw, mode="r|gz") as tar:
+        member = tar.next()
+        if member is None or member.name != MANIFEST_NAME:
+            raise ValueError(f"{Path(path).name} is not a profile bundle.")
+        manifest = json.load(tar.extractfile(member))
+        if manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError(
+                f"Unsupported profile bundle version {manifest.get('version')}."
+            )
+        try:
+            profile = Profile(**manifest["profile"])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid profile in the bundle manifest: {e}")
+        profile_dir = Path(data_dir) / profile.dir_name()
+
+        # Iterating over the archive would start over from the manifest, which a stream
+        # cannot seek back to
+        for member in iter(tar.next, None):
+            if not member.isfile():
+                continue
+            parts = _safe_parts(member.name)
+            f = tar.extractfile(member)
+
+            if member.name == EVENTS_NAME:
+                counts["events"] = db_handler.import_profile(profile, _event_batches(f))
+                if counts["events"] < 0:
+                    raise ValueError("The profile's events could not be imported.")
+
+            elif parts[0] == DOCUMENTS_DIR and len(parts) == 4:
+                documents.append(
+                    {
+                        "scraper_type": parts[1],
+                        "case_id": int(parts[2]),
+                        "fetched_at": int(parts[3]),
+                        "url": member.pax_headers.get(URL_HEADER, ""),
+                        "headers": member.pax_headers.get(HEADERS_HEADER, "{}"),
+                        "encoding": member.pax_headers.get(ENCODING_HEADER, ""),
+                        "data": f.read(),
+                    }
+                )
+                if len(documents) >= db_handler.QUERY_CHUNK_SIZE:
+                    counts["documents"] += max(db_handler.import_case_documents(documents), 0)
+                    documents = []
+
+            elif parts[0] == IMAGES_DIR and len(parts) == 5 and image_cache is not None:
+                _, scraper_type, case_id, vehicle_num, img_id = parts
+                if image_cache.put(
+                    scraper_type,
+                    int(case_id),
+                    int(vehicle_num),
+                    int(img_id) if img_id.isdigit() else img_id,
+                    f.read(),
+                    img_set=member.pax_headers.get(IMG_SET_HEADER, ""),
+                    make_thumbnail=False,
+                ):
+                    counts["images"] += 1
+
+            elif parts[0] == EDR_DIR and len(parts) > 1:
+                # EDR files already saved to the profile's directory are kept
+                dest = profile_dir.joinpath(*parts[1:])
+                if not dest.exists():
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    dest.write_bytes(f.read())
+                    counts["edr"] += 1
+
+            if progress is not None:
+                progress(raw.tell(), size)
+
+    counts["documents"] += max(db_handler.import_case_documents(documents), 0)
+    if image_cache is not None:
+        image_cache.flush()
+    return counts
+
+
+class ImportSignals(QObject):
+    """Signals emitted by a BundleImportWorker instance."""
+
+    # bytes read, bytes total
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(dict)
+    exception = pyqtSignal(Exception)
+
+
+class BundleImportWorker(QRunnable):
+    """Worker class to import a profile bundle in a separate thread (see import_bundle()).
+
+    The database is written with a handler of the worker's own, as the session of the GUI's
+    handler belongs to the GUI thread. Once finished, the GUI's handler has to be expired so
+    that events updated by the import are reloaded.
+    """
+
+    def __init__(
+        self,
+        db_handler: DatabaseHandler,
+        path: Path,
+        data_dir: Path,
+        image_cache: "ImageCache" = None,
+    ):
+        """
+        Args:
+            db_handler (DatabaseHandler): Handler of the database to import the profile into.
+            path (Path): Path of the archive.
+            data_dir (Path): Data directory to save the profile's EDR files to.
+            image_cache (ImageCache, optional): Image cache to add images to. Defaults to
+                None, which skips images.
+        """
+        super().__init__()
+        self._db_handler = db_handler
+        self._data_dir = data_dir
+        self._image_cache = image_cache
+
+        self.path = Path(path)
+        self.signals = ImportSignals()
+
+    @pyqtSlot()
+    def run(self):
+        db_handler = self._db_handler.open_worker_handler()
+        try:
+            counts = import_bundle(
+                self.path,
+                db_handler,
+                self._data_dir,
+                self._image_cache,
+                self.signals.progress.emit,
+            )
+        except Exception as e:
+            self.signals.exception.emit(e)
+        else:
+            self.signals.finished.emit(counts)
+        finally:
+            db_handler.close_connection()
@@ -31,11 +31,12 @@ class ProfileList(QAbstractListModel):
         return QVariant()
 
     def delete_profiles(self, indices: list[QModelIndex]):
-        for index in indices:
-            if not index.isValid() or not (0 <= index.row() < self.rowCount()):
-                continue
-            profile = self._data[index.row()]
-            self.db_handler.delete_profile(profile)
+        profiles = [
+            self._data[index.row()]
+            for index in indices
+            if index.isValid() and 0 <= index.row() < self.rowCount()
+        ]
+        self.db_handler.delete_profiles(profiles)
         self.refresh_data()
 
     def refresh_data(self):
@@ -1,3 +1,4 @@
+import re
 from typing import List
 from sqlalchemy import ForeignKey, UniqueConstraint, inspect
 from sqlalchemy.orm import (
@@ -33,6 +34,15 @@ class Profile(Base):
         creator=lambda event_obj: ProfileEvent(event=event_obj),
     )
 
+    def dir_name(self) -> str:
+        """Get a filename-safe name for the profile's directory in the data directory."""
+        dir_name = f"{self.name}".replace(" ", "_")
+        filename_safe = ["_", "-", "(", ")"]
+        dir_name = "".join(
+            c if c.isalnum() or c in filename_safe else "_" for c in dir_name
+        )
+        return re.sub(r"[_-]{2,}", "_", dir_name)
+
 
 class Event(Base):
     __tablename__ = "event"
@@ -99,6 +109,31 @@ class Event(Base):
                 setattr(self, key, value)
 
 
+class CachedOptions(Base):
+    """Parsed search form options (dropdowns, model lists) of an NHTSA database, stored as JSON."""
+
+    __tablename__ = "cached_options"
+
+    scraper_type: Mapped[str] = mapped_column(primary_key=True)
+    key: Mapped[str] = mapped_column(primary_key=True)
+    data: Mapped[str] = mapped_column()
+    fetched: Mapped[int] = mapped_column()
+
+
+class CaseDocument(Base):
+    """A compressed raw case document (XML or JSON) as fetched from an NHTSA database."""
+
+    __tablename__ = "case_document"
+
+    scraper_type: Mapped[str] = mapped_column(primary_key=True)
+    case_id: Mapped[int] = mapped_column(primary_key=True)
+    fetched_at: Mapped[int] = mapped_column(primary_key=True)
+    url: Mapped[str] = mapped_column()
+    headers: Mapped[str] = mapped_column()  # Response headers as JSON
+    encoding: Mapped[str] = mapped_column()  # Compression of the data ("zstd" or "gzip")
+    data: Mapped[bytes] = mapped_column()
+
+
 class ProfileEvent(Base):
     __tablename__ = "profile_event"
 
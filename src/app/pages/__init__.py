@@ -1,11 +1,28 @@
+import importlib
+
 from .main_menu import MainMenu
 from .base_tab import BaseTab
-from .summary_tab import SummaryTab
-from .scatter_tab import ScatterTab
-from .events_tab import EventsTab
-from .csv_tab import CSVTab
-from .data_view import DataView
-from .scrape_menu import ScrapeMenu
 from .logs_window import LogsWindow
-from .profile_menu import ProfileMenu
+from .performance_window import PerformanceWindow
 from .settings_menu import SettingsMenu
+
+# Pages that import heavy dependencies (matplotlib, PIL, bs4, the scrapers) are only
+# imported on first use, so they do not delay the first paint of the main window
+_LAZY_NAMES = {
+    "SummaryTab": ".summary_tab",
+    "ScatterTab": ".scatter_tab",
+    "EventsTab": ".events_tab",
+    "CSVTab": ".csv_tab",
+    "DataView": ".data_view",
+    "ScrapeMenu": ".scrape_menu",
+    "ScrapeDashboard": ".scrape_dashboard",
+    "ProfileMenu": ".profile_menu",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
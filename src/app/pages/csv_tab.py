@@ -1,57 +1,119 @@
-import csv
 import logging
-import os
 from pathlib import Path
 
+from PyQt6.QtCore import QThreadPool, pyqtSlot
 from PyQt6.QtWidgets import QMessageBox
 
 from app.pages import BaseTab
 from app.pages.utils import open_path
-from app.models import EventTable, Profile
+from app.models import (
+    CSVExportWorker,
+    DatabaseHandler,
+    EventExportWorker,
+    EventTable,
+    Profile,
+    arrow_available,
+)
 from app.ui import Ui_CSVTab
 
 
 class CSVTab(BaseTab):
-    def __init__(self, db_handler, profile: Profile, data_dir: Path):
+    def __init__(self, db_handler: DatabaseHandler, profile: Profile, data_dir: Path):
         super().__init__()
         self.ui = Ui_CSVTab()
         self.ui.setupUi(self)
         self._logger = logging.getLogger(__name__)
 
+        self._db_handler = db_handler
+        self._profile = profile
         self._model = EventTable(db_handler, profile)
         self.ui.tableView.setModel(self._model)
-        self.ui.saveBtn.clicked.connect(self._save_csv)
+        self.ui.saveBtn.clicked.connect(self._save)
+
+        # Parquet and Feather files need pyarrow, so they are only offered if it is installed
+        formats = ["CSV"]
+        if arrow_available():
+            formats.extend(["Parquet", "Feather"])
+        self.ui.formatCombo.addItems(formats)
+        self.ui.formatCombo.currentTextChanged.connect(self._handle_format_changed)
 
         self._data_dir = data_dir
+        self._export: EventExportWorker | None = None
 
     def refresh(self):
         self._model.refresh_data()
         self.ui.tableView.hideColumn(0)
         self.ui.tableView.hideColumn(1)
 
-    def _save_csv(self):
+    @pyqtSlot(str)
+    def _handle_format_changed(self, file_format: str):
+        self.ui.saveBtn.setText(f"Save as {file_format}")
+        # Parquet and Feather files are always compressed
+        self.ui.gzipCheckBox.setEnabled(file_format == "CSV")
+
+    def _save(self):
+        """Starts writing the profile's events to a file in the background. Parquet and
+        Feather files include ignored events with their ignored status, so they can be
+        imported as a copy of the profile."""
         self.ui.saveBtn.setEnabled(False)
         self.ui.saveBtn.setText("Saving...")
-        self.ui.saveBtn.update()
-        os.makedirs(self._data_dir, exist_ok=True)
-        csv_path = self._data_dir / "scrape_data.csv"
-        i = 1
-        while csv_path.exists():
-            csv_path = self._data_dir / f"scrape_data({i}).csv"
-            i += 1
-        with open(csv_path, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(self._model.get_headers())
-            writer.writerows(self._model.all_events())
+
+        # The Arrow workers are imported in their branches so pyarrow is only loaded when used
+        file_format = self.ui.formatCombo.currentText()
+        if file_format == "Parquet":
+            from app.models import ParquetExportWorker
+
+            self._export = ParquetExportWorker(
+                self._db_handler, self._profile, self._data_dir
+            )
+        elif file_format == "Feather":
+            from app.models import FeatherExportWorker
+
+            self._export = FeatherExportWorker(
+                self._db_handler, self._profile, self._data_dir
+            )
+        else:
+            self._export = CSVExportWorker(
+                self._db_handler,
+                self._profile,
+                self._data_dir,
+                compress=self.ui.gzipCheckBox.isChecked(),
+            )
+        self._export.signals.progress.connect(self._handle_save_progress)
+        self._export.signals.finished.connect(self._handle_saved)
+        self._export.signals.exception.connect(self._handle_save_failed)
+        QThreadPool.globalInstance().start(self._export)
+
+    @pyqtSlot(int, int)
+    def _handle_save_progress(self, written: int, total: int):
+        self.ui.saveBtn.setText(f"Saving... ({written}/{total})")
+
+    def _reset_save_btn(self):
+        self._export = None
         self.ui.saveBtn.setEnabled(True)
-        self.ui.saveBtn.setText("Save as CSV")
-        self._logger.info(f"Saved CSV to {csv_path}.")
+        self._handle_format_changed(self.ui.formatCombo.currentText())
+
+    @pyqtSlot(Exception)
+    def _handle_save_failed(self, e: Exception):
+        self._reset_save_btn()
+        self._logger.error(f"Error saving file: {e}")
+        QMessageBox.critical(
+            self,
+            "Error",
+            "Failed to save file. See log for details.",
+            QMessageBox.StandardButton.Ok,
+        )
+
+    @pyqtSlot(Path)
+    def _handle_saved(self, path: Path):
+        self._reset_save_btn()
+        self._logger.info(f"Saved events to {path}.")
 
         box = QMessageBox()
-        box.setWindowTitle("CSV Saved")
+        box.setWindowTitle("File Saved")
         box.setIcon(QMessageBox.Icon.Information)
-        box.setText("CSV saved to:")
-        box.setInformativeText(str(csv_path))
+        box.setText("File saved to:")
+        box.setInformativeText(str(path))
         box.setStandardButtons(
             QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Open
         )
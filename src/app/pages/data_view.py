@@ -1,18 +1,18 @@
 import logging
 from pathlib import Path
-import re
 
 from PyQt6.QtCore import pyqtSignal, Qt, pyqtSlot
 from PyQt6.QtWidgets import QWidget
 
 from app.pages import SummaryTab, EventsTab, ScatterTab, CSVTab, BaseTab
-from app.models import DatabaseHandler, Profile, Event
+from app.models import DatabaseHandler, Profile, Event, ImageCache
 from app.scrape import RequestHandler
 from app.ui import Ui_DataView
 
 
 class DataView(QWidget):
     exited = pyqtSignal()
+    IMAGE_CACHE_DIR = "image_cache"
 
     def __init__(
         self,
@@ -34,7 +34,13 @@ class DataView(QWidget):
         self._data_dir = data_dir
 
         self._summary_tab = SummaryTab(profile, profile_dir)
-        self._events_tab = EventsTab(req_handler, db_handler, profile, profile_dir)
+        self._events_tab = EventsTab(
+            req_handler,
+            db_handler,
+            profile,
+            profile_dir,
+            ImageCache.for_dir(data_dir / self.IMAGE_CACHE_DIR),
+        )
         self._scatter_tab = ScatterTab(db_handler, profile, profile_dir)
         self._csv_tab = CSVTab(db_handler, profile, profile_dir)
         self._tabs: list[BaseTab] = [
@@ -54,12 +60,7 @@ class DataView(QWidget):
 
     def _get_profile_dir(self) -> str:
         """Generate a directory name for the profile."""
-        dir_name = f"{self._profile.name}".replace(" ", "_")
-        filename_safe = ["_", "-", "(", ")"]
-        dir_name = "".join(
-            c if c.isalnum() or c in filename_safe else "_" for c in dir_name
-        )
-        return re.sub(r"[_-]{2,}", "_", dir_name)
+        return self._profile.dir_name()
 
     def update_current_tab(self):
         """Refresh the currently selected tab."""
@@ -80,6 +81,9 @@ class DataView(QWidget):
 
     def handle_data_dir_updated(self, data_dir: Path):
         self._data_dir = data_dir
+        self._events_tab.set_image_cache(
+            ImageCache.for_dir(data_dir / self.IMAGE_CACHE_DIR)
+        )
         self._set_tabs_profile_dir()
 
     @pyqtSlot(Event, Profile)
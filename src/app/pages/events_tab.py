@@ -1,5 +1,3 @@
-from collections import defaultdict
-from io import BytesIO
 import json
 import logging
 import os
@@ -10,7 +8,7 @@ from PIL import Image, ImageDraw, ImageFont
 from requests import Response
 
 from PyQt6.QtCore import Qt, pyqtSlot, QModelIndex
-from PyQt6.QtGui import QPixmap, QFont, QImage
+from PyQt6.QtGui import QPixmap, QFont
 from PyQt6.QtWidgets import (
     QWidget,
     QLabel,
@@ -23,14 +21,24 @@ from PyQt6.QtWidgets import (
 
 from app.pages import BaseTab
 from app.pages.utils import remove_path
-from app.models import DatabaseHandler, EventList, Event, Profile
+from app.models import (
+    DatabaseHandler,
+    EventList,
+    Event,
+    Profile,
+    ImageCache,
+    make_case_document,
+)
 from app.scrape import (
     RequestHandler,
     Priority,
     RequestQueueItem,
+    DownloadQueueItem,
     BaseScraper,
     ScraperNASS,
     ScraperCISS,
+    ImageBatchJob,
+    SCRAPERS,
 )
 from app.ui import Ui_EventsTab
 
@@ -42,14 +50,18 @@ class EventsTab(BaseTab):
         db_handler: DatabaseHandler,
         profile: Profile,
         data_dir: Path,
+        image_cache: ImageCache,
     ):
         super().__init__()
         self.ui = Ui_EventsTab()
         self.ui.setupUi(self)
         self._logger = logging.getLogger(__name__)
 
+        self._db_handler = db_handler
+        self._profile = profile
         self._model = EventList(db_handler, profile)
         self._current_index_event = None
+        self._batch_job: ImageBatchJob = None
         self._data_dir = data_dir
 
         self.ui.eventsList.setModel(self._model)
@@ -61,6 +73,8 @@ class EventsTab(BaseTab):
         self.ui.ignoreBtn.clicked.connect(self._ignore_event)
         self.ui.saveRawBtn.clicked.connect(self._save_case_clicked)
         self.ui.fetchEDRBtn.clicked.connect(self._fetch_edr_clicked)
+        self.ui.scrapeAllImgsBtn.clicked.connect(self._scrape_all_imgs_clicked)
+        self.ui.batchProgressBar.setVisible(False)
 
         self.ui.imgSetCombo.addItem("Front", "Front")
         self.ui.imgSetCombo.addItem("Back", "Back")
@@ -81,9 +95,9 @@ class EventsTab(BaseTab):
 
         self._req_handler = req_controller
         self._req_handler.response_received.connect(self.handle_response)
+        self._req_handler.download_progress.connect(self._handle_download_progress)
 
-        # key: event, value: dict of img_id: img
-        self.img_cache = defaultdict(lambda: defaultdict(dict))
+        self._image_cache = image_cache
 
         self.refresh()
 
@@ -160,16 +174,14 @@ class EventsTab(BaseTab):
         # Clear and repopulate image thumbnails
         self._clear_thumbnails()
 
-        img_ids = self.img_cache[event]
-        empty = True
-        for img_id, img in img_ids.items():
-            if not img:
-                continue
-            thumbnail = ImageThumbnail(img_id, img, self._data_dir, event)
+        img_ids = self._image_cache.image_ids(
+            event.scraper_type, event.case_id, event.vehicle_num
+        )
+        for img_id in img_ids:
+            thumbnail = ImageThumbnail(img_id, self._image_cache, self._data_dir, event)
             self.ui.thumbnailsLayout.addWidget(thumbnail)
-            empty = False
 
-        self.no_images_label.setVisible(empty)
+        self.no_images_label.setVisible(not img_ids)
 
         self.ui.ignoreBtn.setEnabled(True)
         self._set_ignore_btn_text(self._model.data(index, Qt.ItemDataRole.FontRole))
@@ -232,9 +244,47 @@ class EventsTab(BaseTab):
         self.ui.scrapeImgsBtn.update()
         self.ui.stopBtn.setVisible(True)
 
-        self._fetch_case_data(self._fetch_imgs, request_purpose="images")
+        self._fetch_case_data(
+            self._fetch_imgs, request_purpose="images", for_images=True
+        )
         self._update_event_btns(self._current_index_event)
 
+    def _scrape_all_imgs_clicked(self):
+        if self._batch_job and self._batch_job.running:
+            self._batch_job.stop()
+            return
+
+        img_sets = [
+            self.ui.imgSetCombo.itemData(i) for i in range(self.ui.imgSetCombo.count())
+        ]
+        events = self._db_handler.get_events(self._profile, include_ignored=False)
+
+        self._batch_job = ImageBatchJob(
+            self._req_handler, self._image_cache, events, img_sets, self._db_handler
+        )
+        self._batch_job.progress.connect(self._batch_progress)
+        self._batch_job.finished.connect(self._batch_finished)
+
+        self.ui.scrapeAllImgsBtn.setText("Stop Batch")
+        self.ui.batchProgressBar.setRange(0, 0)
+        self.ui.batchProgressBar.setFormat("Fetching cases...")
+        self.ui.batchProgressBar.setVisible(True)
+        self._batch_job.start()
+
+    @pyqtSlot(int, int, float)
+    def _batch_progress(self, done: int, total: int, bytes_per_sec: float):
+        self.ui.batchProgressBar.setRange(0, max(total, 1))
+        self.ui.batchProgressBar.setValue(done)
+        self.ui.batchProgressBar.setFormat(
+            f"%v/%m images ({bytes_per_sec / 1e3:.0f} kB/s)"
+        )
+
+    @pyqtSlot()
+    def _batch_finished(self):
+        self.ui.scrapeAllImgsBtn.setText("Scrape All Events")
+        self.ui.batchProgressBar.setVisible(False)
+        self._open_event_details(self.ui.eventsList.currentIndex())
+
     def _save_case_clicked(self):
         self.ui.saveRawBtn.setEnabled(False)
         self.ui.saveRawBtn.setText("Saving...")
@@ -254,35 +304,50 @@ class EventsTab(BaseTab):
         self._update_event_btns(self._current_index_event)
 
     def _fetch_case_data(
-        self, callback: Callable[[RequestQueueItem, Response], None], request_purpose=""
+        self,
+        callback: Callable[[RequestQueueItem, Response], None],
+        request_purpose="",
+        for_images=False,
     ):
-        """Fetches the case data for the currently selected event and calls the callback function with the response.
+        """Gets the case data for the currently selected event and calls the callback function with the response.
+        The stored case document is used if there is one, otherwise the case is requested and its document stored.
 
         Args:
             callback (Callable[[RequestQueueItem, Response], None]): The function to call with the response.
             request_purpose (str, optional): The purpose of the request. Defaults to "".
+            for_images (bool, optional): Whether images will be found in the case data, in which case
+                stored documents too old for their image URLs to work are not used. Defaults to False.
         """
         event: Event = self._model.data(
             self.ui.eventsList.currentIndex(), Qt.ItemDataRole.UserRole
         ).event
 
-        scraper: BaseScraper = None
-        if event.scraper_type == "NASS":
-            scraper = ScraperNASS
-        elif event.scraper_type == "CISS":
-            scraper = ScraperCISS
-        else:
+        scraper: BaseScraper = SCRAPERS.get(event.scraper_type)
+        if not scraper:
             self._logger.error(f"Unknown scraper type: {event.scraper_type}")
+            return
 
-        self._req_handler.enqueue_request(
-            RequestQueueItem(
-                BaseScraper.ROOT
-                + str(scraper.case_url_raw).format(case_id=event.case_id),
-                priority=Priority.IMMEDIATE.value,
-                extra_data={"event": event, "for": request_purpose},
-                callback=callback,
-            )
+        request = RequestQueueItem(
+            scraper.endpoint_url(
+                "case", str(scraper.case_url_raw).format(case_id=event.case_id)
+            ),
+            priority=Priority.IMMEDIATE.value,
+            extra_data={"event": event, "for": request_purpose},
+            callback=callback,
+        )
+
+        response = self._db_handler.get_case_document(
+            event.scraper_type,
+            event.case_id,
+            max_age=scraper.image_document_max_age if for_images else None,
         )
+        if response is not None:
+            self._logger.debug(f"Using stored case document for case {event.case_id}.")
+            callback(request, response)
+            return
+
+        request.extra_data["store_document"] = True
+        self._req_handler.enqueue_request(request)
 
     def _stop_btn_clicked(self):
         # Stops any requests for a case page requested specifically for images
@@ -324,162 +389,87 @@ class EventsTab(BaseTab):
             response (Response): The response to the request.
         """
         if request.callback.__self__ == self:
+            if request.extra_data.get("store_document") and response.content:
+                event: Event = request.extra_data["event"]
+                self._db_handler.add_case_document(
+                    make_case_document(event.scraper_type, event.case_id, response)
+                )
             request.callback(request, response)
 
     def _fetch_imgs(self, request: RequestQueueItem, response: Response):
         event: Event = request.extra_data.get("event")
 
-        scraper_type = event.scraper_type
-        if scraper_type == "NASS":
-            self._fetch_imgs_nass(event, request, response)
-        elif scraper_type == "CISS":
-            self._fetch_imgs_ciss(event, request, response)
-
-        self._update_event_btns(event)
-
-    def _fetch_imgs_nass(
-        self, event: Event, request: RequestQueueItem, response: Response
-    ):
-        soup = BeautifulSoup(response.content, "xml")
-        img_form = soup.find("IMGForm")
-        cookie = response.headers.get("Set-Cookie", "")
-
-        if not img_form:
-            self._logger.debug("No ImgForm found.")
-            return
-
-        veh_img_form = img_form.find("Vehicle", {"VehicleNumber": {event.vehicle_num}})
-        if not veh_img_form:
-            self._logger.warning(
-                f"Image form for vehicle '{event.vehicle_num}' of case '{event.case_id}' not found."
-            )
-            return
-
-        form_id = self.ui.imgSetCombo.currentData()
-        img_area_form = veh_img_form.find(form_id)
-        if not img_area_form:
-            self._logger.warning(f"Image area form '{form_id}' not found.")
-            return
-
-        image_elements = img_area_form.find_all("image")
-        event_imgs = self.img_cache[event]
-        requests = []
-        for img_element in image_elements:
-            img_element: BeautifulSoup
-            img_id = int(img_element.text)
-
-            # Skip if image already exists in cache
-            if event_imgs.get(img_id):
-                continue
-
-            requests.append(
-                RequestQueueItem(
-                    BaseScraper.ROOT
-                    + str(ScraperNASS.img_url).format(
-                        img_id=img_id,
-                        case_id=event.case_id,
-                        version=img_element["version"],
-                    ),
-                    headers={"Cookie": cookie},
-                    priority=Priority.IMAGE.value,
-                    extra_data={"event": event},
-                    callback=self._parse_image,
-                )
-            )
-            event_imgs.update({img_id: None})
-
-        self.img_cache[event] = event_imgs
-        self._req_handler.batch_enqueue(requests)
-
-    def _fetch_imgs_ciss(
-        self, event: Event, request: RequestQueueItem, response: Response
-    ):
-        json_data: dict = response.json()
-        photos = json_data.get("Photos")
-
-        if not photos:
-            self._logger.debug("No photos found.")
-            return
-
-        veh_photos = []
-        for photo in photos:
-            if int(photo.get("VehNum")) == event.vehicle_num:
-                veh_photos.append(photo)
-
-        if not veh_photos:
-            self._logger.warning(
-                f"No photos found for vehicle '{event.vehicle_num}' of case '{event.case_id}'."
-            )
-            return
-
-        sorted_photos = defaultdict(list)
-        for photo in veh_photos:
-            dmg_text = photo.get("SubTypeText", "")
-            dmg_text = dmg_text.lower().replace(" ", "").replace("plane", "")
-            sorted_photos[dmg_text].append(photo)
-
+        scraper = SCRAPERS.get(event.scraper_type)
         img_set = self.ui.imgSetCombo.currentData()
+        if not scraper:
+            self._logger.error(f"Unknown scraper type: {event.scraper_type}")
+            return
         if not img_set:
             self._logger.error("No image set selected.")
             return
 
-        filtered_photos = sorted_photos.get(img_set.lower(), [])
-
-        event_imgs = self.img_cache[event]
         requests = []
-        for photo in filtered_photos:
-            obj_id = photo.get("ObjectId")
-
-            # Skip if we already have the image (implicitly creates
-            #   a new None entry in the dict if it doesn't exist)
-            if event_imgs[obj_id]:
+        for image in scraper.find_images(
+            response, event.case_id, event.vehicle_num, [img_set]
+        ):
+            # Skip if image already exists in cache
+            if self._image_cache.contains(
+                event.scraper_type, event.case_id, event.vehicle_num, image.img_id
+            ):
                 continue
 
             requests.append(
-                RequestQueueItem(
-                    BaseScraper.ROOT + str(ScraperCISS.img_url).format(obj_id=obj_id),
+                DownloadQueueItem(
+                    image.url,
+                    headers=image.headers,
                     priority=Priority.IMAGE.value,
-                    extra_data={"event": event},
+                    dest=self._image_cache.original_dest(
+                        event.scraper_type, event.case_id, event.vehicle_num, image.img_id
+                    ),
+                    extra_data={
+                        "event": event,
+                        "img_id": image.img_id,
+                        "img_set": image.img_set,
+                    },
                     callback=self._parse_image,
                 )
             )
 
-        self.img_cache[event] = event_imgs
         self._req_handler.batch_enqueue(requests)
+        self._update_event_btns(event)
 
-    def _parse_image(self, request: RequestQueueItem, response: Response):
-        event: Event = request.extra_data.get("event")
-        event_imgs = self.img_cache[event]
-
-        img_key = ""
-        if event.scraper_type == "NASS":
-            img_key = int(request.url.split("&")[1].split("=")[1])
-        elif event.scraper_type == "CISS":
-            img_key = request.url.split("/")[4]
-
-        image = Image.open(BytesIO(response.content))
+    @pyqtSlot(RequestQueueItem, int, int)
+    def _handle_download_progress(self, request: RequestQueueItem, received: int, total: int):
+        """Shows the progress of EDR downloads for the current event on the EDR button."""
+        if (
+            request.extra_data.get("for") != "edr"
+            or request.extra_data.get("event") != self._current_index_event
+        ):
+            return
 
-        w, h = image.size
-        aspect_ratio = w / h
-        if aspect_ratio < 1:
-            # image is portrait, make width at least 1080
-            w = 1080
-            h = round(w / aspect_ratio)
+        if total > 0:
+            self.ui.fetchEDRBtn.setText(f"Fetching... {received / total:.0%}")
         else:
-            # image is landscape, make width at least 1920
-            w = 1920
-            h = round(w / aspect_ratio)
-
-        image = image.resize((w, h))
+            self.ui.fetchEDRBtn.setText(f"Fetching... {received / 1e3:.0f} kB")
 
-        event_imgs[img_key] = image
+    def _parse_image(self, request: DownloadQueueItem, response: Response):
+        event: Event = request.extra_data.get("event")
+        img_id = request.extra_data.get("img_id")
+
+        stored = self._image_cache.add(
+            event.scraper_type,
+            event.case_id,
+            event.vehicle_num,
+            img_id,
+            img_set=request.extra_data.get("img_set", ""),
+        )
 
         self._update_event_btns(event)
 
-        if self._current_index_event != event:
+        if not stored or self._current_index_event != event:
             return
 
-        thumbnail = ImageThumbnail(img_key, image, self._data_dir, event)
+        thumbnail = ImageThumbnail(img_id, self._image_cache, self._data_dir, event)
         self.ui.thumbnailsLayout.addWidget(thumbnail)
 
         self.no_images_label.setVisible(False)
@@ -596,19 +586,23 @@ class EventsTab(BaseTab):
             return
 
         self._req_handler.enqueue_request(
-            RequestQueueItem(
-                BaseScraper.ROOT
-                + str(ScraperNASS.edr_url).format(
-                    veh_num=event.vehicle_num, edr_id=edr_id, case_id=event.case_id
+            DownloadQueueItem(
+                ScraperNASS.endpoint_url(
+                    "edr",
+                    str(ScraperNASS.edr_url).format(
+                        veh_num=event.vehicle_num, edr_id=edr_id, case_id=event.case_id
+                    ),
                 ),
                 priority=Priority.IMMEDIATE.value,
+                dest=edr_data_dir / f"edr_{edr_id}.html",
+                keep_existing=True,
                 extra_data={
                     "event": event,
                     "dir": edr_data_dir,
                     "edr_id": edr_id,
                     "for": "edr",
                 },
-                callback=self._save_nass_edr,
+                callback=self._save_edr,
             )
         )
 
@@ -657,60 +651,30 @@ class EventsTab(BaseTab):
         for doc in edr_docs:
             filename = doc.get("FileName")
             obj_id = doc.get("ObjectID")
-            request = RequestQueueItem(
-                BaseScraper.ROOT
-                + str(ScraperCISS.edr_url).format(filename=filename, obj_id=obj_id),
+            request = DownloadQueueItem(
+                ScraperCISS.endpoint_url(
+                    "edr", str(ScraperCISS.edr_url).format(filename=filename, obj_id=obj_id)
+                ),
                 priority=Priority.IMMEDIATE.value,
+                dest=edr_data_dir / filename,
+                keep_existing=True,
                 extra_data={
                     "event": event,
                     "dir": edr_data_dir,
                     "filename": filename,
                     "for": "edr",
                 },
-                callback=self._save_ciss_edr,
+                callback=self._save_edr,
             )
             self._req_handler.enqueue_request(request)
 
-    def _save_nass_edr(self, request: RequestQueueItem, response: Response):
+    def _save_edr(self, request: DownloadQueueItem, response: Response):
+        # The EDR file has already been streamed to its destination by the request handler
         event: Event = request.extra_data.get("event")
-        edr_dir: Path = request.extra_data.get("dir")
-        edr_id: str = request.extra_data.get("edr_id")
-
-        # Create a unique file name
-        filename = f"edr_{edr_id}.html"
-        edr_data_path = edr_dir / filename
-        i = 1
-        while edr_data_path.exists():
-            edr_data_path = edr_dir / filename.replace(".", f"({i}).")
-            i += 1
-
-        # Write the EDR data to the file
-        with open(edr_data_path, "wb") as f:
-            f.write(response.content)
-
-        self._logger.info(f"Saved EDR data for case {event.case_id} to {edr_data_path}")
 
-        self._update_event_btns(event)
-
-    def _save_ciss_edr(self, request: RequestQueueItem, response: Response):
-        filename = response.headers["Content-Disposition"].split("filename=")[1]
-
-        event: Event = request.extra_data.get("event")
-        edr_dir: Path = request.extra_data.get("dir")
-        filename: str = request.extra_data.get("filename")
-
-        # Create a unique file name
-        edr_data_path = edr_dir / filename
-        i = 1
-        while edr_data_path.exists():
-            edr_data_path = edr_dir / filename.replace(".", f"({i}).")
-            i += 1
-
-        # Write the EDR data to the file
-        with open(edr_data_path, "wb") as f:
-            f.write(response.content)
-
-        self._logger.info(f"Saved EDR data for case {event.case_id} to {edr_data_path}")
+        self._logger.info(
+            f"Saved EDR data for case {event.case_id} to {request.dest} ({request.bytes_written} bytes, SHA-256 {request.sha256})"
+        )
         self._update_event_btns(event)
 
     def closeEvent(self, event):
@@ -719,21 +683,36 @@ class EventsTab(BaseTab):
         self._req_handler.clear_requests(Priority.IMMEDIATE.value)
         self._req_handler.clear_requests(Priority.IMAGE.value)
         self._logger.debug("Cleared image requests.")
+        if self._batch_job:
+            self._batch_job.stop()
+        self._image_cache.flush()
+
+    def set_image_cache(self, image_cache: ImageCache):
+        """Sets the image cache used to store and display images."""
+        self._image_cache.flush()
+        self._image_cache = image_cache
+        self._open_event_details(self.ui.eventsList.currentIndex())
 
 
 class ImageThumbnail(QWidget):
-    def __init__(self, img_id: int, image: Image.Image, data_dir: Path, event: Event):
+    def __init__(
+        self, img_id: int, image_cache: ImageCache, data_dir: Path, event: Event
+    ):
         super().__init__()
 
         self.logger = logging.getLogger(__name__)
 
         self.img_id = img_id
-        self.image = image
+        self.image_cache = image_cache
         self.data_dir = data_dir
+        self.event = event
 
         layout = QGridLayout()
         self.thumbnail_label = QLabel()
-        pixmap = self.img_to_pixmap(self.image).scaledToHeight(160)
+        thumbnail_path = image_cache.thumbnail_path(
+            event.scraper_type, event.case_id, event.vehicle_num, img_id
+        )
+        pixmap = QPixmap(str(thumbnail_path)) if thumbnail_path else QPixmap()
         self.thumbnail_label.setPixmap(pixmap)
         self.thumbnail_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
         self.setFixedSize(pixmap.size())
@@ -756,36 +735,43 @@ class ImageThumbnail(QWidget):
 
         self.setLayout(layout)
 
-    def img_to_pixmap(self, img: Image.Image):
-        pixmap = QPixmap()
-
-        # If img.size is not on a byte boundary, .fromImage will crash without throwing an error
-        # For example, we have a problematic image that is 1919 x 1079, we need to resize it to 1920 x 1080
-        if img.size[0] % 8 != 0 or img.size[1] % 8 != 0:
-            img = img.resize(((img.size[0] + 7) // 8 * 8, (img.size[1] + 7) // 8 * 8))
+    def load_image(self) -> Image.Image | None:
+        """Loads the full resolution image from the cache, scaled to a consistent width."""
+        image = self.image_cache.load_original(
+            self.event.scraper_type,
+            self.event.case_id,
+            self.event.vehicle_num,
+            self.img_id,
+        )
+        if not image:
+            return None
 
-        try:
-            qimg = QImage(
-                img.tobytes("raw", "RGB"),
-                img.size[0],
-                img.size[1],
-                QImage.Format.Format_RGB888,
-            )
-            pixmap = QPixmap.fromImage(qimg)
-        except Exception as e:
-            self.logger.error(f"Error converting image to pixmap: {e}")
-            pixmap = QPixmap()
+        w, h = image.size
+        aspect_ratio = w / h
+        if aspect_ratio < 1:
+            # image is portrait, make width at least 1080
+            w = 1080
+            h = round(w / aspect_ratio)
+        else:
+            # image is landscape, make width at least 1920
+            w = 1920
+            h = round(w / aspect_ratio)
 
-        return pixmap
+        return image.resize((w, h))
 
     def save_image(self, event: Event):
+        image = self.load_image()
+        if not image:
+            self.save_button.setText("Failed")
+            return
+
         self.save_button.setEnabled(False)
         self.save_button.setText("Saving...")
 
         text = f"Case No: {event.case_id} - NASS DV: {event.NASS_dv:.4f} - TOT DV: {event.TOT_dv:.4f}"
-        draw = ImageDraw.Draw(self.image)
+        draw = ImageDraw.Draw(image)
 
-        width, height = self.image.size
+        width, height = image.size
         font_size = 100
         font_path = Path(__file__).parent.parent / "resources" / "OpenSans-Regular.ttf"
 
@@ -805,7 +791,7 @@ class ImageThumbnail(QWidget):
 
         # Stitch the text block to the top of the image so we dont lose any info
         new_img = Image.new("RGB", (width, height + text_rect_height), (255, 255, 255))
-        new_img.paste(self.image, (0, text_rect_height))
+        new_img.paste(image, (0, text_rect_height))
 
         draw = ImageDraw.Draw(new_img)
         draw.text(xy=(0, 0), text=text, fill=(0, 0, 0), font=font)
@@ -824,7 +810,8 @@ class ImageThumbnail(QWidget):
         self.save_button.setText("Saved!")
 
     def open_image(self):
-        self.image.show()
+        if image := self.load_image():
+            image.show()
 
     def enterEvent(self, event):
         self.open_button.setVisible(True)
@@ -6,6 +6,7 @@ from pathlib import Path
 from PyQt6.QtCore import pyqtSlot
 from PyQt6.QtWidgets import QWidget
 
+from app.log_utils import LogList
 from app.ui import Ui_LogsWindow
 
 
@@ -18,23 +19,41 @@ class LogsWindow(QWidget):
 
         self.logger = logging.getLogger(__name__)
 
+        self._model = LogList()
+        self.ui.logsView.setModel(self._model)
+
         self.ui.clearBtn.clicked.connect(self.handle_clear_clicked)
         self.ui.saveBtn.clicked.connect(self.handle_save_clicked)
+        self.ui.levelCombo.currentTextChanged.connect(self.handle_level_changed)
+        self.ui.searchEdit.textChanged.connect(self.handle_search_changed)
 
     def showEvent(self, a0):
-        self.ui.logsEdit.verticalScrollBar().setValue(
-            self.ui.logsEdit.verticalScrollBar().maximum()
-        )
+        self.ui.logsView.scrollToBottom()
         return super().showEvent(a0)
 
-    @pyqtSlot(str)
-    def handle_logger_message(self, msg):
-        self.ui.logsEdit.append(msg)
+    @pyqtSlot(list)
+    def handle_logger_messages(self, msgs: list[tuple[int, str]]):
+        # Only follow new messages if the view is already scrolled to the bottom
+        scroll_bar = self.ui.logsView.verticalScrollBar()
+        at_bottom = scroll_bar.value() == scroll_bar.maximum()
+
+        self._model.append_messages(msgs)
+        if at_bottom and self.isVisible():
+            self.ui.logsView.scrollToBottom()
+
         self.ui.saveBtn.setEnabled(True)
         self.ui.clearBtn.setEnabled(True)
 
+    def handle_level_changed(self, level_name: str):
+        self._model.set_filter(min_level=logging.getLevelName(level_name))
+        self.ui.logsView.scrollToBottom()
+
+    def handle_search_changed(self, text: str):
+        self._model.set_filter(search=text)
+        self.ui.logsView.scrollToBottom()
+
     def handle_clear_clicked(self):
-        self.ui.logsEdit.clear()
+        self._model.clear()
         self.ui.clearBtn.setEnabled(False)
         self.ui.saveBtn.setEnabled(False)
         self.logger.info("Cleared all logs.")
@@ -46,6 +65,6 @@ class LogsWindow(QWidget):
             dir_path / f'{datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.log'
         )
         with open(log_path, "w") as f:
-            f.write(self.ui.logsEdit.toPlainText())
+            f.write(self._model.to_text())
         self.logger.info(f"Saved all logs to file at '{f.name}'.")
         self.ui.saveBtn.setEnabled(False)
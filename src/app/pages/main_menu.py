@@ -8,6 +8,7 @@ class MainMenu(QWidget):
     new = pyqtSignal()
     existing = pyqtSignal()
     logs = pyqtSignal()
+    performance = pyqtSignal()
     settings = pyqtSignal()
 
     def __init__(self):
@@ -19,4 +20,5 @@ class MainMenu(QWidget):
         self.ui.scrapeBtn.clicked.connect(self.new.emit)
         self.ui.openBtn.clicked.connect(self.existing.emit)
         self.ui.logsBtn.clicked.connect(self.logs.emit)
+        self.ui.perfBtn.clicked.connect(self.performance.emit)
         self.ui.settingsBtn.clicked.connect(self.settings.emit)
@@ -0,0 +1,110 @@
+import logging
+
+from PyQt6.QtCore import QTimer, pyqtSlot
+from PyQt6.QtWidgets import QTreeWidgetItem, QWidget
+
+from app.scrape import Priority, RequestStats
+from app.ui import Ui_PerformanceWindow
+
+
+class PerformanceWindow(QWidget):
+    """Live view of the timing and throughput of the requests sent by the request handler."""
+
+    REFRESH_INTERVAL = 1000  # ms
+    GROUP_KEYS = ("by_priority", "by_pattern")  # Snapshot key of each groupCombo option
+    # Snapshot keys of the columns after the interval name
+    COLUMNS = ("count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+
+    def __init__(self, stats: RequestStats):
+        super().__init__()
+
+        self.ui = Ui_PerformanceWindow()
+        self.ui.setupUi(self)
+
+        self._logger = logging.getLogger(__name__)
+        self._stats = stats
+        # Groups expanded by the user, kept expanded when the tree is refreshed
+        self._expanded: set[str] = set()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+        self.ui.groupCombo.currentIndexChanged.connect(self.refresh)
+        self.ui.statsTree.itemExpanded.connect(
+            lambda item: self._expanded.add(item.text(0))
+        )
+        self.ui.statsTree.itemCollapsed.connect(
+            lambda item: self._expanded.discard(item.text(0))
+        )
+        self.ui.resetBtn.clicked.connect(self.handle_reset_clicked)
+        self.ui.saveBtn.clicked.connect(self.handle_save_clicked)
+
+    def showEvent(self, a0):
+        self.refresh()
+        self._timer.start()
+        return super().showEvent(a0)
+
+    def hideEvent(self, a0):
+        self._timer.stop()
+        return super().hideEvent(a0)
+
+    @pyqtSlot()
+    def refresh(self):
+        snapshot = self._stats.snapshot()
+        throughput = snapshot["throughput"]
+        self.ui.throughputLabel.setText(
+            f"{throughput['requests_per_s']:.2f} requests/s, "
+            f"{throughput['bytes_per_s'] / 1e3:.1f} kB/s "
+            f"(last {throughput['window_s']}s)"
+        )
+
+        tree = self.ui.statsTree
+        scroll = tree.verticalScrollBar().value()
+        tree.clear()
+        groups = snapshot[self.GROUP_KEYS[self.ui.groupCombo.currentIndex()]]
+        for name, group in groups.items():
+            label = self._group_label(name)
+            outcomes = ", ".join(
+                f"{outcome}: {count}" for outcome, count in sorted(group["outcomes"].items())
+            )
+            group_item = QTreeWidgetItem(tree, [label])
+            group_item.setToolTip(0, outcomes)
+            total = group["intervals"].get("total")
+            if total:
+                self._set_columns(group_item, total)
+
+            for interval, histogram in group["intervals"].items():
+                item = QTreeWidgetItem(group_item, [interval])
+                self._set_columns(item, histogram)
+            group_item.setExpanded(label in self._expanded)
+
+        tree.verticalScrollBar().setValue(scroll)
+        for column in range(tree.columnCount()):
+            tree.resizeColumnToContents(column)
+
+    def _group_label(self, name: str) -> str:
+        if self.ui.groupCombo.currentIndex() != 0:
+            return name
+        try:
+            return f"{Priority(int(name)).name} ({name})"
+        except ValueError:
+            return name
+
+    def _set_columns(self, item: QTreeWidgetItem, histogram: dict):
+        for column, key in enumerate(self.COLUMNS, start=1):
+            value = histogram[key]
+            item.setText(column, str(value) if key == "count" else f"{value:.1f}")
+
+    def handle_reset_clicked(self):
+        self._stats.reset()
+        self._expanded.clear()
+        self.refresh()
+        self._logger.info("Reset request statistics.")
+
+    def handle_save_clicked(self):
+        path = self._stats.dump("requests")
+        if path:
+            self._logger.info(f"Saved request statistics to '{path}'.")
+        else:
+            self._logger.error("Request statistics could not be saved.")
@@ -1,13 +1,27 @@
+from dataclasses import astuple
 import logging
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from PyQt6.QtCore import pyqtSignal, Qt, QItemSelection, pyqtSlot
-from PyQt6.QtWidgets import QWidget, QMessageBox, QLineEdit, QInputDialog
+from PyQt6.QtCore import pyqtSignal, Qt, QItemSelection, QThreadPool, pyqtSlot
+from PyQt6.QtWidgets import QWidget, QMessageBox, QLineEdit, QInputDialog, QFileDialog
 
 from app.scrape import RequestHandler
 from app.ui import Ui_ProfileMenu
-from app.models import ProfileList, DatabaseHandler, Profile
+from app.models import (
+    ProfileList,
+    DatabaseHandler,
+    Profile,
+    BundleExportWorker,
+    BundleImportWorker,
+    arrow_available,
+)
 from app.pages import DataView
+from app.pages.utils import open_path
+
+if TYPE_CHECKING:
+    from app.models.image_cache import ImageCache
+    from app.scrape.reparse import ProfileReparser
 
 
 class ProfileMenu(QWidget):
@@ -38,8 +52,15 @@ class ProfileMenu(QWidget):
         self.ui.listView.doubleClicked.connect(self.handle_open)
         self.ui.deleteBtn.clicked.connect(self.handle_delete)
         self.ui.renameBtn.clicked.connect(self.handle_rename)
+        self.ui.reparseBtn.clicked.connect(self.handle_reparse)
+        self.ui.recomputeBtn.clicked.connect(self.handle_recompute)
+        self.ui.importBtn.clicked.connect(self.handle_import)
+        self.ui.exportBtn.clicked.connect(self.handle_export)
 
         self._data_viewers: list[DataView] = []
+        self._reparser: "ProfileReparser" = None
+        self._export: BundleExportWorker | None = None
+        self._import: BundleImportWorker | None = None
 
     def showEvent(self, event):
         self._model.refresh_data()
@@ -99,15 +120,285 @@ class ProfileMenu(QWidget):
         self._model.refresh_data()
         self.ui.listView.clearSelection()
 
+    def _image_cache(self) -> "ImageCache":
+        # Imported here so PIL is not loaded at startup
+        from app.models import ImageCache
+
+        return ImageCache.for_dir(self._data_dir / DataView.IMAGE_CACHE_DIR)
+
+    def handle_export(self):
+        """Exports the selected profile to a bundle that can be imported into another database."""
+        selected = self.ui.listView.selectedIndexes().pop()
+        profile: Profile = selected.data(role=Qt.ItemDataRole.UserRole)
+
+        contents = [
+            "Events only",
+            "Events and case documents",
+            "Events, case documents, images and EDR files",
+        ]
+        choice, ok = QInputDialog.getItem(
+            self, "Export Profile", "Include in the bundle:", contents, 1, False
+        )
+        if not ok:
+            return
+        everything = choice == contents[2]
+
+        self._export = BundleExportWorker(
+            self._db_handler,
+            profile,
+            self._data_dir,
+            documents=choice != contents[0],
+            image_cache=self._image_cache() if everything else None,
+            edr=everything,
+        )
+        self._export.signals.progress.connect(self.handle_export_progress)
+        self._export.signals.finished.connect(self.handle_exported)
+        self._export.signals.exception.connect(self.handle_export_failed)
+        self.ui.exportBtn.setEnabled(False)
+        self.ui.exportBtn.setText("Exporting...")
+        QThreadPool.globalInstance().start(self._export)
+
+    @pyqtSlot(int, int)
+    def handle_export_progress(self, written: int, total: int):
+        self.ui.exportBtn.setText(f"Exporting {written}/{total}...")
+
+    def _export_done(self):
+        self._export = None
+        self.ui.exportBtn.setText("Export...")
+        self.handle_selection_changed(None, None)
+
+    @pyqtSlot(Exception)
+    def handle_export_failed(self, e: Exception):
+        self._export_done()
+        self._logger.error(f"Error exporting profile: {e}")
+        QMessageBox.critical(
+            self,
+            "Export Profile",
+            "Failed to export the profile. See log for details.",
+            QMessageBox.StandardButton.Ok,
+        )
+
+    @pyqtSlot(Path)
+    def handle_exported(self, path: Path):
+        self._export_done()
+        self._logger.info(f"Exported profile to {path}.")
+
+        box = QMessageBox()
+        box.setWindowTitle("Profile Exported")
+        box.setIcon(QMessageBox.Icon.Information)
+        box.setText("Profile exported to:")
+        box.setInformativeText(str(path))
+        box.setStandardButtons(
+            QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Open
+        )
+        box.setDefaultButton(QMessageBox.StandardButton.Ok)
+        if box.exec() == QMessageBox.StandardButton.Open and not open_path(path.parent):
+            QMessageBox.critical(
+                self,
+                "Error",
+                "Failed to open directory. See log for details.",
+                QMessageBox.StandardButton.Ok,
+            )
+
+    def handle_import(self):
+        """Imports a profile from a bundle, or from a Parquet or Feather file saved from a
+        data table. Bundles are imported in the background."""
+        file_filter = "Profile bundles (*.tar.gz)"
+        # Parquet and Feather files need pyarrow
+        if arrow_available():
+            file_filter += ";;Data table exports (*.parquet *.feather)"
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Profile", str(self._data_dir), file_filter
+        )
+        if not path:
+            return
+        path = Path(path)
+
+        if path.name.lower().endswith(".tar.gz"):
+            self._import = BundleImportWorker(
+                self._db_handler, path, self._data_dir, self._image_cache()
+            )
+            self._import.signals.progress.connect(self.handle_import_progress)
+            self._import.signals.finished.connect(self.handle_imported)
+            self._import.signals.exception.connect(self.handle_import_failed)
+            self.ui.importBtn.setEnabled(False)
+            self.ui.importBtn.setText("Importing...")
+            QThreadPool.globalInstance().start(self._import)
+            return
+
+        imported = -1
+        try:
+            # Imported here so pyarrow is only loaded when it is used
+            from app.models import read_event_file
+
+            profile, batches = read_event_file(path)
+            imported = self._db_handler.import_profile(profile, batches)
+        except (ValueError, OSError) as e:
+            self._logger.error(f"Profile import failed: {e}")
+
+        if imported < 0:
+            self._show_import_failed()
+        self._model.refresh_data()
+
+    def _show_import_failed(self):
+        QMessageBox.critical(
+            self,
+            "Import Profile",
+            "Failed to import the profile. See log for details.",
+            QMessageBox.StandardButton.Ok,
+        )
+
+    @pyqtSlot(int, int)
+    def handle_import_progress(self, read: int, total: int):
+        self.ui.importBtn.setText(f"Importing {100 * read // max(total, 1)}%...")
+
+    def _import_done(self):
+        self._import = None
+        self.ui.importBtn.setText("Import...")
+        self.ui.importBtn.setEnabled(True)
+        # Events updated by the import are reloaded from the database
+        self._db_handler.expire_all()
+        self._model.refresh_data()
+
+    @pyqtSlot(dict)
+    def handle_imported(self, counts: dict):
+        path = self._import.path
+        self._import_done()
+        self._logger.info(
+            f"Imported {counts['events']} events, {counts['documents']} case documents, "
+            f"{counts['images']} images and {counts['edr']} EDR files from {path}."
+        )
+
+    @pyqtSlot(Exception)
+    def handle_import_failed(self, e: Exception):
+        self._import_done()
+        self._logger.error(f"Profile import failed: {e}")
+        self._show_import_failed()
+
+    def handle_reparse(self):
+        """Rebuilds the events of the selected profile from its stored case documents."""
+        # Imported here so the scrapers are not loaded at startup
+        from app.scrape import ProfileReparser
+
+        selected = self.ui.listView.selectedIndexes().pop()
+        profile: Profile = selected.data(role=Qt.ItemDataRole.UserRole)
+
+        self._reparser = ProfileReparser(self._db_handler, profile)
+        self._reparser.progress.connect(self.handle_reparse_progress)
+        self._reparser.finished.connect(self.handle_reparse_finished)
+        if not self._reparser.start():
+            self._reparser = None
+            QMessageBox.warning(
+                self,
+                "Reparse Profile",
+                "The profile could not be reparsed. See the logs for details.",
+            )
+            return
+        self.ui.reparseBtn.setEnabled(False)
+        self.ui.reparseBtn.setText("Reparsing...")
+
+    @pyqtSlot(int, int)
+    def handle_reparse_progress(self, done: int, total: int):
+        self.ui.reparseBtn.setText(f"Reparsing {done}/{total}...")
+
+    @pyqtSlot(object)
+    def handle_reparse_finished(self, diff: dict | None):
+        self._reparser = None
+        self.ui.reparseBtn.setText("Reparse")
+        self.handle_selection_changed(None, None)
+        if diff is None:
+            QMessageBox.warning(
+                self,
+                "Reparse Profile",
+                "The profile could not be reparsed. See the logs for details.",
+            )
+            return
+
+        dialog = QMessageBox(
+            QMessageBox.Icon.Information,
+            "Reparse Profile",
+            f"Reparsed {diff['parsed']} cases: {len(diff['added'])} events added, "
+            f"{len(diff['removed'])} removed and {len(diff['changed'])} changed.\n"
+            f"{diff['failed']} cases failed to parse and {diff['missing']} have no stored "
+            "document, so their events were kept.",
+            QMessageBox.StandardButton.Ok,
+        )
+        details = [
+            *(f"Added: Case {c} Vehicle {v} Event {e}" for c, v, e in diff["added"]),
+            *(f"Removed: Case {c} Vehicle {v} Event {e}" for c, v, e in diff["removed"]),
+            *(
+                f"Changed: Case {c} Vehicle {v} Event {e}: "
+                + ", ".join(f"{column} {old} -> {new}" for column, old, new in changes)
+                for (c, v, e), changes in diff["changed"].items()
+            ),
+        ]
+        if details:
+            dialog.setDetailedText("\n".join(details))
+        dialog.exec()
+
+    def handle_recompute(self):
+        """Recomputes the derived metrics of the selected profile's events from their stored
+        measurements, with restitution coefficients entered by the user."""
+        # Imported here so numpy is not loaded at startup
+        from app.models import MetricCoefficients
+
+        selected = self.ui.listView.selectedIndexes().pop()
+        profile: Profile = selected.data(role=Qt.ItemDataRole.UserRole)
+
+        text, ok = QInputDialog.getText(
+            self,
+            "Recompute Metrics",
+            "Coefficients of the restitution curve\n"
+            "e = scale * exp(c1 * vc + c2 * vc^2 + c3 * vc^3)\n"
+            "as scale, c1, c2, c3:",
+            QLineEdit.EchoMode.Normal,
+            ", ".join(str(value) for value in astuple(MetricCoefficients())),
+        )
+        if not ok:
+            return
+        try:
+            coefficients = MetricCoefficients(
+                *(float(value) for value in text.replace(",", " ").split())
+            )
+        except (TypeError, ValueError):
+            QMessageBox.warning(
+                self,
+                "Recompute Metrics",
+                "Enter four numbers: scale, c1, c2 and c3.",
+            )
+            return
+
+        updated = self._db_handler.recompute_metrics(profile, coefficients)
+        if updated < 0:
+            QMessageBox.warning(
+                self,
+                "Recompute Metrics",
+                "The metrics could not be recomputed. See the logs for details.",
+            )
+            return
+        QMessageBox.information(
+            self,
+            "Recompute Metrics",
+            f"Recomputed the metrics of {updated} event{'s'[:updated^1]}. Events with "
+            "missing measurements were left unchanged.",
+        )
+
     def handle_selection_changed(self, selected: QItemSelection, deselected):
         self.ui.openBtn.setEnabled(False)
         self.ui.deleteBtn.setEnabled(False)
         self.ui.renameBtn.setEnabled(False)
+        self.ui.reparseBtn.setEnabled(False)
+        self.ui.recomputeBtn.setEnabled(False)
+        self.ui.exportBtn.setEnabled(False)
         if self.ui.listView.selectedIndexes():
             self.ui.openBtn.setEnabled(True)
             self.ui.deleteBtn.setEnabled(True)
             if len(self.ui.listView.selectedIndexes()) == 1:
                 self.ui.renameBtn.setEnabled(True)
+                # Only one profile is reparsed at a time
+                self.ui.reparseBtn.setEnabled(self._reparser is None)
+                self.ui.recomputeBtn.setEnabled(self._reparser is None)
+                self.ui.exportBtn.setEnabled(self._export is None)
 
     def keyPressEvent(self, event) -> None:
         if event.key() == Qt.Key.Key_Delete or event.key() == Qt.Key.Key_Backspace:
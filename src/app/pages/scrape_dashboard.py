@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+import time
+
+from PyQt6.QtCore import QTimer, pyqtSlot
+from PyQt6.QtWidgets import QTableWidgetItem, QWidget
+
+from app.scrape import BaseScraper, Priority, RequestHandler
+from app.ui import Ui_ScrapeDashboard
+
+
+@dataclass
+class _ScrapeCounters:
+    """The latest counters emitted by a scraper."""
+
+    name: str
+    start_time: float
+    pages_requested: int = 0
+    pages_fetched: int = 0
+    cases_found: int = 0
+    success_cases: int = 0
+    failed_cases: int = 0
+    events: int = 0
+    finished: bool = False
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
+
+
+class ScrapeDashboard(QWidget):
+    """Live progress of the scrapes of a session.
+
+    Scrapers emit their counters on every response, which are only stored here; the table is
+    refreshed on a timer while the window is visible, together with the queue sizes and
+    request timings of each scrape read from the request handler.
+    """
+
+    REFRESH_INTERVAL = 1000  # ms
+
+    def __init__(self, req_handler: RequestHandler):
+        super().__init__()
+
+        self.ui = Ui_ScrapeDashboard()
+        self.ui.setupUi(self)
+
+        self._req_handler = req_handler
+        # key: scrape ID, value: counters of the scrape. Kept in the order scrapes started.
+        self._scrapes: dict[str, _ScrapeCounters] = {}
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+    def add_scrape(self, scraper: BaseScraper, name: str):
+        """Track the progress of a scraper. Must be called before the scraper starts.
+
+        Args:
+            scraper (BaseScraper): The scraper.
+            name (str): Name of the scrape shown in the table.
+        """
+        self._scrapes[scraper.scrape_id] = _ScrapeCounters(name, time.perf_counter())
+        scraper.progress.connect(self.handle_progress)
+        scraper.pages_progress.connect(self.handle_pages_progress)
+        scraper.completed.connect(self.handle_completed)
+
+    def showEvent(self, a0):
+        self.refresh()
+        self._timer.start()
+        return super().showEvent(a0)
+
+    def hideEvent(self, a0):
+        self._timer.stop()
+        return super().hideEvent(a0)
+
+    def _sender_counters(self) -> _ScrapeCounters | None:
+        return self._scrapes.get(getattr(self.sender(), "scrape_id", None))
+
+    @pyqtSlot(int, int, int)
+    def handle_progress(self, success_cases: int, failed_cases: int, events: int):
+        counters = self._sender_counters()
+        if counters:
+            counters.success_cases = success_cases
+            counters.failed_cases = failed_cases
+            counters.events = events
+
+    @pyqtSlot(int, int, int)
+    def handle_pages_progress(self, requested: int, fetched: int, cases_found: int):
+        counters = self._sender_counters()
+        if counters:
+            counters.pages_requested = requested
+            counters.pages_fetched = fetched
+            counters.cases_found = cases_found
+
+    @pyqtSlot()
+    def handle_completed(self):
+        counters = self._sender_counters()
+        if counters:
+            counters.finished = True
+            if self.isVisible():
+                self.refresh()
+
+    @pyqtSlot()
+    def refresh(self):
+        table = self.ui.scrapesTable
+        table.setRowCount(len(self._scrapes))
+        running = 0
+        for row, (scrape_id, counters) in enumerate(self._scrapes.items()):
+            if counters.finished:
+                queued = ongoing = 0
+                rate = latency = 0.0
+                eta = "Done"
+            else:
+                running += 1
+                queued, ongoing = self._req_handler.request_counts(scrape_id)
+                snapshot = self._req_handler.stats.snapshot(scrape_id)
+                rate = snapshot["throughput"]["requests_per_s"]
+                cases = snapshot["by_priority"].get(str(Priority.CASE.value), {})
+                latency = cases.get("intervals", {}).get("total", {}).get("mean_ms", 0.0)
+                eta = _format_duration((queued + ongoing) / rate) if rate > 0 else "--"
+
+            values = (
+                counters.name,
+                f"{counters.pages_fetched} / {counters.pages_requested}",
+                counters.cases_found,
+                queued,
+                ongoing,
+                counters.success_cases,
+                counters.failed_cases,
+                counters.events,
+                f"{rate:.2f}",
+                f"{latency:.0f}",
+                eta,
+            )
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+        table.resizeColumnsToContents()
+
+        elapsed = [
+            time.perf_counter() - counters.start_time
+            for counters in self._scrapes.values()
+            if not counters.finished
+        ]
+        total_rate = self._req_handler.stats.throughput()[0]
+        self.ui.summaryLabel.setText(
+            f"{running} running | {total_rate:.2f} requests/s overall"
+            + (f" | Longest running: {_format_duration(max(elapsed))}" if elapsed else "")
+        )
@@ -1,16 +1,24 @@
 from dataclasses import dataclass
 import json
 import logging
+import textwrap
 from datetime import datetime
 from pathlib import Path
 from bs4 import BeautifulSoup
 from requests import Response
 
-from PyQt6.QtCore import pyqtSignal, pyqtSlot, QThread
-from PyQt6.QtWidgets import QWidget, QMessageBox, QComboBox, QRadioButton, QSpinBox
+from PyQt6.QtCore import pyqtSignal, pyqtSlot, QThread, QMetaObject, Qt
+from PyQt6.QtWidgets import (
+    QWidget,
+    QMessageBox,
+    QComboBox,
+    QRadioButton,
+    QSpinBox,
+    QFileDialog,
+)
 
 from app.models import DatabaseHandler, Profile, Event
-from app.pages import DataView
+from app.pages import DataView, ScrapeDashboard
 from app.scrape import (
     RequestHandler,
     BaseScraper,
@@ -18,6 +26,16 @@ from app.scrape import (
     ScraperCISS,
     RequestQueueItem,
     Priority,
+    CaseLedger,
+    ScrapeProfiler,
+    ScrapeJob,
+    ScrapeJobQueue,
+    load_jobs,
+    match_option,
+    models_query,
+    resolve_cached_job,
+    scraper_kwargs,
+    SEARCH_OPTIONS_KEY,
 )
 from app.ui import Ui_ScrapeMenu
 
@@ -25,6 +43,7 @@ from app.ui import Ui_ScrapeMenu
 @dataclass
 class _SearchModel:
     scraper: BaseScraper  # The scraper to use
+    scraper_type: str  # The scraper type stored on events, used as the options cache key
     html_options_name: str  # The name of the HTML tag containing the dropdown options
     html_options_id: str  # The ID of the HTML tag containing the dropdown options
     make_combo: QComboBox  # The make dropdown
@@ -38,9 +57,22 @@ class _SearchModel:
     radio_button: QRadioButton  # The radio button to enable the scraper
 
 
+@dataclass
+class _RunningScrape:
+    scraper: BaseScraper
+    thread: QThread  # The thread the scraper runs in
+    profile: Profile  # The profile events are added to
+    queued: bool  # Whether the scrape is a job of the job queue
+    progress: tuple[int, int, int] = (0, 0, 0)  # Successful cases, failed cases, events
+    profiler: ScrapeProfiler | None = None  # Profiler of the scrape, if it is profiled
+
+
 class ScrapeMenu(QWidget):
     back = pyqtSignal()
     end_scrape = pyqtSignal()
+    SEARCH_CACHE_TTL = 7 * 24 * 60 * 60  # Refresh cached search options after a week
+    SESSION_LEDGER_CAPACITY = 5000  # Case documents kept for reuse by later scrapes
+    PROFILING_DIR = "profiling"  # Folder of the data directory profiling reports are saved to
 
     def __init__(
         self,
@@ -57,20 +89,42 @@ class ScrapeMenu(QWidget):
         self._data_dir = data_dir
 
         self._profile: Profile = None
-        self._scraper: BaseScraper = None
-        self._engine_thread: QThread = None
+        # key: scrape ID, value: running scrape. The request handler shares requests fairly
+        # between scrapers running at the same time.
+        self._scrapes: dict[str, _RunningScrape] = {}
+        self._job_queue = ScrapeJobQueue()
+        self._profile_scrapes = False
+        self._trace_memory = False
+
+        # Case documents fetched this session, reused by later scrapes instead of requesting
+        # the cases again. Every document of the current profile is kept, so multi-analysis
+        # scrapes never refetch cases an earlier scrape of the profile already fetched.
+        # Documents stored in the database by earlier sessions are loaded on first use.
         self._db_handler = db_handler
+        self._session_ledger = CaseLedger(
+            capacity=self.SESSION_LEDGER_CAPACITY,
+            loader=lambda database, case_id: self._db_handler.get_case_document_row(
+                database, int(case_id)
+            ),
+        )
+        self._profile_ledger = CaseLedger(fallback=self._session_ledger)
 
         self._req_handler = req_handler
         self._req_handler.response_received.connect(self.handle_response)
+        self._dashboard = ScrapeDashboard(req_handler)
 
         self.ui.backBtn.clicked.connect(self.back.emit)
         self.ui.submitBtn.clicked.connect(self.handle_submit)
-        self.ui.stopBtn.clicked.connect(self.end_scrape.emit)
+        self.ui.stopBtn.clicked.connect(self.handle_stop)
+        self.ui.progressBtn.clicked.connect(self._dashboard.show)
         self.ui.stopBtn.setVisible(False)
+        self.ui.queueBtn.clicked.connect(self.handle_add_to_queue)
+        self.ui.loadJobsBtn.clicked.connect(self.handle_load_jobs)
+        self.ui.runQueueBtn.clicked.connect(self.handle_run_queue)
 
         nass_model = _SearchModel(
             scraper=ScraperNASS,
+            scraper_type="NASS",
             html_options_name="table",
             html_options_id="searchTable",
             make_combo=self.ui.makeCombo,
@@ -86,6 +140,7 @@ class ScrapeMenu(QWidget):
 
         ciss_model = _SearchModel(
             scraper=ScraperCISS,
+            scraper_type="CISS",
             html_options_name="div",
             html_options_id="panel-options",
             make_combo=self.ui.makeCombo_2,
@@ -107,27 +162,52 @@ class ScrapeMenu(QWidget):
 
         self._data_viewer = None
 
-        self.fetch_search()
+        # The search pages are fetched when the menu is first shown rather than on construction
+        self._search_fetched = False
+
+    def showEvent(self, event):
+        if not self._search_fetched:
+            self._search_fetched = True
+            self.fetch_search()
+        return super().showEvent(event)
 
     def fetch_search(self):
-        """Fetches the NASS and CISS search filter sites to retrieve dropdown options."""
+        """Populates the NASS and CISS search fields from the local cache, and fetches the
+        search filter sites to retrieve dropdown options if the cache is missing or stale."""
         for nhtsa_model in self._nhtsa_models:
+            cached = self._db_handler.get_cached_options(
+                nhtsa_model.scraper_type, SEARCH_OPTIONS_KEY
+            )
+            if cached:
+                dropdown_data, fetched = cached
+                self._populate_dropdowns(nhtsa_model, dropdown_data)
+                if not self._is_stale(fetched):
+                    continue
+
+            # Refresh stale options in the background, but fetch missing ones right away
             self._req_handler.enqueue_request(
                 RequestQueueItem(
-                    BaseScraper.ROOT + nhtsa_model.scraper.search_url,
-                    priority=Priority.IMMEDIATE.value,
+                    nhtsa_model.scraper.endpoint_url(
+                        "search", nhtsa_model.scraper.search_url
+                    ),
+                    priority=(
+                        Priority.CASE_LIST.value if cached else Priority.IMMEDIATE.value
+                    ),
                     callback=self._update_dropdowns,
                     extra_data={"search_model": nhtsa_model},
                 )
             )
 
+    def _is_stale(self, fetched: float) -> bool:
+        return datetime.now().timestamp() - fetched > self.SEARCH_CACHE_TTL
+
     @pyqtSlot(RequestQueueItem, Response)
     def handle_response(self, request: RequestQueueItem, response: Response):
         if request.callback.__self__ == self:
             request.callback(request, response)
 
     def _update_dropdowns(self, request: RequestQueueItem, response: Response):
-        """Parses the response from a search site and populates the search fields."""
+        """Parses the response from a search site, caches the options and populates the search fields."""
         nhtsa_model: _SearchModel = request.extra_data["search_model"]
 
         # Parse response
@@ -145,53 +225,64 @@ class ScrapeMenu(QWidget):
                 (option.text, option.get("value")) for option in options
             ]
 
-        # Populate dropdowns
-        nhtsa_model.make_combo.clear()
-        for data in dropdown_data[nhtsa_model.scraper.field_names.make]:
-            nhtsa_model.make_combo.addItem(*data)
-
-        self.fetch_models(nhtsa_model)
-
-        nhtsa_model.start_year_combo.clear()
-        for data in dropdown_data[nhtsa_model.scraper.field_names.start_model_year]:
-            nhtsa_model.start_year_combo.addItem(*data)
-
-        nhtsa_model.end_year_combo.clear()
-        for data in dropdown_data[nhtsa_model.scraper.field_names.end_model_year]:
-            nhtsa_model.end_year_combo.addItem(*data)
+        self._db_handler.set_cached_options(
+            nhtsa_model.scraper_type, SEARCH_OPTIONS_KEY, dropdown_data
+        )
+        self._populate_dropdowns(nhtsa_model, dropdown_data)
 
-        nhtsa_model.p_dmg_combo.clear()
-        for data in dropdown_data[nhtsa_model.scraper.field_names.primary_damage]:
-            nhtsa_model.p_dmg_combo.addItem(*data)
+    def _populate_dropdowns(self, nhtsa_model: _SearchModel, dropdown_data: dict):
+        """Populates the search fields, keeping the current selections where they still exist."""
+        field_names = nhtsa_model.scraper.field_names
+        make_changed = _fill_combo(
+            nhtsa_model.make_combo, dropdown_data[field_names.make]
+        )
+        if make_changed or nhtsa_model.model_combo.count() == 0:
+            self.fetch_models(nhtsa_model)
 
-        nhtsa_model.s_dmg_combo.clear()
-        for data in dropdown_data[nhtsa_model.scraper.field_names.secondary_damage]:
-            nhtsa_model.s_dmg_combo.addItem(*data)
+        _fill_combo(
+            nhtsa_model.start_year_combo, dropdown_data[field_names.start_model_year]
+        )
+        _fill_combo(
+            nhtsa_model.end_year_combo, dropdown_data[field_names.end_model_year]
+        )
+        _fill_combo(nhtsa_model.p_dmg_combo, dropdown_data[field_names.primary_damage])
+        _fill_combo(
+            nhtsa_model.s_dmg_combo, dropdown_data[field_names.secondary_damage]
+        )
 
         self._logger.info(f"{nhtsa_model.scraper.__name__} search fields populated.")
         nhtsa_model.radio_button.setEnabled(True)
 
     def fetch_models(self, search_model: _SearchModel):
-        """Fetches the models for the given make and calls update_model_dropdown once there is a response."""
-        extra_data = {"search_model": search_model}
-
-        params = (
-            {"make": search_model.make_combo.currentText()}
-            if search_model.scraper == ScraperNASS
-            else {"makeIds": search_model.make_combo.currentData()}
+        """Populates the model dropdown for the selected make from the local cache, and fetches
+        the models (calling update_model_dropdown once there is a response) if the cache is
+        missing or stale."""
+        cache_key, params = self._models_query(search_model)
+        cached = self._db_handler.get_cached_options(
+            search_model.scraper_type, cache_key
         )
+        if cached:
+            models, fetched = cached
+            self._populate_model_dropdown(search_model, models)
+            if not self._is_stale(fetched):
+                return
+
         self._req_handler.enqueue_request(
             RequestQueueItem(
-                BaseScraper.ROOT + search_model.scraper.models_url,
+                search_model.scraper.endpoint_url(
+                    "models", search_model.scraper.models_url
+                ),
                 params=params,
-                priority=Priority.IMMEDIATE.value,
-                extra_data=extra_data,
+                priority=(
+                    Priority.CASE_LIST.value if cached else Priority.IMMEDIATE.value
+                ),
+                extra_data={"search_model": search_model, "cache_key": cache_key},
                 callback=self.update_model_dropdown,
             )
         )
 
     def update_model_dropdown(self, request: RequestQueueItem, response: Response):
-        """Populates the model dropdown with models from the response."""
+        """Caches the models from the response and populates the model dropdown with them."""
 
         # Parse response
         model_dcts = json.loads(response.content)
@@ -201,59 +292,257 @@ class ScrapeMenu(QWidget):
         models.sort()
 
         search_model: _SearchModel = request.extra_data["search_model"]
+        cache_key = request.extra_data["cache_key"]
+        self._db_handler.set_cached_options(search_model.scraper_type, cache_key, models)
+
+        # Only populate the dropdown if the make has not changed since the request was made
+        if self._models_query(search_model)[0] == cache_key:
+            self._populate_model_dropdown(search_model, models)
+
+    def _models_query(
+        self, search_model: _SearchModel, make: tuple = None
+    ) -> tuple[str, dict]:
+        """Get the cache key and request parameters for the models of a make.
+
+        Args:
+            search_model (_SearchModel): Search model of the database.
+            make (tuple, optional): Text and data of the make option. Defaults to the selected make.
+        """
+        if make is None:
+            make = (
+                search_model.make_combo.currentText(),
+                search_model.make_combo.currentData(),
+            )
+        return models_query(search_model.scraper_type, make)
 
-        # Populate model dropdown
-        search_model.model_combo.clear()
-        search_model.model_combo.addItem("All", -1)
-        for model in models:
-            search_model.model_combo.addItem(*model)
+    def _populate_model_dropdown(self, search_model: _SearchModel, models: list):
+        _fill_combo(search_model.model_combo, [("All", -1), *models])
         self._logger.info(f"Updated {search_model.scraper.__name__} model dropdown.")
 
+    def _selected_model(self) -> _SearchModel | None:
+        """Get the search model of the database selected with the radio buttons."""
+        return next(
+            (model for model in self._nhtsa_models if model.radio_button.isChecked()),
+            None,
+        )
+
+    def _search_model(self, database: str) -> _SearchModel | None:
+        return next(
+            (model for model in self._nhtsa_models if model.scraper_type == database),
+            None,
+        )
+
+    def _database_running(self, database: str) -> bool:
+        return any(
+            scrape.scraper.database == database for scrape in self._scrapes.values()
+        )
+
     def set_submit_btn(self):
-        """Enables the submit button if at least one database is selected, but not if a scraper is already running."""
+        """Enables the submit button if a database is selected, but not if a scraper is already running for it."""
+        nhtsa_model = self._selected_model()
         self.ui.submitBtn.setEnabled(
-            any(button.isChecked() for button in self.ui.databaseBtnGroup.buttons())
+            nhtsa_model is not None
+            and not self._database_running(nhtsa_model.scraper_type)
+        )
+        self.ui.queueBtn.setEnabled(nhtsa_model is not None)
+        self._update_queue_btn()
+
+    def _update_queue_btn(self):
+        pending = len(self._job_queue.pending)
+        self.ui.runQueueBtn.setText(f"Run Queue ({pending})" if pending else "Run Queue")
+        self.ui.runQueueBtn.setEnabled(pending > 0 and not self._job_queue.running)
+
+    def _job_from_form(self, nhtsa_model: _SearchModel) -> ScrapeJob:
+        """Get a scrape job with the parameters selected in the search fields of a database."""
+        return ScrapeJob(
+            database=nhtsa_model.scraper_type,
+            make=nhtsa_model.make_combo.currentText(),
+            model=nhtsa_model.model_combo.currentText(),
+            start_year=nhtsa_model.start_year_combo.currentText(),
+            end_year=nhtsa_model.end_year_combo.currentText(),
+            primary_damage=nhtsa_model.p_dmg_combo.currentText(),
+            secondary_damage=nhtsa_model.s_dmg_combo.currentText(),
+            min_dv=nhtsa_model.min_dv_spinbox.value(),
+            max_dv=nhtsa_model.max_dv_spinbox.value(),
         )
 
+    def _resolve_job(self, nhtsa_model: _SearchModel, job: ScrapeJob) -> dict | None:
+        """Match the parameters of a job to the cached options of the search fields.
+
+        Returns:
+            dict | None: The text and data of the option matched for each dropdown parameter,
+                keyed by scraper argument, or None if a parameter matches no option.
+        """
+        try:
+            return resolve_cached_job(job, nhtsa_model.scraper.field_names, self._db_handler)
+        except ValueError as e:
+            self._logger.error(f"Scrape job skipped: {e}")
+            return None
+
+    def _fetch_job_models(self, jobs: list[ScrapeJob]):
+        """Fetch the model lists needed to resolve jobs that are not in the options cache yet."""
+        requested = set()
+        for job in jobs:
+            nhtsa_model = self._search_model(job.database)
+            if job.model is None or not nhtsa_model:
+                continue
+            cached = self._db_handler.get_cached_options(job.database, SEARCH_OPTIONS_KEY)
+            if not cached:
+                continue
+            make = match_option(
+                cached[0].get(nhtsa_model.scraper.field_names.make, []), job.make
+            )
+            if make is None:
+                continue
+            cache_key, params = self._models_query(nhtsa_model, make)
+            if (job.database, cache_key) in requested or self._db_handler.get_cached_options(
+                job.database, cache_key
+            ):
+                continue
+            requested.add((job.database, cache_key))
+            self._req_handler.enqueue_request(
+                RequestQueueItem(
+                    nhtsa_model.scraper.endpoint_url(
+                        "models", nhtsa_model.scraper.models_url
+                    ),
+                    params=params,
+                    priority=Priority.IMMEDIATE.value,
+                    extra_data={"search_model": nhtsa_model, "cache_key": cache_key},
+                    callback=self.update_model_dropdown,
+                )
+            )
+
     def handle_submit(self):
-        """Starts the scrape engine with the given parameters."""
-        self.ui.submitBtn.setVisible(False)
-        self.ui.stopBtn.setVisible(True)
+        """Starts a scraper for the selected database with the given parameters."""
+        # Get the active database based on the radio button
+        nhtsa_model = self._selected_model()
+
+        if not nhtsa_model:
+            self._logger.error("Scrape aborted: No database was selected.")
+            return
 
-        if self._scraper and self._scraper.running:
+        if self._database_running(nhtsa_model.scraper_type):
             self._logger.warning(
-                "Scrape engine is already running. Ignoring submission."
+                f"{nhtsa_model.scraper_type} scrape is already running. Ignoring submission."
             )
             return
 
-        # Get the active database based on the radio button
-        nhtsa_model = next(
-            (model for model in self._nhtsa_models if model.radio_button.isChecked()),
-            None,
-        )
+        self._start_job(self._job_from_form(nhtsa_model), queued=False)
 
+    def handle_add_to_queue(self):
+        nhtsa_model = self._selected_model()
         if not nhtsa_model:
-            self._logger.error("Scrape aborted: No database was selected.")
             return
 
-        make = nhtsa_model.make_combo.currentText().upper()
-        model = nhtsa_model.model_combo.currentText().upper()
-        start_year = nhtsa_model.start_year_combo.currentText().upper()
-        end_year = nhtsa_model.end_year_combo.currentText().upper()
-        p_dmg = nhtsa_model.p_dmg_combo.currentText().upper()
-        s_dmg = nhtsa_model.s_dmg_combo.currentText().upper()
-        min_dv = nhtsa_model.min_dv_spinbox.value()
-        max_dv = nhtsa_model.max_dv_spinbox.value()
+        self._job_queue.add([self._job_from_form(nhtsa_model)])
+        self._logger.info(
+            f"Added {nhtsa_model.scraper_type} scrape job to the queue ({len(self._job_queue.pending)} pending)."
+        )
+        self._update_queue_btn()
+        self._update_status()
+
+    def handle_load_jobs(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Load Scrape Jobs",
+            str(self._data_dir),
+            "Scrape jobs (*.json *.csv);;All files (*)",
+        )
+        if not path:
+            return
+
+        try:
+            jobs = load_jobs(Path(path))
+        except (OSError, ValueError) as e:
+            self._logger.error(f"Failed to load scrape jobs from '{path}': {e}")
+            return
+
+        unknown = {job.database for job in jobs if not self._search_model(job.database)}
+        if unknown:
+            self._logger.error(
+                f"Failed to load scrape jobs from '{path}': Unknown database(s) {', '.join(sorted(unknown))}."
+            )
+            return
+
+        self._job_queue.add(jobs)
+        self._fetch_job_models(jobs)
+        self._logger.info(
+            f"Added {len(jobs)} scrape job{'s'[:len(jobs)^1]} from '{path}' to the queue."
+        )
+        self._update_queue_btn()
+        self._update_status()
+
+    def handle_run_queue(self):
+        if not self._job_queue.pending or self._job_queue.running:
+            return
+
+        self._job_queue.start(self.ui.interleaveCheckBox.isChecked())
+        self._logger.info(
+            f"Running {len(self._job_queue.pending)} queued scrape jobs"
+            f"{' interleaved' if self._job_queue.interleave else ' back to back'}."
+        )
+        self._start_queued_jobs()
+
+    def _start_queued_jobs(self):
+        """Start as many pending jobs as the job queue allows, and end the run once every job is done."""
+        while True:
+            running = sum(1 for scrape in self._scrapes.values() if scrape.queued)
+            ready = self._job_queue.take_ready(running)
+            if not ready:
+                break
+            for job in ready:
+                if not self._start_job(job, queued=True):
+                    self._job_queue.failed_jobs += 1
+
+        self._update_queue_btn()
+        self._update_status()
+        if running or not self._job_queue.running:
+            return
+
+        self._job_queue.running = False
+        self._update_queue_btn()
+        self._show_message(
+            "Job Queue Complete",
+            textwrap.dedent(
+                f"""\
+                Job queue complete.
+                Jobs finished: {self._job_queue.finished_jobs}
+                Jobs skipped: {self._job_queue.failed_jobs}
+                Cases reused without requesting: {self._job_queue.reused_cases}"""
+            ),
+        )
+
+    def _start_job(self, job: ScrapeJob, queued: bool) -> bool:
+        """Starts a scraper for a job.
+
+        Args:
+            job (ScrapeJob): Parameters of the scrape.
+            queued (bool): Whether the job is run by the job queue. Queued jobs share the case
+                ledger of the run.
+
+        Returns:
+            bool: True if the scraper was started.
+        """
+        nhtsa_model = self._search_model(job.database)
+        options = self._resolve_job(nhtsa_model, job)
+        if options is None:
+            return False
+
+        make = options["make"][0].upper()
+        model = options["model"][0].upper()
+        start_year = options["start_model_year"][0].upper()
+        end_year = options["end_model_year"][0].upper()
+        p_dmg = options["primary_damage"][0].upper()
         params = {
-            "database": self.ui.databaseBtnGroup.checkedButton().text(),
+            "database": job.database,
             "make": make,
             "model": model,
             "start_year": start_year,
             "end_year": end_year,
             "primary_damage": p_dmg,
-            "secondary_damage": s_dmg,
-            "min_dv": min_dv,
-            "max_dv": max_dv,
+            "secondary_damage": options["secondary_damage"][0].upper(),
+            "min_dv": job.min_dv,
+            "max_dv": job.max_dv,
         }
 
         make_txt = make if make != "ALL" else "ANY MAKE"
@@ -261,32 +550,82 @@ class ScrapeMenu(QWidget):
         p_dmg_txt = p_dmg if p_dmg != "ALL" else ""
         name = f"{make_txt} {model_txt} ({start_year}-{end_year}) {p_dmg_txt}"
 
-        now = datetime.now()
+        profile = self._profile_for_job(name, params, queued)
+        if profile is None:
+            self._logger.error("Scrape aborted: Profile not created successfully.")
+            return False
+
+        scraper = nhtsa_model.scraper(
+            req_handler=self._req_handler,
+            **scraper_kwargs(job, options),
+            case_ledger=(
+                self._profile_ledger
+                if profile is self._profile
+                else self._session_ledger
+            ),
+        )
 
-        # The only case in which we keep the old data viewer open is if we are
-        #   performing multi-analysis and the previously used profile exists
-        if not (
-            self.ui.multiCheckBox.isChecked()
-            and self._db_handler.profile_exists(self._profile)
-        ):
-            self._profile = Profile(
-                name=name,
-                params=json.dumps({"Scrape 1": params}, indent=4),
-                multi=False,
-                created=int(now.timestamp()),
-                modified=int(now.timestamp()),
+        # Set up and connect scrapers
+        thread = QThread()
+        scraper.moveToThread(thread)
+        scraper.event_parsed.connect(self.add_event)
+        scraper.progress.connect(self.handle_scrape_progress)
+        scraper.case_fetched.connect(self._db_handler.add_case_document)
+        self.end_scrape.connect(scraper.complete)
+        scraper.completed.connect(self.handle_scrape_complete)
+        self._dashboard.add_scrape(scraper, f"{scraper.database} {name}")
+        self._req_handler.set_queue_weight(scraper.scrape_id, job.weight)
+        self._scrapes[scraper.scrape_id] = _RunningScrape(
+            scraper, thread, profile, queued, profiler=self._start_profiler(scraper, profile)
+        )
+
+        thread.started.connect(scraper.start)
+        thread.start()
+
+        self.ui.stopBtn.setVisible(True)
+        self.set_submit_btn()
+        self._update_status()
+        return True
+
+    def _start_profiler(
+        self, scraper: BaseScraper, profile: Profile
+    ) -> ScrapeProfiler | None:
+        """Start profiling a scrape if profiling is enabled. Only one scrape is profiled at a
+        time, as the request handler's worker threads are shared by every running scrape."""
+        if not self._profile_scrapes:
+            return None
+        if self._req_handler.profiler is not None:
+            self._logger.warning(
+                f"Not profiling {scraper.scrape_id}, as another scrape is being profiled."
             )
-            result = self._db_handler.add_profile(self._profile)
+            return None
 
-            # Make sure the profile was successfully created
-            if result < 0:
-                self._logger.error("Scrape aborted: Profile not created successfully.")
-                return
+        profiler = ScrapeProfiler(
+            profile.dir_name(), self._data_dir / self.PROFILING_DIR, self._trace_memory
+        )
+        profiler.start()
+        scraper.profiler = profiler
+        self._req_handler.profiler = profiler
+        self._logger.info(f"Profiling {scraper.scrape_id}...")
+        return profiler
+
+    def _profile_for_job(self, name: str, params: dict, queued: bool) -> Profile | None:
+        """Get the profile to add the events of a scrape to.
+
+        When performing multi-analysis, the scrape is added to the current profile if it
+        still exists. Otherwise, a new profile is created. Data viewers are only opened for
+        new profiles of scrapes started from the search fields, so a queue run writing each
+        job to its own profile does not open a window per job.
+
+        Returns:
+            Profile | None: The profile, or None if it could not be created.
+        """
+        now = datetime.now()
+        multi = self.ui.multiCheckBox.isChecked()
 
-            self._new_data_viewer()
-        else:
-            # If multi-analysis and current profile exists, check if we need to open a new data viewer
-            #   Update the profile fields to indicate multi-analysis and add the new params
+        # If multi-analysis and current profile exists, check if we need to open a new data viewer
+        #   Update the profile fields to indicate multi-analysis and add the new params
+        if multi and self._db_handler.profile_exists(self._profile):
             if not self._data_viewer or self._dv_closed:
                 self._new_data_viewer()
 
@@ -298,28 +637,26 @@ class ScrapeMenu(QWidget):
                 multi=True,
                 params=json.dumps(new_params, indent=4),
             )
-
-        self._scraper = nhtsa_model.scraper(
-            req_handler=self._req_handler,
-            make=_get_combo_as_tuple(nhtsa_model.make_combo),
-            model=_get_combo_as_tuple(nhtsa_model.model_combo),
-            start_model_year=_get_combo_as_tuple(nhtsa_model.start_year_combo),
-            end_model_year=_get_combo_as_tuple(nhtsa_model.end_year_combo),
-            primary_damage=_get_combo_as_tuple(nhtsa_model.p_dmg_combo),
-            secondary_damage=_get_combo_as_tuple(nhtsa_model.s_dmg_combo),
-            min_dv=nhtsa_model.min_dv_spinbox.value(),
-            max_dv=nhtsa_model.max_dv_spinbox.value(),
+            return self._profile
+
+        profile = Profile(
+            name=name,
+            params=json.dumps({"Scrape 1": params}, indent=4),
+            multi=False,
+            created=int(now.timestamp()),
+            modified=int(now.timestamp()),
         )
+        result = self._db_handler.add_profile(profile)
 
-        # Set up and connect scrapers
-        self._engine_thread = QThread()
-        self._scraper.moveToThread(self._engine_thread)
-        self._scraper.event_parsed.connect(self.add_event)
-        self.end_scrape.connect(self._scraper.complete)
-        self._scraper.completed.connect(self.handle_scrape_complete)
+        # Make sure the profile was successfully created
+        if result < 0:
+            return None
 
-        self._engine_thread.started.connect(self._scraper.start)
-        self._engine_thread.start()
+        if multi or not queued:
+            self._profile = profile
+            self._profile_ledger = CaseLedger(fallback=self._session_ledger)
+            self._new_data_viewer()
+        return profile
 
     def _new_data_viewer(self):
         if self._db_handler.profile_exists(self._profile):
@@ -339,34 +676,110 @@ class ScrapeMenu(QWidget):
     def _set_dv_closed(self):
         self._dv_closed = True
 
+    def _sender_scrape(self) -> _RunningScrape | None:
+        """Get the running scrape of the scraper that emitted the current signal."""
+        scraper = self.sender()
+        return next(
+            (scrape for scrape in self._scrapes.values() if scrape.scraper is scraper),
+            None,
+        )
+
     @pyqtSlot(Event, Response)
     def add_event(self, event: Event, response: Response):
-        if not self._db_handler.profile_exists(self._profile):
-            if self._data_viewer and not self._dv_closed:
+        scrape = self._sender_scrape()
+        if not scrape:
+            return
+
+        if not self._db_handler.profile_exists(scrape.profile):
+            if (
+                scrape.profile is self._profile
+                and self._data_viewer
+                and not self._dv_closed
+            ):
                 self._data_viewer.close()
 
-            if self._scraper and self._scraper.running:
-                self.end_scrape.emit()
+            if scrape.scraper.running:
+                # Stop only this scraper. complete() must run in the scraper's thread.
+                QMetaObject.invokeMethod(
+                    scrape.scraper, "complete", Qt.ConnectionType.QueuedConnection
+                )
                 self._logger.error("Scrape aborted: Specified profile does not exist.")
             return
 
-        self._db_handler.add_event(event, self._profile)
-
+        self._db_handler.add_event(event, scrape.profile)
+
+    @pyqtSlot(int, int, int)
+    def handle_scrape_progress(self, success_cases: int, failed_cases: int, events: int):
+        scrape = self._sender_scrape()
+        if scrape:
+            scrape.progress = (success_cases, failed_cases, events)
+            self._update_status()
+
+    def _update_status(self):
+        """Show the progress of every running scrape and the job queue in the status label."""
+        status = [
+            f"{scrape.scraper.database}: {success + failed} cases ({failed} failed), {events} events"
+            for scrape in self._scrapes.values()
+            for success, failed, events in [scrape.progress]
+        ]
+        if self._job_queue.running or self._job_queue.pending:
+            status.append(f"Queue: {len(self._job_queue.pending)} pending")
+        self.ui.statusLabel.setText(" | ".join(status))
+
+    @pyqtSlot()
     def handle_scrape_complete(self):
-        self._scraper = None
-        self._engine_thread.quit()
-        self._engine_thread.wait()
+        scrape = self._sender_scrape()
+        if not scrape:
+            return
 
+        del self._scrapes[scrape.scraper.scrape_id]
+        self._req_handler.set_queue_weight(scrape.scraper.scrape_id, 1)
+        self.end_scrape.disconnect(scrape.scraper.complete)
+        scrape.thread.quit()
+        scrape.thread.wait()
+
+        if scrape.profiler is not None:
+            self._req_handler.profiler = None
+            paths = scrape.profiler.finish()
+            if paths:
+                self._logger.info(f"Saved profiling reports of the scrape to '{paths[0].parent}'.")
+
+        if not self._scrapes:
+            self.ui.stopBtn.setVisible(False)
+        self.set_submit_btn()
+        self._update_status()
+
+        # Queued jobs are summarized once the whole queue is done
+        if scrape.queued:
+            self._job_queue.finished_jobs += 1
+            self._job_queue.reused_cases += scrape.scraper.reused_cases
+            self._start_queued_jobs()
+            return
+
+        self._show_message(
+            "Scrape Complete", f"{scrape.scraper.database} scrape complete."
+        )
+
+    def _show_message(self, title: str, text: str):
         dialog = QMessageBox()
-        dialog.setText("Scrape complete.")
+        dialog.setText(text)
         dialog.setStandardButtons(QMessageBox.StandardButton.Ok)
         dialog.setDefaultButton(QMessageBox.StandardButton.Ok)
         dialog.setIcon(QMessageBox.Icon.Information)
-        dialog.setWindowTitle("Scrape Complete")
+        dialog.setWindowTitle(title)
         dialog.exec()
 
-        self.ui.stopBtn.setVisible(False)
-        self.ui.submitBtn.setVisible(True)
+    def handle_stop(self):
+        """Stops every running scrape and drops the jobs still waiting in the queue."""
+        self._job_queue.stop()
+        self.end_scrape.emit()
+
+    @pyqtSlot(bool, bool)
+    def set_profiling(self, profile_scrapes: bool, trace_memory: bool):
+        """Set whether scrapes started from now on are profiled, and whether memory is traced
+        while profiling."""
+        self._profile_scrapes = profile_scrapes
+        self._trace_memory = trace_memory
 
     @pyqtSlot(str)
     def data_dir_changed(self, data_dir: str):
@@ -376,18 +789,26 @@ class ScrapeMenu(QWidget):
             self._data_viewer.handle_data_dir_updated(data_dir)
 
     def cleanup(self):
-        if self._scraper and self._scraper.running:
+        self._job_queue.stop()
+        self._dashboard.close()
+        if self._scrapes:
             self._logger.warning("Scrape engine is still running. Aborting.")
             self.end_scrape.emit()
 
 
-def _get_combo_as_tuple(combo: QComboBox) -> tuple[str, int]:
-    """Packages combo box text and data into a tuple.
-
-    Args:
-        combo (QComboBox): The combo box to extract data from.
+def _fill_combo(combo: QComboBox, items: list) -> bool:
+    """Replace the items of a combo box, keeping the current selection if it still exists.
 
     Returns:
-        tuple[str, int]: The text and data from the combo box.
+        bool: True if the current item changed.
     """
-    return combo.currentText(), int(combo.currentData() or -1)
+    current = (combo.currentText(), combo.currentData())
+    combo.blockSignals(True)
+    combo.clear()
+    for text, value in items:
+        combo.addItem(text, value)
+    index = combo.findText(current[0])
+    if index >= 0:
+        combo.setCurrentIndex(index)
+    combo.blockSignals(False)
+    return (combo.currentText(), combo.currentData()) != current
@@ -7,7 +7,13 @@ from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QWidget, QFileDialog
 
 from app.pages.utils import open_path
-from app.scrape import RequestHandler
+from app.scrape import (
+    RequestHandler,
+    ENDPOINTS,
+    ENDPOINT_NAMES,
+    DEFAULT_BASE_URL,
+    normalize_base_url,
+)
 from app.ui import Ui_SettingsMenu
 
 
@@ -16,6 +22,10 @@ class SettingsMenu(QWidget):
     rate_limit_changed = pyqtSignal(float)
     timeout_changed = pyqtSignal(float)
     save_path_changed = pyqtSignal(str)
+    # profile scrapes, trace memory while profiling
+    profiling_changed = pyqtSignal(bool, bool)
+    # base URL, base URL of each overridden endpoint
+    endpoints_changed = pyqtSignal(str, dict)
     SETTINGS_SCHEMA = {
         "type": "object",
         "properties": {
@@ -42,6 +52,53 @@ class SettingsMenu(QWidget):
                 "default": str((Path(__file__).parent.parent / "data").resolve()),
                 "pattern": r"^(?:[a-zA-Z]:)?[\\/].*$",
             },
+            "logMaxBytes": {
+                "description": "Size in bytes at which the log file in the data save path is rotated.",
+                "type": "integer",
+                "default": 10 * 1024**2,
+                "minimum": 64 * 1024,
+            },
+            "logBackupCount": {
+                "description": "Number of rotated log files to keep.",
+                "type": "integer",
+                "default": 5,
+                "minimum": 0,
+            },
+            "logCompress": {
+                "description": "Compress rotated log files with gzip.",
+                "type": "boolean",
+                "default": True,
+            },
+            "logJsonLines": {
+                "description": "Write the log file as JSON lines instead of plain text.",
+                "type": "boolean",
+                "default": False,
+            },
+            "profileScrapes": {
+                "description": "Profile scrapes with cProfile, writing the reports to the 'profiling' folder of the data save path.",
+                "type": "boolean",
+                "default": False,
+            },
+            "baseUrl": {
+                "description": "URL crashviewer is requested from, e.g. a mirror or a caching proxy.",
+                "type": "string",
+                "default": DEFAULT_BASE_URL,
+                "pattern": r"^https?://[^/?#]+",
+            },
+            "endpointOverrides": {
+                "description": f"URLs of endpoints requested from somewhere other than the base URL, keyed by endpoint ({', '.join(ENDPOINT_NAMES)}), optionally prefixed with a database (e.g. 'NASS.image'). Only editable in the settings file.",
+                "type": "object",
+                "default": {},
+                "propertyNames": {
+                    "pattern": rf"^((NASS|CISS)\.)?({'|'.join(ENDPOINT_NAMES)})$"
+                },
+                "additionalProperties": {"type": "string", "pattern": r"^https?://[^/?#]+"},
+            },
+            "profileMemory": {
+                "description": "Also trace memory allocations with tracemalloc while profiling. Slows scrapes down considerably.",
+                "type": "boolean",
+                "default": False,
+            },
         },
     }
 
@@ -57,6 +114,7 @@ class SettingsMenu(QWidget):
 
         self.rate_limit_changed.connect(self._req_handler.update_rate_limit)
         self.timeout_changed.connect(self._req_handler.update_timeout)
+        self.endpoints_changed.connect(self._configure_endpoints)
 
         self.settings_path = (
             Path(__file__).parent.parent / "resources" / "settings.json"
@@ -115,6 +173,18 @@ class SettingsMenu(QWidget):
         # Update debug mode for the root logger
         self._set_logger_debug(self._settings["debug"])
 
+        # Set up profiling checkboxes
+        for checkbox, key in (
+            (self.ui.profileCheckbox, "profileScrapes"),
+            (self.ui.memoryCheckbox, "profileMemory"),
+        ):
+            checkbox.setToolTip(self.SETTINGS_SCHEMA["properties"][key]["description"])
+            checkbox.setChecked(self._settings[key])
+            checkbox.clicked.connect(
+                lambda checked, key=key: self._toggle_profiling(key, checked)
+            )
+        self.ui.memoryCheckbox.setEnabled(self._settings["profileScrapes"])
+
         # Set up min rate limit spinbox
         self.ui.rateLimitSpinBox.setToolTip(
             self.SETTINGS_SCHEMA["properties"]["rateLimit"]["description"]
@@ -130,9 +200,21 @@ class SettingsMenu(QWidget):
             lambda: self._update_timeout(self.ui.timeoutSpinBox.value())
         )
 
+        # Set up base URL line edit
+        self.ui.baseUrlEdit.setToolTip(
+            self.SETTINGS_SCHEMA["properties"]["baseUrl"]["description"]
+        )
+        self.ui.baseUrlEdit.setText(self._settings["baseUrl"])
+        self.ui.baseUrlEdit.editingFinished.connect(
+            lambda: self._update_base_url(self.ui.baseUrlEdit.text())
+        )
+
         # Update request handler with settings
         self.rate_limit_changed.emit(self._settings["rateLimit"])
         self.timeout_changed.emit(self._settings["timeout"])
+        self.endpoints_changed.emit(
+            self._settings["baseUrl"], self._settings["endpointOverrides"]
+        )
 
         # Set up data save path
         self.ui.filenameEdit.setToolTip(
@@ -192,6 +274,36 @@ class SettingsMenu(QWidget):
         self.settings_path.write_text(json.dumps(self._settings, indent=4))
         self.timeout_changed.emit(value)
 
+    def _update_base_url(self, value: str):
+        # An empty field restores the default
+        value = value.strip() or DEFAULT_BASE_URL
+        try:
+            value = normalize_base_url(value)
+        except ValueError as e:
+            self._logger.error(f"Invalid base URL: {e}")
+            self.ui.baseUrlEdit.setText(self._settings["baseUrl"])
+            return
+
+        self.ui.baseUrlEdit.setText(value)
+        if value == self._settings["baseUrl"]:
+            return
+
+        self._settings["baseUrl"] = value
+        self.settings_path.write_text(json.dumps(self._settings, indent=4))
+        self.endpoints_changed.emit(value, self._settings["endpointOverrides"])
+
+    def _configure_endpoints(self, base_url: str, overrides: dict):
+        try:
+            ENDPOINTS.configure(base_url, overrides)
+        except ValueError as e:
+            self._logger.error(f"Invalid endpoint settings, using the defaults: {e}")
+            ENDPOINTS.configure(DEFAULT_BASE_URL)
+            return
+
+        self._logger.info(f"Requesting crashviewer from {base_url}.")
+        for endpoint, url in sorted(overrides.items()):
+            self._logger.info(f"Requesting the '{endpoint}' endpoint from {url}.")
+
     def _set_logger_debug(self, debug_on: bool):
         root_logger = logging.getLogger()
         if debug_on:
@@ -205,6 +317,12 @@ class SettingsMenu(QWidget):
         self._settings["debug"] = checked
         self.settings_path.write_text(json.dumps(self._settings, indent=4))
 
+    def _toggle_profiling(self, key: str, checked: bool):
+        self._settings[key] = checked
+        self.settings_path.write_text(json.dumps(self._settings, indent=4))
+        self.ui.memoryCheckbox.setEnabled(self._settings["profileScrapes"])
+        self.profiling_changed.emit(*self.get_profiling_settings())
+
     def _browse_data_save_path(self):
         path = QFileDialog.getExistingDirectory(
             self, "Select Directory", self._settings["dataSavePath"]
@@ -220,5 +338,18 @@ class SettingsMenu(QWidget):
     def get_save_path(self):
         return Path(self._settings["dataSavePath"])
 
+    def get_log_settings(self):
+        """Get the keyword arguments for FileLogSink.start(), except for the log directory."""
+        return {
+            "max_bytes": self._settings["logMaxBytes"],
+            "backup_count": self._settings["logBackupCount"],
+            "compress": self._settings["logCompress"],
+            "json_lines": self._settings["logJsonLines"],
+        }
+
+    def get_profiling_settings(self) -> tuple[bool, bool]:
+        """Get whether scrapes are profiled, and whether memory is traced while profiling."""
+        return self._settings["profileScrapes"], self._settings["profileMemory"]
+
     def _open_save_path(self):
         open_path(self._settings["dataSavePath"])
@@ -1,5 +1,49 @@
+import importlib
+
 from .priority import Priority
-from .request_handler import RequestHandler, RequestQueueItem
-from .base_scraper import BaseScraper, FieldNames
-from .scraper_nass import ScraperNASS
-from .scraper_ciss import ScraperCISS
+from .request_handler import RequestHandler, RequestQueueItem, DownloadQueueItem
+from .request_stats import RequestStats, url_pattern, INTERVALS
+from .endpoints import (
+    EndpointRegistry,
+    ENDPOINTS,
+    ENDPOINT_NAMES,
+    DEFAULT_BASE_URL,
+    normalize_base_url,
+)
+from .case_ledger import CaseLedger
+from .profiler import ScrapeProfiler
+from .job_queue import (
+    ScrapeJob,
+    ScrapeJobQueue,
+    load_jobs,
+    match_option,
+    resolve_job,
+    resolve_cached_job,
+    scraper_kwargs,
+    models_query,
+    SEARCH_OPTIONS_KEY,
+)
+
+# The scrapers import bs4 and the fuzzy matching backends, so they are only imported on first use
+_LAZY_NAMES = {
+    "BaseScraper": ".base_scraper",
+    "FieldNames": ".base_scraper",
+    "CaseImage": ".base_scraper",
+    "FuzzyMatcher": ".fuzzy_matcher",
+    "ScraperNASS": ".scraper_nass",
+    "ScraperCISS": ".scraper_ciss",
+    "ImageBatchJob": ".image_batch_job",
+    "ProfileReparser": ".reparse",
+}
+
+
+def __getattr__(name):
+    if name == "SCRAPERS":
+        # key: scraper type stored on events, value: scraper class
+        value = {"NASS": __getattr__("ScraperNASS"), "CISS": __getattr__("ScraperCISS")}
+    elif name in _LAZY_NAMES:
+        value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
@@ -1,14 +1,22 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+import itertools
 import logging
 import textwrap
 from requests import Response
 
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
 
-from app.scrape import RequestHandler, RequestQueueItem, Priority
-from app.models import Event
+from app.scrape import (
+    RequestHandler,
+    RequestQueueItem,
+    Priority,
+    CaseLedger,
+    ScrapeProfiler,
+    ENDPOINTS,
+)
+from app.models import Event, CaseDocument, make_case_document
 
 
 @dataclass
@@ -25,6 +33,16 @@ class FieldNames:
     max_dv: str
 
 
+@dataclass
+class CaseImage:
+    """An image of a vehicle listed in a case document."""
+
+    img_id: int | str
+    img_set: str  # The image set (e.g. "Front") the image belongs to
+    url: str
+    headers: dict = field(default_factory=dict)
+
+
 class _Meta(type(ABC), type(QObject)):
     """Metaclass for BaseScraper."""
 
@@ -33,9 +51,24 @@ class BaseScraper(QObject, ABC, metaclass=_Meta):
     enqueue_request = pyqtSignal(RequestQueueItem)
     batch_enqueue = pyqtSignal(list)
     event_parsed = pyqtSignal(Event, Response)
+    # A case document fetched by the scraper, compressed for storage
+    case_fetched = pyqtSignal(CaseDocument)
+    # successful cases, failed cases, events extracted
+    progress = pyqtSignal(int, int, int)
+    # case list pages requested, case list pages fetched, cases found on them
+    pages_progress = pyqtSignal(int, int, int)
     started = pyqtSignal()
     completed = pyqtSignal()
-    ROOT = "https://crashviewer.nhtsa.dot.gov"
+    _scrape_ids = itertools.count(1)
+
+    # Maximum age (in seconds) of a stored case document that images can be found in.
+    # None if the image URLs found in a document do not expire.
+    image_document_max_age: int | None = None
+
+    @property
+    @abstractmethod
+    def database(self) -> str:
+        """The NHTSA database scraped (e.g. "NASS")."""
 
     @property
     @abstractmethod
@@ -72,31 +105,78 @@ class BaseScraper(QObject, ABC, metaclass=_Meta):
     def field_names(self) -> FieldNames:
         """Returns a dataclass of dropdown field names for each parameter of the scraper."""
 
+    @classmethod
+    def endpoint_url(cls, endpoint: str, path: str) -> str:
+        """Get the URL of a path of one of the scraper's endpoints, requested from the base URL
+        configured for it in the endpoint registry.
+
+        Args:
+            endpoint (str): Name of the endpoint (see ENDPOINT_NAMES, e.g. "case").
+            path (str): Path of the URL, e.g. the endpoint's formatted URL attribute.
+        """
+        return ENDPOINTS.url(cls.database, endpoint, path)
+
+    @classmethod
     @abstractmethod
-    def __init__(self, req_controller: RequestHandler):
+    def find_images(
+        cls, response: Response, case_id: int, vehicle_num: int, img_sets: list[str]
+    ) -> list[CaseImage]:
+        """Finds the images of a vehicle in a raw case document.
+
+        Args:
+            response (Response): Response containing the raw case document.
+            case_id (int): ID of the case.
+            vehicle_num (int): Vehicle to find images for.
+            img_sets (list[str]): Image sets to include (e.g. "Front", "Backleftoblique").
+
+        Returns:
+            list[CaseImage]: Images found for the vehicle in the given image sets.
+        """
+
+    @abstractmethod
+    def __init__(self, req_controller: RequestHandler, case_ledger: CaseLedger = None):
         """
         Initializes the BaseScraper. Do not make any signal/slot connections here,
         as this function will be run in the main thread. If you need to connect signals/slots,
         do so in the start() function.
+
+        If a case ledger is given, cases already in it are parsed from the stored documents
+        instead of being requested again, and fetched cases are added to it.
         """
         super().__init__()
 
         self._logger = logging.getLogger(__name__)
         self._req_handler = req_controller
+        self._case_ledger = case_ledger
+
+        # Unique ID stored in the extra data of every request made by the scraper, which the
+        # request handler uses to share requests fairly between scrapers running at the same time
+        self.scrape_id = f"{self.database}-{next(BaseScraper._scrape_ids)}"
 
         self.running = False
         self.start_time = datetime.now()
 
         self.current_page = 1
+        self.pages_requested = 0
+        self.pages_fetched = 0
+        self.cases_found = 0
         self.success_cases = 0
         self.failed_cases = 0
         self.total_events = 0
+        self.reused_cases = 0  # Cases parsed from the case ledger instead of being requested
 
         self._payload = {}
 
+        # Profiler to profile the scraper's thread with while it runs, if any
+        self.profiler: ScrapeProfiler | None = None
+
     def start(self):
+        if self.profiler is not None:
+            self.profiler.enable_thread()
+
         # Connections need to be made here instead of init to avoid running in the main thread
         self._req_handler.response_received.connect(self._handle_response)
+        self._req_handler.request_failed.connect(self._handle_failure)
         self.enqueue_request.connect(self._req_handler.enqueue_request)
         self.batch_enqueue.connect(self._req_handler.batch_enqueue)
 
@@ -109,18 +189,111 @@ class BaseScraper(QObject, ABC, metaclass=_Meta):
     def _scrape(self):
         """Starts the scraping process."""
 
-    @pyqtSlot(RequestQueueItem, Response)
+    def _extra_data(self, **data) -> dict:
+        """Get the extra data for a request made by this scraper."""
+        return {"database": self.database, "scrape": self.scrape_id, **data}
+
     @abstractmethod
+    def _parse_case(self, request: RequestQueueItem, response: Response):
+        """Parses a raw case document, emitting event_parsed for every matching event.
+        Must call _store_case() once the document is known to be valid."""
+
+    def _request_cases(self, case_ids: list):
+        """Request the raw documents of cases. Cases found in the case ledger are parsed
+        right away instead.
+
+        Args:
+            case_ids (list): IDs of the cases to request.
+        """
+        requests = []
+        reused = 0
+        self.cases_found += len(case_ids)
+        for case_id in case_ids:
+            request = RequestQueueItem(
+                self.endpoint_url("case", self.case_url_raw.format(case_id=case_id)),
+                priority=Priority.CASE.value,
+                callback=self._parse_case,
+                extra_data=self._extra_data(case_id=case_id),
+            )
+            response = (
+                self._case_ledger.get(self.database, case_id)
+                if self._case_ledger is not None
+                else None
+            )
+            if response is not None:
+                request.extra_data["reused"] = True
+                self._parse_case(request, response)
+                reused += 1
+            else:
+                requests.append(request)
+
+        if reused:
+            self.reused_cases += reused
+            self._logger.debug(f"Reused {reused} previously fetched case documents.")
+            self._emit_progress()
+        if requests:
+            self.batch_enqueue.emit(requests)
+
+    def _store_case(self, request: RequestQueueItem, response: Response):
+        """Compress a fetched case document, keep it in the case ledger for later scrapes to
+        reuse, and emit it to be stored in the database."""
+        if request.extra_data.get("reused") or not response.content:
+            return
+
+        document = make_case_document(
+            self.database, request.extra_data["case_id"], response
+        )
+        if self._case_ledger is not None:
+            self._case_ledger.add(document)
+        self.case_fetched.emit(document)
+
+    def _owns(self, request: RequestQueueItem) -> bool:
+        """Check if a request was made by this scraper instance."""
+        return getattr(request.callback, "__self__", None) is self
+
+    @pyqtSlot(RequestQueueItem, Response)
     def _handle_response(self, request: RequestQueueItem, response: Response):
-        """Handles the response from a request."""
+        """Passes responses to requests made by this scraper to their callbacks."""
+        if not self._owns(request):
+            return
+        request.callback(request, response)
+        self._req_handler.stats.record_callback(request)
+        self._emit_progress()
+
+    @pyqtSlot(RequestQueueItem)
+    def _handle_failure(self, request: RequestQueueItem):
+        """Counts failed case requests, and ends the scrape if a case list request fails,
+        as no further pages can be requested."""
+        if not self.running or not self._owns(request):
+            return
 
+        if request.priority == Priority.CASE_LIST.value:
+            self._logger.error(
+                f"Failed to get case list page {self.current_page}. Ending scrape..."
+            )
+            self.complete()
+        elif request.priority == Priority.CASE.value:
+            self.failed_cases += 1
+            self._emit_progress()
+
+    def _emit_progress(self):
+        self.progress.emit(self.success_cases, self.failed_cases, self.total_events)
+        self.pages_progress.emit(
+            self.pages_requested, self.pages_fetched, self.cases_found
+        )
+
+    @pyqtSlot()
     def complete(self):
         """Completes the scraping process and emits the completed signal."""
+        if not self.running:
+            return
 
         # Order matters here, otherwise the request handler will start making
-        # unnecessary case list requests once the individual cases are cleared
-        self._req_handler.clear_requests(Priority.CASE_LIST.value)
-        self._req_handler.clear_requests(Priority.CASE.value)
+        # unnecessary case list requests once the individual cases are cleared.
+        # Only this scraper's requests are cleared, as other scrapers may be running.
+        own_requests = {"scrape": self.scrape_id}
+        self._req_handler.clear_requests(Priority.CASE_LIST.value, own_requests)
+        self._req_handler.clear_requests(Priority.CASE.value, own_requests)
 
         if self.success_cases + self.failed_cases < 1:
             self._logger.info("No data was found. Scrape complete.")
@@ -134,10 +307,19 @@ class BaseScraper(QObject, ABC, metaclass=_Meta):
                     - Successfully Parsed: {self.success_cases} ({self.success_cases / (total_cases) * 100:.2f}%)
                     - Failed to Parse: {self.failed_cases} ({self.failed_cases / (total_cases) * 100:.2f}%)
                 - Total Collision Events Extracted: {self.total_events}
+                - Cases Reused Without Requesting: {self.reused_cases}
                 - Time Elapsed: {(datetime.now() - self.start_time).total_seconds():.2f}s
                 -------------------------"""
                 )
             )
 
+        stats_path = self._req_handler.stats.dump(self.scrape_id, scrape=self.scrape_id)
+        if stats_path:
+            self._logger.info(f"Saved request timings of the scrape to '{stats_path}'.")
+
         self.running = False
+        self._req_handler.response_received.disconnect(self._handle_response)
+        self._req_handler.request_failed.disconnect(self._handle_failure)
+        if self.profiler is not None:
+            self.profiler.disable_thread()
         self.completed.emit()
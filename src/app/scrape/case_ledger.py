@@ -0,0 +1,101 @@
+from collections import OrderedDict
+import json
+from threading import Lock
+from typing import Callable
+
+from requests import Response
+
+from app.models import CaseDocument
+from app.models.case_documents import build_response, decompress
+
+
+class CaseLedger:
+    """Raw case documents fetched by scrapers, keyed by database and case ID.
+
+    A scraper that comes across a case already in its ledger re-parses the stored document
+    against its own search criteria instead of requesting the case again. Documents are kept
+    compressed in memory, in the same form as they are stored in the database. Scrapers run
+    in their own threads, so every access is locked.
+
+    Ledgers can be chained: documents added to a ledger are also added to its fallback, and
+    documents not found in a ledger are looked up in its fallback. This lets an unbounded
+    ledger keep every document of a profile, while a bounded session ledger behind it
+    evicts the least recently used documents of everything else. Documents found in neither
+    can be loaded from elsewhere, e.g. the documents stored in the database by earlier
+    sessions.
+    """
+
+    def __init__(
+        self,
+        capacity: int = None,
+        fallback: "CaseLedger" = None,
+        loader: Callable[[str, str], tuple[str, str, str, bytes] | None] = None,
+    ):
+        """
+        Args:
+            capacity (int, optional): Maximum number of documents kept. Defaults to no limit.
+            fallback (CaseLedger, optional): Ledger to share documents with. Defaults to None.
+            loader (Callable, optional): Called with the database and case ID of a document
+                missing from the ledger and its fallback, from the scrapers' threads. Returns
+                the URL, headers, encoding and compressed content of the document, or None.
+                Defaults to None.
+        """
+        self._lock = Lock()
+        # key: (database, case ID), value: (URL, headers, encoding, compressed content)
+        self._documents: OrderedDict[tuple[str, str], tuple[str, str, str, bytes]] = (
+            OrderedDict()
+        )
+        self._capacity = capacity
+        self._fallback = fallback
+        self._loader = loader
+
+    def add(self, document: CaseDocument):
+        """Add a compressed case document. The ledger keeps its own copy of the document's
+        fields, so the document can be added to a database session afterwards."""
+        self._put(
+            (document.scraper_type, str(document.case_id)),
+            (document.url, document.headers, document.encoding, document.data),
+        )
+
+    def _put(self, key: tuple[str, str], document: tuple[str, str, str, bytes]):
+        self._store(key, document)
+        if self._fallback is not None:
+            self._fallback._put(key, document)
+
+    def _store(self, key: tuple[str, str], document: tuple[str, str, str, bytes]):
+        """Store a document in this ledger only, evicting the least recently used document if full."""
+        with self._lock:
+            self._documents[key] = document
+            self._documents.move_to_end(key)
+            if self._capacity is not None and len(self._documents) > self._capacity:
+                self._documents.popitem(last=False)
+
+    def get(self, database: str, case_id) -> Response | None:
+        """Get the stored document of a case, or None if it has not been fetched yet."""
+        document = self._get((database, str(case_id)))
+        if document is None:
+            return None
+
+        url, headers, encoding, data = document
+        return build_response(url, json.loads(headers), decompress(encoding, data))
+
+    def _get(self, key: tuple[str, str]) -> tuple[str, str, str, bytes] | None:
+        with self._lock:
+            document = self._documents.get(key)
+            if document is not None:
+                self._documents.move_to_end(key)
+                return document
+        if self._fallback is not None:
+            document = self._fallback._get(key)
+        if document is None and self._loader is not None:
+            document = self._loader(*key)
+
+        # Keep documents found in the fallback, in case the fallback evicts them later, and
+        # loaded documents, so they are only loaded once
+        if document is not None:
+            self._store(key, document)
+        return document
+
+    def __len__(self):
+        with self._lock:
+            return len(self._documents)
@@ -0,0 +1,94 @@
+from urllib.parse import urlsplit
+
+DEFAULT_BASE_URL = "https://crashviewer.nhtsa.dot.gov"
+
+# Endpoints requested from crashviewer, which each scraper has a path for
+ENDPOINT_NAMES = ("search", "models", "case_list", "case", "image", "edr")
+DATABASES = ("NASS", "CISS")
+
+
+def normalize_base_url(url: str) -> str:
+    """Strip the trailing slashes of a base URL, as paths are appended to it.
+
+    Raises:
+        ValueError: If the URL is not an absolute http(s) URL without a query or fragment.
+    """
+    url = url.strip().rstrip("/")
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        raise ValueError(f"'{url}' is not an http(s) URL.")
+    if parts.query or parts.fragment:
+        raise ValueError(f"'{url}' cannot have a query or fragment.")
+    return url
+
+
+def _check_endpoint(key: str):
+    """Check that an override key names an endpoint, optionally of one database
+    (e.g. "image" or "NASS.image").
+
+    Raises:
+        ValueError: If the key names no endpoint.
+    """
+    database, _, endpoint = key.rpartition(".")
+    if endpoint not in ENDPOINT_NAMES or (database and database not in DATABASES):
+        raise ValueError(
+            f"Unknown endpoint '{key}'. Endpoints are {', '.join(ENDPOINT_NAMES)}, "
+            f"optionally prefixed with a database (e.g. 'NASS.image')."
+        )
+
+
+class EndpointRegistry:
+    """Base URLs the crashviewer endpoints are requested from.
+
+    Every endpoint is requested from the base URL (crashviewer itself by default), unless it
+    is overridden, e.g. to send case documents and images through a caching proxy while
+    searches still go to the site. An override of an endpoint for one database takes
+    precedence over an override of the endpoint for both.
+
+    URLs are built in the scrapers' threads as well as the GUI thread, so configuring the
+    registry replaces its state in a single assignment instead of updating it in place.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL):
+        self._state: tuple[str, dict[str, str]] = (normalize_base_url(base_url), {})
+
+    @property
+    def base_url(self) -> str:
+        return self._state[0]
+
+    @property
+    def overrides(self) -> dict[str, str]:
+        return dict(self._state[1])
+
+    def configure(self, base_url: str, overrides: dict[str, str] = None):
+        """Set the base URL and the endpoint overrides, replacing any previous overrides.
+
+        Args:
+            base_url (str): URL every endpoint without an override is requested from.
+            overrides (dict[str, str], optional): Base URL of each overridden endpoint,
+                keyed by endpoint name, optionally prefixed with a database (e.g. "image" or
+                "NASS.image"). Defaults to None, which overrides no endpoint.
+
+        Raises:
+            ValueError: If a URL or endpoint name is invalid. The registry is left unchanged.
+        """
+        normalized = {}
+        for key, url in (overrides or {}).items():
+            _check_endpoint(key)
+            normalized[key] = normalize_base_url(url)
+        self._state = (normalize_base_url(base_url), normalized)
+
+    def root(self, database: str, endpoint: str) -> str:
+        """Get the base URL an endpoint of a database is requested from."""
+        base_url, overrides = self._state
+        return overrides.get(
+            f"{database}.{endpoint}", overrides.get(endpoint, base_url)
+        )
+
+    def url(self, database: str, endpoint: str, path: str) -> str:
+        """Get the URL of a path (starting with "/") of an endpoint of a database."""
+        return self.root(database, endpoint) + path
+
+
+# The registry every URL of the app is built with
+ENDPOINTS = EndpointRegistry()
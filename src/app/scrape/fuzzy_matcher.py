@@ -0,0 +1,85 @@
+from typing import Iterable
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # Fall back to the (much slower) pure-Python implementation
+    from fuzzywuzzy import fuzz
+
+    process = None
+
+
+class FuzzyMatcher:
+    """Checks whether candidate strings fuzzily match a fixed query string.
+
+    The query is normalized once, and the result for each distinct candidate is remembered,
+    since the same makes, models and damage planes appear in almost every case. Candidates
+    that have not been seen yet are scored together in a single batch when rapidfuzz is
+    installed.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        threshold: int,
+        case_sensitive: bool = False,
+        match_all: bool = False,
+    ):
+        """
+        Args:
+            query (str): String to match candidates against.
+            threshold (int): Minimum partial ratio (0-100) for a candidate to match.
+            case_sensitive (bool, optional): Compare strings as-is instead of lowercasing them.
+                Defaults to False.
+            match_all (bool, optional): Match every candidate, e.g. when the scrape parameter
+                is set to "Any". Defaults to False.
+        """
+        self.threshold = threshold
+        self.case_sensitive = case_sensitive
+        self.match_all = match_all
+        self._query = self._normalize(query)
+
+        # key: candidate as given, value: whether it matches
+        self._cache: dict[str, bool] = {}
+
+    def _normalize(self, text: str) -> str:
+        text = text or ""
+        return text if self.case_sensitive else text.lower()
+
+    def _score(self, candidates: list[str]) -> list[float]:
+        """Get the partial ratio of the query against each (normalized) candidate."""
+        if process is not None:
+            scores = process.cdist(
+                [self._query],
+                candidates,
+                scorer=fuzz.partial_ratio,
+                score_cutoff=self.threshold,
+            )
+            return scores[0].tolist()
+        return [fuzz.partial_ratio(self._query, candidate) for candidate in candidates]
+
+    def matches(self, candidate: str) -> bool:
+        """Check whether a single candidate matches the query."""
+        return self.match_many([candidate])[0]
+
+    def match_many(self, candidates: Iterable[str]) -> list[bool]:
+        """Check which of the candidates match the query.
+
+        Args:
+            candidates (Iterable[str]): Strings to check.
+
+        Returns:
+            list[bool]: Whether each candidate matches, in the same order.
+        """
+        candidates = [candidate or "" for candidate in candidates]
+        if self.match_all:
+            return [True] * len(candidates)
+
+        unseen = list(dict.fromkeys(c for c in candidates if c not in self._cache))
+        if unseen:
+            normalized = [self._normalize(c) for c in unseen]
+            # Empty strings never match, as in fuzzywuzzy
+            scores = self._score(normalized) if self._query else [0] * len(unseen)
+            for candidate, text, score in zip(unseen, normalized, scores):
+                self._cache[candidate] = bool(text) and score >= self.threshold
+
+        return [self._cache[c] for c in candidates]
@@ -0,0 +1,241 @@
+from collections import defaultdict
+import logging
+import time
+from requests import Response
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from app.scrape import (
+    RequestHandler,
+    RequestQueueItem,
+    DownloadQueueItem,
+    Priority,
+    SCRAPERS,
+)
+from app.models import Event, ImageCache, DatabaseHandler, make_case_document
+
+
+class ImageBatchJob(QObject):
+    """Downloads every requested image set for a list of events into an image cache.
+
+    Each case document is requested once, no matter how many of the events belong to it,
+    and images are streamed straight into the cache without being decoded. If a database
+    handler is given, stored case documents are used instead of requesting the cases, and
+    requested documents are stored.
+    """
+
+    # images done, images total, bytes per second
+    progress = pyqtSignal(int, int, float)
+    finished = pyqtSignal()
+
+    def __init__(
+        self,
+        req_handler: RequestHandler,
+        image_cache: ImageCache,
+        events: list[Event],
+        img_sets: list[str],
+        db_handler: DatabaseHandler = None,
+    ):
+        super().__init__()
+        self._logger = logging.getLogger(__name__)
+
+        self._req_handler = req_handler
+        self._image_cache = image_cache
+        self._img_sets = img_sets
+        self._db_handler = db_handler
+
+        # key: (scraper type, case id), value: vehicle numbers to fetch images for
+        self._cases: dict[tuple[str, int], set[int]] = defaultdict(set)
+        for event in events:
+            self._cases[(event.scraper_type, event.case_id)].add(event.vehicle_num)
+
+        self._pending_cases = 0
+        self.images_total = 0
+        self.images_done = 0
+        self.images_failed = 0
+        self.bytes_downloaded = 0
+        self._start_time = 0.0
+
+        self.running = False
+
+    @property
+    def _extra_data(self):
+        return {"for": "batch_images", "job": id(self)}
+
+    def start(self):
+        """Requests the case documents of every event in the batch."""
+        self._req_handler.response_received.connect(self._handle_response)
+        self._req_handler.request_failed.connect(self._handle_failure)
+
+        self.running = True
+        self._start_time = time.perf_counter()
+
+        requests = []
+        for scraper_type, case_id in self._cases:
+            scraper = SCRAPERS.get(scraper_type)
+            if not scraper:
+                self._logger.error(f"Unknown scraper type: {scraper_type}")
+                continue
+
+            requests.append(
+                RequestQueueItem(
+                    scraper.endpoint_url("case", scraper.case_url_raw.format(case_id=case_id)),
+                    priority=Priority.IMAGE.value,
+                    extra_data={
+                        **self._extra_data,
+                        "scraper_type": scraper_type,
+                        "case_id": case_id,
+                    },
+                    callback=self._queue_images,
+                )
+            )
+
+        self._pending_cases = len(requests)
+        self._logger.info(
+            f"Fetching images for {len(self._cases)} case{'s'[:len(self._cases)^1]}..."
+        )
+
+        # Find the images of cases with a recent enough stored document right away
+        if self._db_handler:
+            stored = 0
+            for request in list(requests):
+                data = request.extra_data
+                response = self._db_handler.get_case_document(
+                    data["scraper_type"],
+                    data["case_id"],
+                    max_age=SCRAPERS[data["scraper_type"]].image_document_max_age,
+                )
+                if response is not None:
+                    requests.remove(request)
+                    data["stored"] = True
+                    self._queue_images(request, response)
+                    stored += 1
+            self._logger.debug(f"Using {stored} stored case documents.")
+
+        if requests:
+            self._req_handler.batch_enqueue(requests)
+        self._check_finished()
+
+    def stop(self):
+        """Cancels all outstanding requests for this batch."""
+        if not self.running:
+            return
+        self._req_handler.clear_requests(Priority.IMAGE.value, self._extra_data)
+        self._logger.info("Stopped batch image scrape.")
+        self._finish()
+
+    @pyqtSlot(RequestQueueItem, Response)
+    def _handle_response(self, request: RequestQueueItem, response: Response):
+        if self.running and request.extra_data.get("job") == id(self):
+            request.callback(request, response)
+            self._req_handler.stats.record_callback(request)
+
+    @pyqtSlot(RequestQueueItem)
+    def _handle_failure(self, request: RequestQueueItem):
+        if not self.running or request.extra_data.get("job") != id(self):
+            return
+
+        if request.callback == self._queue_images:
+            self._pending_cases -= 1
+        else:
+            self.images_failed += 1
+            self._emit_progress()
+        self._check_finished()
+
+    def _queue_images(self, request: RequestQueueItem, response: Response):
+        scraper_type = request.extra_data["scraper_type"]
+        case_id = request.extra_data["case_id"]
+        scraper = SCRAPERS[scraper_type]
+        self._pending_cases -= 1
+
+        if self._db_handler and not request.extra_data.get("stored") and response.content:
+            self._db_handler.add_case_document(
+                make_case_document(scraper_type, case_id, response)
+            )
+
+        requests = []
+        for vehicle_num in sorted(self._cases[(scraper_type, case_id)]):
+            try:
+                images = scraper.find_images(
+                    response, case_id, vehicle_num, self._img_sets
+                )
+            except Exception as e:
+                self._logger.error(f"Failed to find images in case {case_id}: {e}")
+                continue
+
+            for image in images:
+                if self._image_cache.contains(
+                    scraper_type, case_id, vehicle_num, image.img_id
+                ):
+                    continue
+
+                requests.append(
+                    DownloadQueueItem(
+                        image.url,
+                        headers=image.headers,
+                        priority=Priority.IMAGE.value,
+                        dest=self._image_cache.original_dest(
+                            scraper_type, case_id, vehicle_num, image.img_id
+                        ),
+                        extra_data={
+                            **self._extra_data,
+                            "scraper_type": scraper_type,
+                            "case_id": case_id,
+                            "vehicle_num": vehicle_num,
+                            "img_id": image.img_id,
+                            "img_set": image.img_set,
+                        },
+                        callback=self._save_image,
+                    )
+                )
+
+        self.images_total += len(requests)
+        if requests:
+            self._req_handler.batch_enqueue(requests)
+        self._emit_progress()
+        self._check_finished()
+
+    def _save_image(self, request: DownloadQueueItem, response: Response):
+        data = request.extra_data
+        if self._image_cache.add(
+            data["scraper_type"],
+            data["case_id"],
+            data["vehicle_num"],
+            data["img_id"],
+            img_set=data["img_set"],
+            make_thumbnail=False,
+        ):
+            self.images_done += 1
+            self.bytes_downloaded += request.bytes_written
+        else:
+            self.images_failed += 1
+
+        self._emit_progress()
+        self._check_finished()
+
+    def _emit_progress(self):
+        elapsed = time.perf_counter() - self._start_time
+        throughput = self.bytes_downloaded / elapsed if elapsed > 0 else 0.0
+        self.progress.emit(
+            self.images_done + self.images_failed, self.images_total, throughput
+        )
+
+    def _check_finished(self):
+        if (
+            self.running
+            and self._pending_cases <= 0
+            and self.images_done + self.images_failed >= self.images_total
+        ):
+            elapsed = time.perf_counter() - self._start_time
+            self._logger.info(
+                f"Batch image scrape complete: {self.images_done} image{'s'[:self.images_done^1]} saved, "
+                f"{self.images_failed} failed, {self.bytes_downloaded / 1e6:.2f} MB in {elapsed:.2f}s."
+            )
+            self._finish()
+
+    def _finish(self):
+        self.running = False
+        self._image_cache.flush()
+        self._req_handler.response_received.disconnect(self._handle_response)
+        self._req_handler.request_failed.disconnect(self._handle_failure)
+        self.finished.emit()
@@ -0,0 +1,250 @@
+from collections import deque
+import csv
+from dataclasses import dataclass, fields
+import json
+from pathlib import Path
+
+# Key of the cached search form options of a database
+SEARCH_OPTIONS_KEY = "search"
+
+
+@dataclass
+class ScrapeJob:
+    """A set of scrape parameters. Dropdown parameters are given by the text of their option,
+    matched case-insensitively, and None selects the first option (usually "All"). The weight
+    is the job's share of requests while it runs alongside other scrapes (see
+    RequestHandler.set_queue_weight)."""
+
+    database: str
+    make: str | None = None
+    model: str | None = None
+    start_year: str | None = None
+    end_year: str | None = None
+    primary_damage: str | None = None
+    secondary_damage: str | None = None
+    min_dv: int = 0
+    max_dv: int = 0
+    weight: int = 1
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScrapeJob":
+        """Create a job from a dictionary with the same keys as the scrape parameters stored
+        in a profile. Keys are case-insensitive and empty values are treated as missing.
+
+        Raises:
+            ValueError: If the database is missing, a key is unknown, a delta-v is not an integer,
+                or the weight is not a positive integer.
+        """
+        names = {field.name for field in fields(cls)}
+        values = {}
+        for key, value in data.items():
+            key = str(key).strip().lower()
+            if key not in names:
+                raise ValueError(f"Unknown scrape parameter '{key}'.")
+            if isinstance(value, str):
+                value = value.strip()
+            if value not in (None, ""):
+                values[key] = value
+
+        if "database" not in values:
+            raise ValueError("Scrape job has no database.")
+        values["database"] = str(values["database"]).upper()
+
+        for key in ("min_dv", "max_dv"):
+            try:
+                values[key] = int(values.get(key, 0))
+            except ValueError:
+                raise ValueError(f"'{key}' must be an integer, not '{values[key]}'.")
+        try:
+            values["weight"] = int(values.get("weight") or 1)
+        except ValueError:
+            raise ValueError(f"'weight' must be an integer, not '{values['weight']}'.")
+        if values["weight"] < 1:
+            raise ValueError("'weight' must be at least 1.")
+
+        return cls(**values)
+
+
+def match_option(options: list[tuple], text: str | None) -> tuple | None:
+    """Find the dropdown option with the given text, ignoring case.
+
+    Args:
+        options (list[tuple]): Text and value of each option.
+        text (str | None): Text to match. If None, the first option is returned.
+
+    Returns:
+        tuple | None: Text and value of the matched option, or None if there is no match.
+    """
+    if not options:
+        return None
+    if text is None:
+        return tuple(options[0])
+    text = text.strip().lower()
+    return next(
+        (tuple(option) for option in options if option[0].strip().lower() == text), None
+    )
+
+
+def models_query(database: str, make: tuple) -> tuple[str, dict]:
+    """Get the options cache key and request parameters for the models of a make.
+
+    Args:
+        database (str): Database the make belongs to.
+        make (tuple): Text and value of the make option.
+    """
+    if database == "NASS":
+        return f"models:{make[0]}", {"make": make[0]}
+    return f"models:{make[1]}", {"makeIds": make[1]}
+
+
+def resolve_job(
+    job: ScrapeJob, field_names, search_options: dict, models: list | None
+) -> dict[str, tuple]:
+    """Match the parameters of a job to the options of its database's search form.
+
+    Args:
+        job (ScrapeJob): The job to resolve.
+        field_names (FieldNames): Dropdown field names of the job's scraper.
+        search_options (dict): Options of each dropdown as (text, value) pairs, keyed by field name.
+        models (list | None): Model options of the job's make as (text, value) pairs, or None
+            if they are not known.
+
+    Returns:
+        dict[str, tuple]: Text and value of the option matched for each dropdown, keyed by
+            scraper argument.
+
+    Raises:
+        ValueError: If a parameter matches no option.
+    """
+    dropdowns = {
+        "make": (job.make, field_names.make),
+        "start_model_year": (job.start_year, field_names.start_model_year),
+        "end_model_year": (job.end_year, field_names.end_model_year),
+        "primary_damage": (job.primary_damage, field_names.primary_damage),
+        "secondary_damage": (job.secondary_damage, field_names.secondary_damage),
+    }
+    options = {}
+    for arg, (text, field_name) in dropdowns.items():
+        options[arg] = match_option(search_options.get(field_name, []), text)
+        if options[arg] is None:
+            raise ValueError(
+                f"No {job.database} {arg.replace('_', ' ')} option matches '{text}'."
+            )
+
+    # The model options depend on the make
+    if job.model is not None and models is None:
+        raise ValueError(
+            f"The {job.database} models of '{options['make'][0]}' are not loaded."
+        )
+    options["model"] = match_option([("All", -1), *(models or [])], job.model)
+    if options["model"] is None:
+        raise ValueError(f"No {job.database} model option matches '{job.model}'.")
+
+    return options
+
+
+def resolve_cached_job(job: ScrapeJob, field_names, db_handler) -> dict[str, tuple]:
+    """Match the parameters of a job to the search form options cached in the database.
+
+    Args:
+        job (ScrapeJob): The job to resolve.
+        field_names (FieldNames): Dropdown field names of the job's scraper.
+        db_handler (DatabaseHandler): Database handler to get the cached options from.
+
+    Raises:
+        ValueError: If the search options are not cached, or a parameter matches no option.
+    """
+    cached = db_handler.get_cached_options(job.database, SEARCH_OPTIONS_KEY)
+    if not cached:
+        raise ValueError(f"The {job.database} search options are not loaded.")
+    search_options = cached[0]
+
+    models = None
+    make = match_option(search_options.get(field_names.make, []), job.make)
+    if make is not None:
+        cached = db_handler.get_cached_options(
+            job.database, models_query(job.database, make)[0]
+        )
+        models = cached[0] if cached else None
+
+    return resolve_job(job, field_names, search_options, models)
+
+
+def scraper_kwargs(job: ScrapeJob, options: dict[str, tuple]) -> dict:
+    """Get the keyword arguments to create a scraper for a resolved job with."""
+    return {
+        **{arg: (text, int(value or -1)) for arg, (text, value) in options.items()},
+        "min_dv": job.min_dv,
+        "max_dv": job.max_dv,
+    }
+
+
+def load_jobs(path: Path) -> list[ScrapeJob]:
+    """Load scrape jobs from a file.
+
+    CSV files need a header row naming the parameters of each column. JSON files contain a
+    list of parameter objects, or an object of them like the parameters stored in a
+    multi-analysis profile.
+
+    Raises:
+        ValueError: If the file is malformed.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, encoding="utf-8") as f:
+            try:
+                rows = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e}")
+        if isinstance(rows, dict):
+            rows = list(rows.values())
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Expected a list of scrape parameter sets.")
+    return [ScrapeJob.from_dict(row) for row in rows]
+
+
+class ScrapeJobQueue:
+    """Scrape jobs waiting to run, and the state shared by the jobs of a run.
+
+    Jobs run back to back by default. When interleaved, up to MAX_INTERLEAVED jobs run at the
+    same time, and the request handler shares requests fairly between their scrapers.
+    """
+
+    MAX_INTERLEAVED = 3
+
+    def __init__(self):
+        self.pending: deque[ScrapeJob] = deque()
+        self.interleave = False
+        self.running = False
+
+        self.finished_jobs = 0
+        self.failed_jobs = 0
+        self.reused_cases = 0
+
+    def add(self, jobs: list[ScrapeJob]):
+        self.pending.extend(jobs)
+
+    def start(self, interleave: bool):
+        """Start a run of the pending jobs."""
+        self.interleave = interleave
+        self.running = True
+        self.finished_jobs = 0
+        self.failed_jobs = 0
+        self.reused_cases = 0
+
+    def take_ready(self, running: int) -> list[ScrapeJob]:
+        """Remove and return the jobs that can start while a number of jobs are running."""
+        limit = self.MAX_INTERLEAVED if self.interleave else 1
+        ready = []
+        while self.pending and running + len(ready) < limit:
+            ready.append(self.pending.popleft())
+        return ready
+
+    def stop(self):
+        """Drop the pending jobs and end the run."""
+        self.pending.clear()
+        self.running = False
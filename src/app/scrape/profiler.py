@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+import cProfile
+from datetime import datetime
+import io
+import logging
+from pathlib import Path
+import pstats
+import threading
+import tracemalloc
+
+
+class ScrapeProfiler:
+    """Profiles a scrape run with cProfile, and optionally traces its memory allocations.
+
+    cProfile only profiles the thread it is enabled in, so each thread taking part in the run
+    (the GUI thread, the scraper's thread and the request handler's worker threads) enables
+    its own profiler, and their statistics are combined when the run finishes. On Python 3.12
+    and later a single profiler covers every thread, so enabling more of them is skipped.
+
+    Reports are written to the output directory as a .prof file (readable with pstats or
+    snakeviz), a text summary of the slowest functions, and, if memory is traced, the top
+    allocating source lines.
+    """
+
+    TOP_FUNCTIONS = 50  # Functions listed in the text summary, by cumulative time
+    TOP_ALLOCATORS = 25  # Source lines listed in the memory report
+    TRACEMALLOC_FRAMES = 1  # Frames stored per allocation. More frames are much slower.
+
+    def __init__(self, label: str, out_dir: Path, trace_memory: bool = False):
+        """
+        Args:
+            label (str): Name the report files start with (e.g. the profile's name).
+            out_dir (Path): Directory to write the reports to.
+            trace_memory (bool, optional): Trace memory allocations with tracemalloc.
+                Defaults to False.
+        """
+        self._logger = logging.getLogger(__name__)
+        self._label = label
+        self._out_dir = Path(out_dir)
+        self._trace_memory = trace_memory
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: list[cProfile.Profile] = []
+        self._started_tracing = False
+        self._baseline: tracemalloc.Snapshot | None = None
+
+    def start(self):
+        """Start the run, profiling the calling thread."""
+        if self._trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.TRACEMALLOC_FRAMES)
+                self._started_tracing = True
+            self._baseline = self._take_snapshot()
+        self.enable_thread()
+
+    def enable_thread(self):
+        """Start profiling the calling thread, if it is not already being profiled."""
+        profile = getattr(self._local, "profile", None)
+        created = profile is None
+        if created:
+            profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active, which already covers this thread on Python 3.12+
+            return
+        # Only profiles that were enabled are kept, as pstats cannot load an empty one
+        if created:
+            self._local.profile = profile
+            with self._lock:
+                self._profiles.append(profile)
+
+    def disable_thread(self):
+        """Stop profiling the calling thread. Its statistics are kept until the run finishes."""
+        profile = getattr(self._local, "profile", None)
+        if profile is not None:
+            profile.disable()
+
+    @contextmanager
+    def profile_thread(self):
+        """Profile the calling thread for the duration of the context, e.g. while a worker
+        thread of a pool runs a task. Statistics accumulate across uses in the same thread."""
+        self.enable_thread()
+        try:
+            yield
+        finally:
+            self.disable_thread()
+
+    def finish(self) -> list[Path]:
+        """Finish the run and write its reports. Must be called from the thread that started
+        the run, after every other thread has disabled profiling.
+
+        Returns:
+            list[Path]: Paths of the reports written.
+        """
+        self.disable_thread()
+        memory = self._memory_report() if self._trace_memory else None
+
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        base = self._out_dir / f"{self._label}_{timestamp}"
+        paths = []
+        try:
+            self._out_dir.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                # pstats cannot be built from a profile that recorded nothing
+                profiles = [profile for profile in self._profiles if profile.getstats()]
+            if profiles:
+                stats = pstats.Stats(profiles[0])
+                for profile in profiles[1:]:
+                    stats.add(profile)
+                prof_path = base.with_name(base.name + ".prof")
+                stats.dump_stats(prof_path)
+                paths.append(prof_path)
+
+                summary = io.StringIO()
+                stats.stream = summary
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.TOP_FUNCTIONS)
+                summary_path = base.with_name(base.name + "_functions.txt")
+                summary_path.write_text(summary.getvalue(), encoding="utf-8")
+                paths.append(summary_path)
+
+            if memory is not None:
+                memory_path = base.with_name(base.name + "_memory.txt")
+                memory_path.write_text(memory, encoding="utf-8")
+                paths.append(memory_path)
+        except (OSError, TypeError) as e:
+            self._logger.error(f"Failed to write profiling reports to '{self._out_dir}': {e}")
+        return paths
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        """Take a snapshot of the traced allocations, leaving out tracemalloc's own and the
+        import system's."""
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+
+    def _memory_report(self) -> str:
+        """Get the top allocating source lines, by memory held at the end of the run and by
+        growth since it started, and stop tracing if the run started it."""
+        snapshot = self._take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        lines = [f"Peak traced memory: {peak / 1024**2:.1f} MiB", ""]
+        lines.append(f"Top {self.TOP_ALLOCATORS} source lines by memory held at the end:")
+        for stat in snapshot.statistics("lineno")[: self.TOP_ALLOCATORS]:
+            lines.append(f"  {stat}")
+        if self._baseline is not None:
+            lines.append("")
+            lines.append(f"Top {self.TOP_ALLOCATORS} source lines by growth during the run:")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[: self.TOP_ALLOCATORS]:
+                lines.append(f"  {stat}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,237 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import logging
+import time
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from app.scrape import (
+    RequestQueueItem,
+    Priority,
+    ScrapeJob,
+    SCRAPERS,
+    resolve_cached_job,
+    scraper_kwargs,
+)
+from app.models import DatabaseHandler, Profile
+from app.models.case_documents import build_response, decompress
+
+
+def _reparse_cases(
+    scraper_type: str, scrapes: list[dict], documents: list[tuple]
+) -> tuple[list[dict], list[int], list[int]]:
+    """Parse stored case documents with every scrape of a database in a profile. Runs in a
+    worker process, so everything passed in and returned is plain data.
+
+    Args:
+        scraper_type (str): Database of the cases.
+        scrapes (list[dict]): Scraper keyword arguments of each scrape.
+        documents (list[tuple]): Case ID, URL, headers, encoding and compressed data of each case.
+
+    Returns:
+        tuple[list[dict], list[int], list[int]]: Column values of each parsed event, and the IDs
+            of the cases that were parsed and of the cases whose parsing raised an error.
+    """
+    scrapers = [SCRAPERS[scraper_type](None, **kwargs) for kwargs in scrapes]
+    case_events = []
+    for scraper in scrapers:
+        # The scrapers only parse documents while running, but never make any requests
+        scraper.running = True
+        scraper.event_parsed.connect(
+            lambda event, _: case_events.append(
+                {key: value for key, value in event if key != "id"}
+            )
+        )
+
+    events, parsed, failed = [], [], []
+    for case_id, url, headers, encoding, data in documents:
+        case_events.clear()
+        try:
+            response = build_response(url, json.loads(headers), decompress(encoding, data))
+            for scraper in scrapers:
+                request = RequestQueueItem(
+                    url,
+                    priority=Priority.CASE.value,
+                    extra_data=scraper._extra_data(case_id=case_id, reused=True),
+                )
+                scraper._parse_case(request, response)
+        except Exception as e:
+            logging.getLogger(__name__).error(
+                f"Error reparsing {scraper_type} case {case_id}: {e}"
+            )
+            failed.append(case_id)
+            continue
+
+        # A case no scrape finds a matching event in is parsed too, so its events are removed
+        events.extend(case_events)
+        parsed.append(case_id)
+
+    return events, parsed, failed
+
+
+class _ReparseSignals(QObject):
+    """Signals emitted by a _ReparseWorker instance."""
+
+    # cases done, cases total
+    progress = pyqtSignal(int, int)
+    # events, parsed cases (scraper type, case ID), failed cases (scraper type, case ID)
+    result = pyqtSignal(list, list, list)
+    exception = pyqtSignal(Exception)
+
+
+class _ReparseWorker(QRunnable):
+    """Worker class to parse case documents in a pool of processes, from a separate thread."""
+
+    def __init__(self, chunks: list[tuple[str, list[dict], list[tuple]]]):
+        """
+        Args:
+            chunks (list[tuple[str, list[dict], list[tuple]]]): Arguments of each call to
+                _reparse_cases.
+        """
+        super().__init__()
+        self._chunks = chunks
+        self.signals = _ReparseSignals()
+
+    @pyqtSlot()
+    def run(self):
+        total = sum(len(documents) for _, _, documents in self._chunks)
+        events, parsed, failed = [], [], []
+        try:
+            with ProcessPoolExecutor() as executor:
+                futures = {
+                    executor.submit(_reparse_cases, *chunk): chunk[0]
+                    for chunk in self._chunks
+                }
+                for future in as_completed(futures):
+                    scraper_type = futures[future]
+                    chunk_events, chunk_parsed, chunk_failed = future.result()
+                    events.extend(chunk_events)
+                    parsed.extend((scraper_type, case_id) for case_id in chunk_parsed)
+                    failed.extend((scraper_type, case_id) for case_id in chunk_failed)
+                    self.signals.progress.emit(len(parsed) + len(failed), total)
+        except Exception as e:
+            self.signals.exception.emit(e)
+        else:
+            self.signals.result.emit(events, parsed, failed)
+
+
+class ProfileReparser(QObject):
+    """Rebuilds the events of a profile by parsing its stored raw case documents again with
+    the profile's scrape parameters, without making any requests.
+
+    Documents are parsed in a pool of processes. The events of every parsed case are then
+    replaced in a single transaction; events of cases with no stored document, or whose
+    document failed to parse, are left as they are.
+    """
+
+    CHUNK_SIZE = 50  # Cases parsed by a worker process at a time
+
+    # cases done, cases total
+    progress = pyqtSignal(int, int)
+    # The diff of the profile's events (see DatabaseHandler.replace_profile_events), with the
+    # number of "parsed", "failed" and "missing" cases, or None if the reparse failed
+    finished = pyqtSignal(object)
+
+    def __init__(self, db_handler: DatabaseHandler, profile: Profile):
+        super().__init__()
+        self._logger = logging.getLogger(__name__)
+        self._db_handler = db_handler
+        self._profile = profile
+        self._worker: _ReparseWorker | None = None
+        self._missing = 0
+        self._start_time = 0.0
+
+    def _scrapes(self) -> dict[str, list[dict]]:
+        """Get the scraper keyword arguments of each scrape of the profile, by database.
+
+        Raises:
+            ValueError: If the parameters of a scrape cannot be resolved.
+        """
+        params = json.loads(self._profile.params)
+        # Profiles store the parameters of each scrape, keyed by scrape name
+        if "database" in params:
+            params = {"Scrape 1": params}
+
+        scrapes = defaultdict(list)
+        for name, scrape_params in params.items():
+            job = ScrapeJob.from_dict(scrape_params)
+            scraper = SCRAPERS.get(job.database)
+            if not scraper:
+                raise ValueError(f"{name} has an unknown database '{job.database}'.")
+            options = resolve_cached_job(job, scraper.field_names, self._db_handler)
+            scrapes[job.database].append(scraper_kwargs(job, options))
+        return scrapes
+
+    def start(self) -> bool:
+        """Start reparsing the profile.
+
+        Returns:
+            bool: True if the reparse was started, False if there is nothing to reparse.
+        """
+        try:
+            scrapes = self._scrapes()
+        except ValueError as e:
+            self._logger.error(f"Reparse aborted: {e}")
+            return False
+
+        documents, self._missing = self._db_handler.get_profile_case_documents(
+            self._profile
+        )
+        if not documents:
+            self._logger.error(
+                f"Reparse aborted: No case documents are stored for profile {self._profile.id}."
+            )
+            return False
+
+        by_database = defaultdict(list)
+        for scraper_type, *document in documents:
+            by_database[scraper_type].append(tuple(document))
+        chunks = []
+        for scraper_type, database_documents in by_database.items():
+            if scraper_type not in scrapes:
+                self._missing += len(database_documents)
+                continue
+            for i in range(0, len(database_documents), self.CHUNK_SIZE):
+                chunks.append(
+                    (
+                        scraper_type,
+                        scrapes[scraper_type],
+                        database_documents[i : i + self.CHUNK_SIZE],
+                    )
+                )
+        if not chunks:
+            self._logger.error(
+                "Reparse aborted: The profile has no scrapes for its stored case documents."
+            )
+            return False
+
+        self._worker = _ReparseWorker(chunks)
+        self._worker.signals.progress.connect(self.progress.emit)
+        self._worker.signals.result.connect(self._handle_result)
+        self._worker.signals.exception.connect(self._handle_exception)
+
+        self._start_time = time.perf_counter()
+        self._logger.info(
+            f"Reparsing {len(documents)} cases of profile {self._profile.id}..."
+        )
+        QThreadPool.globalInstance().start(self._worker)
+        return True
+
+    @pyqtSlot(list, list, list)
+    def _handle_result(self, events: list, parsed: list, failed: list):
+        diff = self._db_handler.replace_profile_events(self._profile, events, parsed)
+        if diff is not None:
+            diff.update(parsed=len(parsed), failed=len(failed), missing=self._missing)
+            self._logger.info(
+                f"Reparsed {len(parsed)} cases ({len(failed)} failed, {self._missing} not stored) "
+                f"in {time.perf_counter() - self._start_time:.2f}s."
+            )
+        self._worker = None
+        self.finished.emit(diff)
+
+    @pyqtSlot(Exception)
+    def _handle_exception(self, e: Exception):
+        self._logger.error(f"Error reparsing profile {self._profile.id}: {e}")
+        self._worker = None
+        self.finished.emit(None)
@@ -1,10 +1,28 @@
 from dataclasses import dataclass, field
 from datetime import datetime
+import hashlib
 import logging
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import TYPE_CHECKING
 import requests
 
 from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal, pyqtSlot
 
+from .request_stats import (
+    RequestStats,
+    ENQUEUED,
+    DEQUEUED,
+    SENT,
+    FIRST_BYTE,
+    COMPLETED,
+)
+
+if TYPE_CHECKING:
+    from .profiler import ScrapeProfiler
+
 
 @dataclass
 class _CachedResponse:
@@ -19,7 +37,9 @@ class _CachedResponse:
         ).total_seconds() > self.COOKIE_EXPIRED_SECS
 
 
-@dataclass(order=True)
+# Requests compare by identity, so that membership checks and removal from the queues always
+# refer to the exact request rather than any request with equal fields
+@dataclass(eq=False)
 class RequestQueueItem:
     url: str = field(compare=False)
     method: str = field(default="GET", compare=False)
@@ -29,54 +49,205 @@ class RequestQueueItem:
     # Additional data used to identify the request (for internal use, not sent to url)
     extra_data: dict = field(default_factory=dict, compare=False)
     callback: callable = field(default=None, compare=False)
+    # Time (from time.perf_counter()) each stage of the request's lifecycle was reached,
+    # keyed by stage (see request_stats)
+    timings: dict = field(default_factory=dict, compare=False)
 
     def __repr__(self):
         return f"RequestQueueItem(url={self.url}, priority={self.priority})"
 
 
+@dataclass(eq=False)
+class DownloadQueueItem(RequestQueueItem):
+    """A request whose response body is streamed to a file instead of being held in memory.
+
+    The body is written in chunks to a temporary file next to `dest`, checked against the
+    expected size, and then atomically renamed to `dest`. Its SHA-256 digest is recorded as it
+    is written. The response passed to callbacks has no content.
+    """
+
+    dest: Path = field(default=None, compare=False)
+    # Save under the first free numbered name (e.g. "file(1).txt") if a file exists at `dest`,
+    # instead of replacing it. The name is picked when the download completes and set as `dest`.
+    keep_existing: bool = field(default=False, compare=False)
+    # Expected body size in bytes. If negative, the Content-Length header is used when available.
+    expected_size: int = field(default=-1, compare=False)
+    # Expected SHA-256 hex digest of the body, for callers that know it. Not verified if empty.
+    # Crashviewer publishes no digests, so the app's own downloads leave it empty.
+    expected_sha256: str = field(default="", compare=False)
+    # Set once the download has completed. sha256 is the digest of the body as received.
+    bytes_written: int = field(default=0, compare=False)
+    sha256: str = field(default="", compare=False)
+
+    def __repr__(self):
+        return f"DownloadQueueItem(url={self.url}, dest={self.dest}, priority={self.priority})"
+
+
+def _claim_free_path(path: Path) -> Path:
+    """Create an empty file at a path, or at the first free numbered variant of it (e.g.
+    "file(1).txt"). Creating the file claims its name, so downloads finishing at the same time
+    never pick the same one.
+
+    Returns:
+        Path: Path of the created file.
+    """
+    candidate = path
+    i = 1
+    while True:
+        try:
+            with open(candidate, "x"):
+                return candidate
+        except FileExistsError:
+            candidate = path.with_name(f"{path.stem}({i}){path.suffix}")
+            i += 1
+
+
+def _mark_first_byte(request: RequestQueueItem, response: requests.Response):
+    """Timestamp the first byte of a response, from the time its headers took to arrive."""
+    request.timings[FIRST_BYTE] = request.timings[SENT] + response.elapsed.total_seconds()
+
+
+def _queue_order(request: RequestQueueItem):
+    """Sort key for the request queue. Sorting is stable, so requests with equal priority stay in FIFO order."""
+    return request.priority
+
+
 class WorkerSignals(QObject):
     """Signals emitted by a RequestWorker instance."""
 
     started = pyqtSignal()
     response = pyqtSignal(RequestQueueItem, requests.Response)
-    exception = pyqtSignal(Exception)
+    exception = pyqtSignal(RequestQueueItem, Exception)
+    # request, bytes received so far, total bytes (-1 if unknown)
+    progress = pyqtSignal(RequestQueueItem, int, int)
 
 
 class RequestWorker(QRunnable):
     """Worker class to send requests in a separate thread."""
 
-    def __init__(self, request: RequestQueueItem, timeout: float):
+    def __init__(
+        self, request: RequestQueueItem, timeout: float, profiler: "ScrapeProfiler" = None
+    ):
         """Create a new RequestWorker instance.
 
         Args:
             request (RequestQueueItem): Request to send.
             timeout (float): Request timeout in seconds.
+            profiler (ScrapeProfiler, optional): Profiler to profile the worker thread with
+                while the request is sent. Defaults to None.
         """
         super().__init__()
         self._request = request
         self._timeout = timeout
+        self._profiler = profiler
         self.signals = WorkerSignals()
 
     @pyqtSlot()
     def run(self):
+        if self._profiler is None:
+            self._run()
+            return
+        with self._profiler.profile_thread():
+            self._run()
+
+    def _run(self):
         self.signals.started.emit()
         response = None
+        self._request.timings[SENT] = time.perf_counter()
         try:
             response = requests.get(
                 url=self._request.url,
                 headers=self._request.headers,
                 timeout=self._timeout,
             )
+            _mark_first_byte(self._request, response)
         except Exception as e:
-            self.signals.exception.emit(e)
+            self._request.timings[COMPLETED] = time.perf_counter()
+            self.signals.exception.emit(self._request, e)
         else:
+            self._request.timings[COMPLETED] = time.perf_counter()
             self.signals.response.emit(self._request, response)
 
 
+class DownloadWorker(RequestWorker):
+    """Worker class to stream a download to disk in a separate thread."""
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self, request: DownloadQueueItem, timeout: float, profiler: "ScrapeProfiler" = None
+    ):
+        super().__init__(request, timeout, profiler)
+        self._request: DownloadQueueItem
+
+    def _run(self):
+        self.signals.started.emit()
+        request = self._request
+        dest = Path(request.dest)
+        tmp_path = None
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            request.timings[SENT] = time.perf_counter()
+            with requests.get(
+                url=request.url,
+                headers=request.headers,
+                timeout=self._timeout,
+                stream=True,
+            ) as response:
+                _mark_first_byte(request, response)
+                if response.status_code != 200:
+                    request.timings[COMPLETED] = time.perf_counter()
+                    self.signals.response.emit(request, response)
+                    return
+
+                expected_size = request.expected_size
+                # Content-Length is the encoded size, so it can only be checked against unencoded bodies
+                if expected_size < 0 and not response.headers.get("Content-Encoding"):
+                    expected_size = int(response.headers.get("Content-Length", -1))
+
+                digest = hashlib.sha256()
+                written = 0
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=dest.parent, prefix=f".{dest.name}.", suffix=".part"
+                )
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in response.iter_content(self.CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        written += len(chunk)
+                        self.signals.progress.emit(request, written, expected_size)
+
+            if expected_size >= 0 and written != expected_size:
+                raise IOError(
+                    f"Expected {expected_size} bytes from {request.url} but received {written}"
+                )
+            if request.expected_sha256 and digest.hexdigest() != request.expected_sha256:
+                raise IOError(f"SHA-256 mismatch for {request.url}")
+
+            if request.keep_existing:
+                dest = request.dest = _claim_free_path(dest)
+            os.replace(tmp_path, dest)
+            tmp_path = None
+            request.bytes_written = written
+            request.sha256 = digest.hexdigest()
+        except Exception as e:
+            request.timings[COMPLETED] = time.perf_counter()
+            self.signals.exception.emit(request, e)
+        else:
+            request.timings[COMPLETED] = time.perf_counter()
+            self.signals.response.emit(request, response)
+        finally:
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+
+
 # Create a controller class to manage the requests
 class RequestHandler(QObject):
     stopped = pyqtSignal()
     response_received = pyqtSignal(RequestQueueItem, requests.Response)
+    request_failed = pyqtSignal(RequestQueueItem)
+    # request, bytes received so far, total bytes (-1 if unknown)
+    download_progress = pyqtSignal(RequestQueueItem, int, int)
 
     DEFAULT_RATE_LIMIT = 0.7  # Default rate limit in seconds
     DEFAULT_TIMEOUT = 7  # Default request timeout in seconds
@@ -85,6 +256,9 @@ class RequestHandler(QObject):
     MIN_RATE_LIMIT = 0.25  # Minimum rate limit in seconds
     MIN_TIMEOUT = 0.25  # Minimum request timeout in seconds
 
+    # Requests of equal priority are shared fairly between the values of this extra_data key
+    FAIR_QUEUE_KEY = "scrape"
+
     def __init__(self):
         super().__init__()
         self._logger = logging.getLogger(__name__)
@@ -93,9 +267,19 @@ class RequestHandler(QObject):
         self._ongoing_requests: list[RequestQueueItem] = []
         self._response_cache: dict[str, _CachedResponse] = {}
 
+        # Weighted round-robin state. key: value of FAIR_QUEUE_KEY, value: weight/current credit
+        self._queue_weights: dict[str, int] = {}
+        self._queue_credits: dict[str, int] = {}
+
         self._rate_limit = self.DEFAULT_RATE_LIMIT
         self._timeout = self.DEFAULT_TIMEOUT
 
+        # Timing and throughput of every request sent or answered from the cache
+        self.stats = RequestStats()
+        # Profiler of the scrape run being profiled, if any. Worker threads are profiled with it
+        # while they send requests.
+        self.profiler: "ScrapeProfiler" = None
+
         self._threadpool = QThreadPool()
         self._delay_timer = QTimer()
         self._delay_timer.setInterval(int(self._rate_limit * 1000))
@@ -115,7 +299,7 @@ class RequestHandler(QObject):
         if self._request_queue and self.running:
 
             # if the next request's response is cached, we can use it immediately
-            request = self._request_queue[0]
+            request = self._peek_next_request()
             prepared_req = requests.Request(
                 method=request.method,
                 url=request.url,
@@ -124,11 +308,16 @@ class RequestHandler(QObject):
             ).prepare()
             request.url = prepared_req.url
 
-            if request.url in self._response_cache:
+            if request.url in self._response_cache and not isinstance(
+                request, DownloadQueueItem
+            ):
                 cached = self._response_cache[request.url]
                 if not cached.expired():
                     self._logger.debug(f"Using cached response for {request.url}.")
                     self._request_queue.remove(request)
+                    now = time.perf_counter()
+                    request.timings[DEQUEUED] = request.timings[COMPLETED] = now
+                    self.stats.record(request, "cached", len(cached.response.content))
                     self._process_response(
                         request, self._response_cache[request.url].response
                     )
@@ -157,12 +346,78 @@ class RequestHandler(QObject):
                 return
 
             # Start the next request
+            self._consume_credit(request)
             self._request_queue.remove(request)
+            request.timings[DEQUEUED] = time.perf_counter()
             self._execute_request(request)
 
             self._start_timer()
             self._logger.debug(f"Rate limiting next request to {self._rate_limit}s")
 
+    def set_queue_weight(self, key: str, weight: int):
+        """Set the share of requests given to a value of FAIR_QUEUE_KEY (e.g. a scraper) when
+        several are competing for requests of the same priority. Defaults to 1.
+
+        Args:
+            key (str): Value of FAIR_QUEUE_KEY in the requests' extra data.
+            weight (int): Relative number of requests to send for the key. Must be at least 1.
+                Setting it back to 1 forgets the key.
+        """
+        weight = max(1, int(weight))
+        if weight == 1:
+            self._queue_weights.pop(key, None)
+        else:
+            self._queue_weights[key] = weight
+
+    def _competing_requests(self) -> dict[str, RequestQueueItem]:
+        """Get the oldest queued request of the highest priority for each value of FAIR_QUEUE_KEY."""
+        top_priority = self._request_queue[0].priority
+
+        # The queue is sorted by priority, so the scan can stop at the first lower priority request
+        heads: dict[str, RequestQueueItem] = {}
+        for request in self._request_queue:
+            if request.priority != top_priority:
+                break
+            heads.setdefault(request.extra_data.get(self.FAIR_QUEUE_KEY), request)
+        return heads
+
+    def _peek_next_request(self) -> RequestQueueItem:
+        """Get the request to send next without removing it from the queue.
+
+        Only requests with the highest priority in the queue are considered. If they belong to
+        more than one value of FAIR_QUEUE_KEY, the value is chosen by smooth weighted
+        round-robin, and its oldest request of that priority is returned.
+        """
+        heads = self._competing_requests()
+        if len(heads) == 1:
+            return self._request_queue[0]
+
+        key = max(
+            heads,
+            key=lambda k: self._queue_credits.get(k, 0) + self._queue_weights.get(k, 1),
+        )
+        return heads[key]
+
+    def _consume_credit(self, request: RequestQueueItem):
+        """Update the round-robin credits for a request that is about to be sent.
+        Must be called while the request is still in the queue."""
+        heads = self._competing_requests()
+        if len(heads) <= 1:
+            # Nothing to share, so no key should bank credit
+            self._queue_credits.clear()
+            return
+
+        # Every competing key earns its weight, and the key served pays the total
+        total = 0
+        for key in heads:
+            weight = self._queue_weights.get(key, 1)
+            self._queue_credits[key] = self._queue_credits.get(key, 0) + weight
+            total += weight
+        self._queue_credits[request.extra_data.get(self.FAIR_QUEUE_KEY)] -= total
+
+        for idle_key in set(self._queue_credits) - set(heads):
+            del self._queue_credits[idle_key]
+
     def _start_timer(self):
         # Need to convert s to ms
         self._delay_timer.setInterval(int(self._rate_limit * 1000))
@@ -188,7 +443,11 @@ class RequestHandler(QObject):
         request.headers.update(default_headers)
         self._ongoing_requests.append(request)
 
-        runnable = RequestWorker(request, self._timeout)
+        if isinstance(request, DownloadQueueItem):
+            runnable = DownloadWorker(request, self._timeout, self.profiler)
+            runnable.signals.progress.connect(self.download_progress)
+        else:
+            runnable = RequestWorker(request, self._timeout, self.profiler)
         runnable.signals.response.connect(self._handle_response)
         runnable.signals.exception.connect(self._handle_exception)
         self._threadpool.start(runnable)
@@ -200,8 +459,9 @@ class RequestHandler(QObject):
             request (RequestQueueItem): Request to enqueue.
         """
         # Method to enqueue a request
+        request.timings = {ENQUEUED: time.perf_counter()}
         self._request_queue.append(request)
-        self._request_queue.sort()
+        self._request_queue.sort(key=_queue_order)
         self._logger.debug(f"Enqueued request for {request.url}")
         self._start_next_request()
 
@@ -213,10 +473,12 @@ class RequestHandler(QObject):
             requests (list[RequestQueueItem]): Requests to enqueue.
         """
         urls = []
+        now = time.perf_counter()
         for request in requests:
+            request.timings = {ENQUEUED: now}
             self._request_queue.append(request)
             urls.append(request.url)
-        self._request_queue.sort()
+        self._request_queue.sort(key=_queue_order)
 
         urls_log = "\n".join(urls)
         self._logger.debug(f"Enqueued {len(requests)} requests:\n{urls_log}")
@@ -249,6 +511,23 @@ class RequestHandler(QObject):
         ongoing = self._get_ongoing_requests(priority, extra_data)
         return queued, ongoing
 
+    def request_counts(self, key: str) -> tuple[int, int]:
+        """Get the number of queued and ongoing requests with a value of FAIR_QUEUE_KEY
+        (e.g. the requests of a scraper).
+
+        Returns:
+            tuple[int, int]: Number of queued requests, and number of ongoing requests.
+        """
+        queued = sum(
+            request.extra_data.get(self.FAIR_QUEUE_KEY) == key
+            for request in self._request_queue
+        )
+        ongoing = sum(
+            request.extra_data.get(self.FAIR_QUEUE_KEY) == key
+            for request in self._ongoing_requests
+        )
+        return queued, ongoing
+
     def clear_requests(self, priority=-1, extra_data={}):
         if priority == -1:
             self._request_queue.clear()
@@ -261,7 +540,7 @@ class RequestHandler(QObject):
             for request in self._request_queue
             if not self._priority_and_data_match(request, priority, extra_data)
         ]
-        self._request_queue.sort()
+        self._request_queue.sort(key=_queue_order)
 
         self._ongoing_requests = [
             request
@@ -362,14 +641,28 @@ class RequestHandler(QObject):
 
         self._ongoing_requests.remove(request)
 
-        self._response_cache[response.url] = _CachedResponse(response)
+        # Downloads have no content to reuse, so they are never cached
+        if isinstance(request, DownloadQueueItem):
+            size = request.bytes_written
+        else:
+            self._response_cache[response.url] = _CachedResponse(response)
+            size = len(response.content)
+        outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+        self.stats.record(request, outcome, size)
 
         self._process_response(request, response)
 
-    @pyqtSlot(Exception)
-    def _handle_exception(self, exception: Exception):
+    @pyqtSlot(RequestQueueItem, Exception)
+    def _handle_exception(self, request: RequestQueueItem, exception: Exception):
         self._logger.error(f"Request worker exception: {exception}")
 
+        if request not in self._ongoing_requests:
+            return
+        self._ongoing_requests.remove(request)
+        self.stats.record(request, "failed")
+        if self.running:
+            self.request_failed.emit(request)
+
     def _process_response(self, request: RequestQueueItem, response: requests.Response):
         """Process a response from a request worker or the cache.
 
@@ -379,12 +672,16 @@ class RequestHandler(QObject):
         """
         if not response:
             self._logger.error(f"Failed to get response for {request.url}.")
+            if self.running:
+                self.request_failed.emit(request)
             return
 
         if response.status_code != 200:
             self._logger.error(
                 f"Received non-200 status code for {request.url}: {response.status_code}"
             )
+            if self.running:
+                self.request_failed.emit(request)
             return
 
         # Cache and emit the response
@@ -0,0 +1,285 @@
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+import json
+import logging
+from pathlib import Path
+import re
+from threading import Lock
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+# Stages in the lifecycle of a request, in order. Each is timestamped (with
+# time.perf_counter()) in the request's timings when it is reached.
+ENQUEUED = "enqueued"
+DEQUEUED = "dequeued"
+SENT = "sent"
+FIRST_BYTE = "first_byte"
+COMPLETED = "completed"
+CALLBACK_FINISHED = "callback_finished"
+
+# Intervals measured for each request. key: interval name, value: start and end stages
+INTERVALS = {
+    "queued": (ENQUEUED, DEQUEUED),
+    "dispatch": (DEQUEUED, SENT),
+    "first_byte": (SENT, FIRST_BYTE),
+    "transfer": (FIRST_BYTE, COMPLETED),
+    "total": (ENQUEUED, COMPLETED),
+    "callback": (COMPLETED, CALLBACK_FINISHED),
+}
+
+# Upper bounds of the histogram buckets, in milliseconds. The last bucket has no upper bound.
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+_NUMBER = re.compile(r"\d+")
+
+
+def url_pattern(url: str) -> str:
+    """Get the pattern of a URL that requests are grouped by: its path, with every number
+    replaced by {n}, followed by the names of its query parameters. The host and the values of
+    query parameters are left out, so e.g. every case document request shares a pattern."""
+    parts = urlsplit(url)
+    pattern = _NUMBER.sub("{n}", parts.path) or "/"
+    keys = sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    if keys:
+        pattern += "?" + "&".join(keys)
+    return pattern
+
+
+class Histogram:
+    """Counts of durations in fixed, roughly logarithmic buckets (see BUCKET_BOUNDS_MS)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """Estimate a percentile (0-100) as the upper bound of the bucket it falls in,
+        clamped to the largest duration seen."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, count in zip((*BUCKET_BOUNDS_MS, self.max), self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "min_ms": self.min if self.count else 0.0,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": {
+                f"<={bound}" if i < len(BUCKET_BOUNDS_MS) else f">{BUCKET_BOUNDS_MS[-1]}": count
+                for i, (bound, count) in enumerate(
+                    zip((*BUCKET_BOUNDS_MS, None), self.counts)
+                )
+                if count
+            },
+        }
+
+
+class _Group:
+    """Histograms of each interval, and outcome counts, of a group of requests."""
+
+    def __init__(self):
+        self.intervals: dict[str, Histogram] = {}
+        self.outcomes: dict[str, int] = {}
+        self.bytes = 0
+
+    def merge(self, other: "_Group"):
+        for name, histogram in other.intervals.items():
+            self.intervals.setdefault(name, Histogram()).merge(histogram)
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+        self.bytes += other.bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "outcomes": dict(self.outcomes),
+            "bytes": self.bytes,
+            "intervals": {
+                name: self.intervals[name].to_dict()
+                for name in INTERVALS
+                if name in self.intervals
+            },
+        }
+
+
+class RequestStats:
+    """Timing and throughput statistics of the requests sent by a request handler.
+
+    Requests are recorded once they complete, fail, or are answered from the response cache,
+    and again once their callback has finished. Durations are aggregated into histograms by
+    priority and by URL pattern, separately for each scrape (the value of the requests'
+    "scrape" extra data), so a snapshot can cover every request or only those of one scrape.
+    Requests complete in the request handler's thread and callbacks finish in the scrapers'
+    threads, so every access is locked.
+    """
+
+    THROUGHPUT_WINDOW = 10  # Seconds of completed requests that throughput is measured over
+
+    def __init__(self):
+        self._lock = Lock()
+        # key: (scrape, "priority" or "pattern", priority or URL pattern)
+        self._groups: dict[tuple[str | None, str, str], _Group] = {}
+        # Completion time, size and scrape of the requests completed within the throughput window
+        self._recent: deque[tuple[float, int, str | None]] = deque()
+        self._started = datetime.now()
+        # Directory that snapshots are dumped to. Dumps are skipped if None.
+        self.dump_dir: Path | None = None
+
+    def _groups_of(self, request) -> list[_Group]:
+        scrape = request.extra_data.get("scrape")
+        keys = (
+            (scrape, "priority", str(request.priority)),
+            (scrape, "pattern", url_pattern(request.url)),
+        )
+        return [self._groups.setdefault(key, _Group()) for key in keys]
+
+    def record(self, request, outcome: str, size: int = 0):
+        """Record the intervals of a request that has finished, except its callback.
+
+        Args:
+            request (RequestQueueItem): Request with its lifecycle timings.
+            outcome (str): How the request finished (e.g. "ok", "failed" or "cached").
+            size (int, optional): Size of the response body in bytes. Defaults to 0.
+        """
+        durations = self._durations(request, exclude=("callback",))
+        with self._lock:
+            for group in self._groups_of(request):
+                for name, ms in durations.items():
+                    group.intervals.setdefault(name, Histogram()).add(ms)
+                group.outcomes[outcome] = group.outcomes.get(outcome, 0) + 1
+                group.bytes += size
+
+            now = time.perf_counter()
+            self._recent.append((now, size, request.extra_data.get("scrape")))
+            self._trim_recent(now)
+
+    def record_callback(self, request):
+        """Mark the callback of a request as finished and record its duration."""
+        request.timings[CALLBACK_FINISHED] = time.perf_counter()
+        durations = self._durations(request, include=("callback",))
+        if not durations:
+            return
+        with self._lock:
+            for group in self._groups_of(request):
+                group.intervals.setdefault("callback", Histogram()).add(
+                    durations["callback"]
+                )
+
+    def _durations(self, request, include=INTERVALS, exclude=()) -> dict[str, float]:
+        """Get the duration in milliseconds of each interval of a request whose start and end
+        stages were both reached."""
+        timings = request.timings
+        durations = {}
+        for name in include:
+            start, end = INTERVALS[name]
+            if name not in exclude and start in timings and end in timings:
+                durations[name] = max(timings[end] - timings[start], 0.0) * 1000
+        return durations
+
+    def _trim_recent(self, now: float):
+        while self._recent and now - self._recent[0][0] > self.THROUGHPUT_WINDOW:
+            self._recent.popleft()
+
+    def throughput(self, scrape: str = None) -> tuple[float, float]:
+        """Get the requests and bytes completed per second over the throughput window.
+
+        Args:
+            scrape (str, optional): Only include the requests of this scrape. Defaults to
+                None, which includes every request.
+        """
+        with self._lock:
+            self._trim_recent(time.perf_counter())
+            sizes = [
+                size
+                for _, size, request_scrape in self._recent
+                if scrape is None or request_scrape == scrape
+            ]
+        return len(sizes) / self.THROUGHPUT_WINDOW, sum(sizes) / self.THROUGHPUT_WINDOW
+
+    def snapshot(self, scrape: str = None) -> dict:
+        """Get the statistics as a JSON-serializable dictionary.
+
+        Args:
+            scrape (str, optional): Only include the requests of this scrape. Defaults to
+                None, which includes every request.
+        """
+        requests_per_sec, bytes_per_sec = self.throughput(scrape)
+        merged = {"priority": {}, "pattern": {}}
+        with self._lock:
+            for (group_scrape, kind, name), group in self._groups.items():
+                if scrape is None or group_scrape == scrape:
+                    merged[kind].setdefault(name, _Group()).merge(group)
+
+        return {
+            "since": self._started.isoformat(timespec="seconds"),
+            "scrape": scrape,
+            "throughput": {
+                "window_s": self.THROUGHPUT_WINDOW,
+                "requests_per_s": requests_per_sec,
+                "bytes_per_s": bytes_per_sec,
+            },
+            "by_priority": {
+                name: group.to_dict()
+                for name, group in sorted(merged["priority"].items(), key=lambda i: int(i[0]))
+            },
+            "by_pattern": {
+                name: group.to_dict() for name, group in sorted(merged["pattern"].items())
+            },
+        }
+
+    def dump(self, name: str, scrape: str = None) -> Path | None:
+        """Write a snapshot to a timestamped JSON file in dump_dir.
+
+        Args:
+            name (str): Name the file starts with.
+            scrape (str, optional): Only include the requests of this scrape. Defaults to None.
+
+        Returns:
+            Path | None: Path of the file, or None if there is no dump directory or it could
+                not be written.
+        """
+        if self.dump_dir is None:
+            return None
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = Path(self.dump_dir) / f"{name}_{timestamp}.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(scrape), f, indent=4)
+        except OSError as e:
+            logging.getLogger(__name__).error(f"Failed to write request stats to '{path}': {e}")
+            return None
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._groups.clear()
+            self._recent.clear()
+            self._started = datetime.now()
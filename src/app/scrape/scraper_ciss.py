@@ -1,11 +1,10 @@
 from datetime import datetime
+import logging
 import textwrap
 from bs4 import BeautifulSoup
-import numpy as np
 from requests import Response
 import json
 from collections import defaultdict, namedtuple
-from fuzzywuzzy import fuzz
 
 from app.scrape import (
     BaseScraper,
@@ -13,13 +12,18 @@ from app.scrape import (
     Priority,
     FieldNames,
     RequestHandler,
+    CaseImage,
+    CaseLedger,
+    FuzzyMatcher,
 )
 from app.resources import payload_CISS
-from app.models import Event
+from app.models import Event, compute_event_metrics
+from app.models.derived_metrics import KG_TO_LBS
 
 
 class ScraperCISS(BaseScraper):
 
+    database = "CISS"
     search_url = "/CISS/SearchFilter"
     models_url = "/SCI/GetvPICVehicleModelbyMake/"
     case_url = "/CISS/Details?Study=CISS&CaseId={case_id}"
@@ -52,8 +56,9 @@ class ScraperCISS(BaseScraper):
         secondary_damage,
         min_dv,
         max_dv,
+        case_ledger: CaseLedger = None,
     ):
-        super().__init__(req_handler)
+        super().__init__(req_handler, case_ledger)
 
         self._payload = payload_CISS.copy()
 
@@ -68,6 +73,19 @@ class ScraperCISS(BaseScraper):
         self._min_dv = min_dv
         self._max_dv = max_dv
 
+        # The same makes, models and damage planes repeat across cases, so the matchers are
+        # built once per scrape and remember every string they have already scored
+        self._make_matcher = FuzzyMatcher(self._make.text, self._fuzz_threshold)
+        self._model_matcher = FuzzyMatcher(
+            self._model.text, self._fuzz_threshold, match_all=self._model.value == -1
+        )
+        self._damage_matcher = FuzzyMatcher(
+            self._primary_damage.text,
+            self._fuzz_threshold,
+            case_sensitive=True,
+            match_all=self._primary_damage.value == -1,
+        )
+
         # The CISS payload requires a list of years as opposed to a range between two years,
         # so we need to convert the range to a list, but only if the years are valid.
         # Some of the possible year options are 9999, 9998, and -1, which are not valid years.
@@ -113,6 +131,49 @@ class ScraperCISS(BaseScraper):
 
         self._payload.update(payload)
 
+    @classmethod
+    def find_images(
+        cls, response: Response, case_id: int, vehicle_num: int, img_sets: list[str]
+    ) -> list[CaseImage]:
+        logger = logging.getLogger(__name__)
+        json_data: dict = response.json()
+        photos = json_data.get("Photos")
+
+        if not photos:
+            logger.debug("No photos found.")
+            return []
+
+        veh_photos = []
+        for photo in photos:
+            if int(photo.get("VehNum")) == vehicle_num:
+                veh_photos.append(photo)
+
+        if not veh_photos:
+            logger.warning(
+                f"No photos found for vehicle '{vehicle_num}' of case '{case_id}'."
+            )
+            return []
+
+        sorted_photos = defaultdict(list)
+        for photo in veh_photos:
+            dmg_text = photo.get("SubTypeText", "")
+            dmg_text = dmg_text.lower().replace(" ", "").replace("plane", "")
+            sorted_photos[dmg_text].append(photo)
+
+        images = []
+        for img_set in img_sets:
+            for photo in sorted_photos.get(img_set.lower(), []):
+                obj_id = photo.get("ObjectId")
+                images.append(
+                    CaseImage(
+                        img_id=obj_id,
+                        img_set=img_set,
+                        url=cls.endpoint_url("image", cls.img_url.format(obj_id=obj_id)),
+                    )
+                )
+
+        return images
+
     def _scrape(self):
         self._logger.info(
             textwrap.dedent(
@@ -133,24 +194,18 @@ class ScraperCISS(BaseScraper):
         self._req_case_list()
 
     def _req_case_list(self):
+        self.pages_requested += 1
         self.enqueue_request.emit(
             RequestQueueItem(
-                self.ROOT + self.case_list_url,
+                self.endpoint_url("case_list", self.case_list_url),
                 method="GET",
                 params=self._payload,
                 priority=Priority.CASE_LIST.value,
                 callback=self._parse_case_list,
-                extra_data={"database": "CISS"},
+                extra_data=self._extra_data(),
             )
         )
 
-    def _handle_response(self, request: RequestQueueItem, response: Response):
-        if (
-            request.priority == Priority.CASE_LIST.value
-            or request.priority == Priority.CASE.value
-        ) and request.extra_data.get("database") == "CISS":
-            request.callback(request, response)
-
     def _parse_case_list(self, request: RequestQueueItem, response: Response):
         if not self.running:
             return
@@ -160,6 +215,7 @@ class ScraperCISS(BaseScraper):
                 f"Received empty response from {request.url}. Ending scrape..."
             )
             return
+        self.pages_fetched += 1
 
         soup = BeautifulSoup(response.content, "html.parser")
 
@@ -183,17 +239,7 @@ class ScraperCISS(BaseScraper):
             f"Requesting {len(case_ids)} case{'s'[:len(case_ids)^1]} from page {self.current_page}..."
         )
 
-        requests = []
-        for case_id in case_ids:
-            requests.append(
-                RequestQueueItem(
-                    self.ROOT + self.case_url_raw.format(case_id=case_id),
-                    priority=Priority.CASE.value,
-                    callback=self.__parse_case,
-                    extra_data={"database": "CISS"},
-                )
-            )
-        self.batch_enqueue.emit(requests)
+        self._request_cases(case_ids)
 
         self.current_page += 1
         self._payload["currentPage"] = self.current_page
@@ -201,7 +247,7 @@ class ScraperCISS(BaseScraper):
 
         self._req_case_list()
 
-    def __parse_case(self, request: RequestQueueItem, response: Response):
+    def _parse_case(self, request: RequestQueueItem, response: Response):
         if not self.running:
             return
 
@@ -212,30 +258,12 @@ class ScraperCISS(BaseScraper):
             self.failed_cases += 1
             return
 
+        self._store_case(request, response)
+
         case_json: dict = json.loads(response.content)
 
         # TODO: Implement more robust checks for matching vehicle numbers
 
-        def make_match(vehicle: dict):
-            """Check if the make of the scraped vehicle matches the "make" scrape parameter."""
-            make = vehicle.get("VPICMakeDesc", "") or vehicle.get("MakeDesc", "")
-            return (
-                fuzz.partial_ratio(make.lower(), self._make.text.lower())
-                >= self._fuzz_threshold
-            )
-
-        def model_match(vehicle: dict):
-            """
-            Check if the model of the scraped vehicle matches the "model" scrape parameter.
-            Make an exception if the model is not specified in the scrape parameters
-            """
-            model = vehicle.get("VPICModelDesc", "") or vehicle.get("ModelDesc", "")
-            return (
-                fuzz.partial_ratio(model.lower(), self._model.text.lower())
-                >= self._fuzz_threshold
-                or self._model.value == -1
-            )
-
         def year_match(vehicle: dict):
             """
             Check if the year of the scraped vehicle falls within the range specified in the "model year" scrape parameters.
@@ -247,8 +275,21 @@ class ScraperCISS(BaseScraper):
             []
         )  # Getting multiple matching vehicles in the same case is seemingly very rare, but possible
         vehicles: list[dict] = case_json.get("Vehicles", [])
-        for vehicle in vehicles:
-            if make_match(vehicle) and model_match(vehicle) and year_match(vehicle):
+
+        # Check the make and model of every vehicle in the case at once.
+        # The model matcher matches everything if no model was specified in the scrape parameters.
+        make_matches = self._make_matcher.match_many(
+            vehicle.get("VPICMakeDesc", "") or vehicle.get("MakeDesc", "")
+            for vehicle in vehicles
+        )
+        model_matches = self._model_matcher.match_many(
+            vehicle.get("VPICModelDesc", "") or vehicle.get("ModelDesc", "")
+            for vehicle in vehicles
+        )
+        for vehicle, make_match, model_match in zip(
+            vehicles, make_matches, model_matches
+        ):
+            if make_match and model_match and year_match(vehicle):
                 vehicle_nums.append(vehicle["VEHNUM"])
 
         case_id = case_json.get("CaseId", -1)
@@ -262,29 +303,26 @@ class ScraperCISS(BaseScraper):
 
         self._logger.debug(f"Vehicle numbers: {vehicle_nums}")
 
+        # JSON does not carry the damage IDs, so we need to match the damage planes.
+        # The strings may not be exactly the same, so we use fuzzy matching here.
+        events: list[dict] = case_json.get("Events", [])
+        primary_dmg_matches = self._damage_matcher.match_many(
+            event["AreaDamageDesc"] for event in events
+        )
+        contacted_dmg_matches = self._damage_matcher.match_many(
+            event["VehContactDamageDesc"] for event in events
+        )
+
         key_events = []
-        for event in case_json.get("Events", []):
+        for event, primary_dmg_match, contacted_dmg_match in zip(
+            events, primary_dmg_matches, contacted_dmg_matches
+        ):
             primary_veh_num = event["VehNum"]
             alt_veh_num = -1
             alt_veh_desc = event["ObjectContactDesc"]
             if event["ObjectContactClassDesc"] == "Vehicle":
                 alt_veh_num = int(alt_veh_desc[-1])
 
-            primary_veh_dmg = event["AreaDamageDesc"]
-            alt_veh_dmg = event["VehContactDamageDesc"]
-
-            # JSON does not carry the damage IDs, so we need to match the damage planes
-            # The strings may not be exactly the same, so we use fuzzy matching here
-            primary_dmg_match = (
-                fuzz.partial_ratio(self._primary_damage.text, primary_veh_dmg)
-                >= self._fuzz_threshold
-            ) or self._primary_damage.value == -1
-
-            contacted_dmg_match = (
-                fuzz.partial_ratio(self._primary_damage.text, alt_veh_dmg)
-                >= self._fuzz_threshold
-            ) or self._primary_damage.value == -1
-
             # voi = vehicle of interest
             for voi in vehicle_nums:
                 formatted_event = {
@@ -387,10 +425,6 @@ class ScraperCISS(BaseScraper):
                 failed_events += 1
                 continue
 
-            CM_TO_IN = 0.393701
-            KMPH_TO_MPH = 0.621371
-            KG_TO_LBS = 2.20462
-
             voi_curb_wgt = int(
                 veh_forms[event["voi"]]["Vehicle"]["CurbWt"].split(" ")[0]
             )  # in kgs
@@ -418,21 +452,11 @@ class ScraperCISS(BaseScraper):
                     "a_dmg_loc": "--",
                 }
 
-            c_bar = CM_TO_IN * ((crush[0] + crush[5]) * 0.5 + sum(crush[1:5])) / 5
-
-            NASS_dv = total_dv * KMPH_TO_MPH
-
             voi_curb_wgt = voi_curb_wgt * KG_TO_LBS
-            a_curb_wgt = alt_data["a_curb_wgt"]
-            NASS_vc = NASS_dv / (a_curb_wgt / (voi_curb_wgt + a_curb_wgt))
-
-            # 0.5992 * e^( -0.1125 * NASS_vc + 0.003889 * NASS_vc^2 - 0.0001153 * NASS_vc^3 )
-            e = 0.5992 * np.exp(
-                -0.1125 * NASS_vc + 0.003889 * NASS_vc**2 - 0.0001153 * NASS_vc**3
+            metrics = compute_event_metrics(
+                crush, total_dv, voi_curb_wgt, alt_data["a_curb_wgt"]
             )
-            TOT_dv = NASS_dv * (1.0 + e)
 
-            vehicle
             voi_form = veh_forms[event["voi"]]["Vehicle"]
             self.event_parsed.emit(
                 Event(
@@ -466,11 +490,7 @@ class ScraperCISS(BaseScraper):
                     a_year=alt_data["a_year"],
                     a_curb_wgt=round(alt_data["a_curb_wgt"], 2),
                     a_dmg_loc=alt_data["a_dmg_loc"],
-                    c_bar=round(c_bar, 6),
-                    NASS_dv=round(NASS_dv, 6),
-                    NASS_vc=round(NASS_vc, 6),
-                    e=round(e, 6),
-                    TOT_dv=round(TOT_dv, 6),
+                    **metrics,
                 ),
                 response,
             )
@@ -1,24 +1,26 @@
 from collections import namedtuple
+import logging
 import textwrap
 from bs4 import BeautifulSoup
-import numpy as np
 from requests import Response
 
-from PyQt6.QtCore import pyqtSlot
-
 from app.scrape import (
     RequestQueueItem,
     BaseScraper,
     Priority,
     FieldNames,
     RequestHandler,
+    CaseImage,
+    CaseLedger,
 )
 from app.resources import payload_NASS
-from app.models import Event
+from app.models import Event, compute_event_metrics
+from app.models.derived_metrics import KG_TO_LBS
 
 
 class ScraperNASS(BaseScraper):
 
+    database = "NASS"
     search_url = "/LegacyCDS/Search"
     models_url = "/LegacyCDS/GetVehicleModels/"
     case_url = "/nass-cds/CaseForm.aspx?xsl=main.xsl&CaseID={case_id}"
@@ -28,6 +30,8 @@ class ScraperNASS(BaseScraper):
     case_list_url = "/LegacyCDS"
     img_url = "/nass-cds/GetBinary.aspx?Image&ImageID={img_id}&CaseID={case_id}&Version={version}"
     edr_url = "/nass-cds/CaseForm.aspx?ViewPage&xsl=VE.xsl&tab=EDR&form=VehicleExteriorForms&baseNode=&vehnum={veh_num}&occnum=-1&pos={edr_id}&pos2=-1&websrc=true&title=Vehicle%20%20Exterior%20-%20EDR&caseid={case_id}&year=&fullimage=false"
+    # Image requests need the session cookie set with the case document, which expires
+    image_document_max_age = 900
 
     # NASS-specific dropdown field ids
     field_names = FieldNames(
@@ -52,8 +56,9 @@ class ScraperNASS(BaseScraper):
         secondary_damage,
         min_dv,
         max_dv,
+        case_ledger: CaseLedger = None,
     ):
-        super().__init__(req_handler)
+        super().__init__(req_handler, case_ledger)
 
         self._payload = payload_NASS.copy()
 
@@ -85,6 +90,54 @@ class ScraperNASS(BaseScraper):
 
         self._payload.update(payload)
 
+    @classmethod
+    def find_images(
+        cls, response: Response, case_id: int, vehicle_num: int, img_sets: list[str]
+    ) -> list[CaseImage]:
+        logger = logging.getLogger(__name__)
+        soup = BeautifulSoup(response.content, "xml")
+        img_form = soup.find("IMGForm")
+        cookie = response.headers.get("Set-Cookie", "")
+
+        if not img_form:
+            logger.debug("No ImgForm found.")
+            return []
+
+        veh_img_form = img_form.find("Vehicle", {"VehicleNumber": {vehicle_num}})
+        if not veh_img_form:
+            logger.warning(
+                f"Image form for vehicle '{vehicle_num}' of case '{case_id}' not found."
+            )
+            return []
+
+        images = []
+        for img_set in img_sets:
+            img_area_form = veh_img_form.find(img_set)
+            if not img_area_form:
+                logger.debug(f"Image area form '{img_set}' not found.")
+                continue
+
+            for img_element in img_area_form.find_all("image"):
+                img_element: BeautifulSoup
+                img_id = int(img_element.text)
+                images.append(
+                    CaseImage(
+                        img_id=img_id,
+                        img_set=img_set,
+                        url=cls.endpoint_url(
+                            "image",
+                            cls.img_url.format(
+                                img_id=img_id,
+                                case_id=case_id,
+                                version=img_element["version"],
+                            ),
+                        ),
+                        headers={"Cookie": cookie},
+                    )
+                )
+
+        return images
+
     def _scrape(self):
         self._logger.info(
             textwrap.dedent(
@@ -105,24 +158,17 @@ class ScraperNASS(BaseScraper):
         self._req_case_list()
 
     def _req_case_list(self):
+        self.pages_requested += 1
         self.enqueue_request.emit(
             RequestQueueItem(
-                self.ROOT + self.case_list_url,
+                self.endpoint_url("case_list", self.case_list_url),
                 params=self._payload,
                 priority=Priority.CASE_LIST.value,
                 callback=self._parse_case_list,
-                extra_data={"database": "NASS"},
+                extra_data=self._extra_data(),
             )
         )
 
-    @pyqtSlot(RequestQueueItem, Response)
-    def _handle_response(self, request: RequestQueueItem, response: Response):
-        if (
-            request.priority == Priority.CASE_LIST.value
-            or request.priority == Priority.CASE.value
-        ) and request.extra_data.get("database") == "NASS":
-            request.callback(request, response)
-
     def _parse_case_list(self, request: RequestQueueItem, response: Response):
         if not self.running:
             return
@@ -132,6 +178,7 @@ class ScraperNASS(BaseScraper):
                 f"Received empty response from {request.url}. Ending scrape..."
             )
             return
+        self.pages_fetched += 1
 
         soup = BeautifulSoup(response.content, "html.parser")
 
@@ -155,17 +202,7 @@ class ScraperNASS(BaseScraper):
         self._logger.info(
             f"Requesting {len(case_ids)} case{'s'[:len(case_ids)^1]} from page {self.current_page}..."
         )
-        requests = []
-        for case_id in case_ids:
-            requests.append(
-                RequestQueueItem(
-                    self.ROOT + self.case_url_raw.format(case_id=case_id),
-                    priority=Priority.CASE.value,
-                    callback=self._parse_case,
-                    extra_data={"database": "NASS"},
-                )
-            )
-        self.batch_enqueue.emit(requests)
+        self._request_cases(case_ids)
 
         self.current_page += 1
         self._payload["currentPage"] = self.current_page
@@ -184,6 +221,8 @@ class ScraperNASS(BaseScraper):
             self.failed_cases += 1
             return
 
+        self._store_case(request, response)
+
         case_xml = BeautifulSoup(response.content, "xml")
         case_id = case_xml.find("CaseForm").get("caseID")
 
@@ -362,10 +401,6 @@ class ScraperNASS(BaseScraper):
                 )
             )
 
-            CM_TO_IN = 0.393701
-            KMPH_TO_MPH = 0.621371
-            KG_TO_LBS = 2.20462
-
             voi_curb_wgt = int(veh_ext_form.find("CurbWeight").text)
             if alt_ext_form:
                 a_curb_wgt = alt_ext_form.find("CurbWeight").text
@@ -395,20 +430,11 @@ class ScraperNASS(BaseScraper):
                     "a_dmg_loc": "--",
                 }
 
-            # Avg crush (converted to inches)
-            c_bar = CM_TO_IN * ((crush[0] + crush[5]) * 0.5 + sum(crush[1:5])) / 5
-
-            # NASS DV
-            NASS_dv = float(total_dv) * KMPH_TO_MPH  # Convert to mph
-
             voi_curb_wgt *= KG_TO_LBS  # Convert to lbs
             a_curb_wgt = alt_data["a_curb_wgt"]
-            NASS_vc = NASS_dv / (a_curb_wgt / (voi_curb_wgt + a_curb_wgt))
-
-            e = 0.5992 * np.exp(
-                -0.1125 * NASS_vc + 0.003889 * NASS_vc**2 - 0.0001153 * NASS_vc**3
+            metrics = compute_event_metrics(
+                crush, float(total_dv), voi_curb_wgt, a_curb_wgt
             )
-            TOT_dv = NASS_dv * (1.0 + e)
 
             self.event_parsed.emit(
                 Event(
@@ -442,11 +468,7 @@ class ScraperNASS(BaseScraper):
                     a_year=alt_data["a_year"],
                     a_curb_wgt=round(a_curb_wgt, 2),
                     a_dmg_loc=alt_data["a_dmg_loc"],
-                    c_bar=round(c_bar, 6),
-                    NASS_dv=round(NASS_dv, 6),
-                    NASS_vc=round(NASS_vc, 6),
-                    e=round(e, 6),
-                    TOT_dv=round(TOT_dv, 6),
+                    **metrics,
                 ),
                 response,
             )
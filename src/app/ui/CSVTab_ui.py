@@ -17,10 +17,16 @@ class Ui_CSVTab(object):
         self.gridLayout.setObjectName("gridLayout")
         self.tableView = QtWidgets.QTableView(parent=CSVTab)
         self.tableView.setObjectName("tableView")
-        self.gridLayout.addWidget(self.tableView, 1, 0, 1, 1)
+        self.gridLayout.addWidget(self.tableView, 1, 0, 1, 3)
         self.saveBtn = QtWidgets.QPushButton(parent=CSVTab)
         self.saveBtn.setObjectName("saveBtn")
         self.gridLayout.addWidget(self.saveBtn, 0, 0, 1, 1)
+        self.formatCombo = QtWidgets.QComboBox(parent=CSVTab)
+        self.formatCombo.setObjectName("formatCombo")
+        self.gridLayout.addWidget(self.formatCombo, 0, 1, 1, 1)
+        self.gzipCheckBox = QtWidgets.QCheckBox(parent=CSVTab)
+        self.gzipCheckBox.setObjectName("gzipCheckBox")
+        self.gridLayout.addWidget(self.gzipCheckBox, 0, 2, 1, 1)
 
         self.retranslateUi(CSVTab)
         QtCore.QMetaObject.connectSlotsByName(CSVTab)
@@ -29,3 +35,6 @@ class Ui_CSVTab(object):
         _translate = QtCore.QCoreApplication.translate
         CSVTab.setWindowTitle(_translate("CSVTab", "Form"))
         self.saveBtn.setText(_translate("CSVTab", "Save as CSV"))
+        self.formatCombo.setToolTip(_translate("CSVTab", "File format to save the events in"))
+        self.gzipCheckBox.setToolTip(_translate("CSVTab", "Save the CSV file compressed with gzip (.csv.gz)"))
+        self.gzipCheckBox.setText(_translate("CSVTab", "Compress"))
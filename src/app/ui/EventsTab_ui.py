@@ -171,6 +171,14 @@ class Ui_EventsTab(object):
         self.scrapeImgsBtn = QtWidgets.QPushButton(parent=self.imgScrapeBox)
         self.scrapeImgsBtn.setObjectName("scrapeImgsBtn")
         self.gridLayout.addWidget(self.scrapeImgsBtn, 0, 2, 1, 1)
+        self.scrapeAllImgsBtn = QtWidgets.QPushButton(parent=self.imgScrapeBox)
+        self.scrapeAllImgsBtn.setObjectName("scrapeAllImgsBtn")
+        self.gridLayout.addWidget(self.scrapeAllImgsBtn, 1, 0, 1, 1)
+        self.batchProgressBar = QtWidgets.QProgressBar(parent=self.imgScrapeBox)
+        self.batchProgressBar.setProperty("value", 0)
+        self.batchProgressBar.setTextVisible(True)
+        self.batchProgressBar.setObjectName("batchProgressBar")
+        self.gridLayout.addWidget(self.batchProgressBar, 1, 2, 1, 2)
         self.verticalLayout_2.addWidget(self.imgScrapeBox)
         self.verticalLayout_3.addWidget(self.splitter)
         self.imgWidget = QtWidgets.QWidget(parent=EventsTab)
@@ -225,3 +233,5 @@ class Ui_EventsTab(object):
         self.imgSetCombo.setPlaceholderText(_translate("EventsTab", "Image Set"))
         self.stopBtn.setText(_translate("EventsTab", "Stop Image Scrape"))
         self.scrapeImgsBtn.setText(_translate("EventsTab", "Scrape Images"))
+        self.scrapeAllImgsBtn.setToolTip(_translate("EventsTab", "Download every image set for all events that are not ignored."))
+        self.scrapeAllImgsBtn.setText(_translate("EventsTab", "Scrape All Events"))
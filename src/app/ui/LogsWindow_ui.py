@@ -15,11 +15,30 @@ class Ui_LogsWindow(object):
         LogsWindow.resize(619, 419)
         self.verticalLayout = QtWidgets.QVBoxLayout(LogsWindow)
         self.verticalLayout.setObjectName("verticalLayout")
-        self.logsEdit = QtWidgets.QTextEdit(parent=LogsWindow)
-        self.logsEdit.setStyleSheet("background-color: black; color: white;")
-        self.logsEdit.setReadOnly(True)
-        self.logsEdit.setObjectName("logsEdit")
-        self.verticalLayout.addWidget(self.logsEdit)
+        self.filterHLayout = QtWidgets.QHBoxLayout()
+        self.filterHLayout.setObjectName("filterHLayout")
+        self.levelCombo = QtWidgets.QComboBox(parent=LogsWindow)
+        self.levelCombo.setObjectName("levelCombo")
+        self.levelCombo.addItem("")
+        self.levelCombo.addItem("")
+        self.levelCombo.addItem("")
+        self.levelCombo.addItem("")
+        self.levelCombo.addItem("")
+        self.filterHLayout.addWidget(self.levelCombo)
+        self.searchEdit = QtWidgets.QLineEdit(parent=LogsWindow)
+        self.searchEdit.setClearButtonEnabled(True)
+        self.searchEdit.setObjectName("searchEdit")
+        self.filterHLayout.addWidget(self.searchEdit)
+        self.filterHLayout.setStretch(1, 1)
+        self.verticalLayout.addLayout(self.filterHLayout)
+        self.logsView = QtWidgets.QListView(parent=LogsWindow)
+        self.logsView.setStyleSheet("background-color: black; font-family: consolas;")
+        self.logsView.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.logsView.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.logsView.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.logsView.setUniformItemSizes(True)
+        self.logsView.setObjectName("logsView")
+        self.verticalLayout.addWidget(self.logsView)
         self.bottomHLayout = QtWidgets.QHBoxLayout()
         self.bottomHLayout.setObjectName("bottomHLayout")
         self.clearBtn = QtWidgets.QPushButton(parent=LogsWindow)
@@ -36,18 +55,12 @@ class Ui_LogsWindow(object):
     def retranslateUi(self, LogsWindow):
         _translate = QtCore.QCoreApplication.translate
         LogsWindow.setWindowTitle(_translate("LogsWindow", "Scrape Tool Logs"))
-        self.logsEdit.setHtml(
-            _translate(
-                "LogsWindow",
-                '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.0//EN" "http://www.w3.org/TR/REC-html40/strict.dtd">\n'
-                '<html><head><meta name="qrichtext" content="1" /><meta charset="utf-8" /><style type="text/css">\n'
-                "p, li { white-space: pre-wrap; }\n"
-                "hr { height: 1px; border-width: 0; }\n"
-                'li.unchecked::marker { content: "\\2610"; }\n'
-                'li.checked::marker { content: "\\2612"; }\n'
-                "</style></head><body style=\" font-family:'Segoe UI'; font-size:12pt; font-weight:400; font-style:normal;\">\n"
-                "<p style=\"-qt-paragraph-type:empty; margin-top:0px; margin-bottom:0px; margin-left:0px; margin-right:0px; -qt-block-indent:0; text-indent:0px; font-family:'Consolas';\"><br /></p></body></html>",
-            )
-        )
+        self.levelCombo.setToolTip(_translate("LogsWindow", "Minimum level of the logs shown"))
+        self.levelCombo.setItemText(0, _translate("LogsWindow", "DEBUG"))
+        self.levelCombo.setItemText(1, _translate("LogsWindow", "INFO"))
+        self.levelCombo.setItemText(2, _translate("LogsWindow", "WARNING"))
+        self.levelCombo.setItemText(3, _translate("LogsWindow", "ERROR"))
+        self.levelCombo.setItemText(4, _translate("LogsWindow", "CRITICAL"))
+        self.searchEdit.setPlaceholderText(_translate("LogsWindow", "Search logs..."))
         self.clearBtn.setText(_translate("LogsWindow", "Clear Logs"))
         self.saveBtn.setText(_translate("LogsWindow", "Save Logs"))
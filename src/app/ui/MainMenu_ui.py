@@ -81,6 +81,9 @@ class Ui_MainMenu(object):
         self.logsBtn = QtWidgets.QPushButton(parent=self.frame)
         self.logsBtn.setObjectName("logsBtn")
         self.mainVLayout.addWidget(self.logsBtn)
+        self.perfBtn = QtWidgets.QPushButton(parent=self.frame)
+        self.perfBtn.setObjectName("perfBtn")
+        self.mainVLayout.addWidget(self.perfBtn)
         self.settingsBtn = QtWidgets.QPushButton(parent=self.frame)
         self.settingsBtn.setObjectName("settingsBtn")
         self.mainVLayout.addWidget(self.settingsBtn)
@@ -96,4 +99,5 @@ class Ui_MainMenu(object):
         self.scrapeBtn.setText(_translate("MainMenu", "New Scrape"))
         self.openBtn.setText(_translate("MainMenu", "Open Existing Profile"))
         self.logsBtn.setText(_translate("MainMenu", "Open Application Logs"))
+        self.perfBtn.setText(_translate("MainMenu", "Open Request Performance"))
         self.settingsBtn.setText(_translate("MainMenu", "Settings"))
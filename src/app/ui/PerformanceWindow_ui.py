@@ -0,0 +1,64 @@
+# Form implementation generated from reading ui file 'c:\Users\Caden\Desktop\nhtsa-scrape\src\app\ui\PerformanceWindow.ui'
+#
+# Created by: PyQt6 UI code generator 6.7.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic6 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class Ui_PerformanceWindow(object):
+    def setupUi(self, PerformanceWindow):
+        PerformanceWindow.setObjectName("PerformanceWindow")
+        PerformanceWindow.resize(760, 440)
+        self.verticalLayout = QtWidgets.QVBoxLayout(PerformanceWindow)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.topHLayout = QtWidgets.QHBoxLayout()
+        self.topHLayout.setObjectName("topHLayout")
+        self.groupCombo = QtWidgets.QComboBox(parent=PerformanceWindow)
+        self.groupCombo.setObjectName("groupCombo")
+        self.groupCombo.addItem("")
+        self.groupCombo.addItem("")
+        self.topHLayout.addWidget(self.groupCombo)
+        self.throughputLabel = QtWidgets.QLabel(parent=PerformanceWindow)
+        self.throughputLabel.setText("")
+        self.throughputLabel.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight|QtCore.Qt.AlignmentFlag.AlignTrailing|QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.throughputLabel.setObjectName("throughputLabel")
+        self.topHLayout.addWidget(self.throughputLabel)
+        self.topHLayout.setStretch(1, 1)
+        self.verticalLayout.addLayout(self.topHLayout)
+        self.statsTree = QtWidgets.QTreeWidget(parent=PerformanceWindow)
+        self.statsTree.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.statsTree.setAlternatingRowColors(True)
+        self.statsTree.setObjectName("statsTree")
+        self.verticalLayout.addWidget(self.statsTree)
+        self.bottomHLayout = QtWidgets.QHBoxLayout()
+        self.bottomHLayout.setObjectName("bottomHLayout")
+        self.resetBtn = QtWidgets.QPushButton(parent=PerformanceWindow)
+        self.resetBtn.setObjectName("resetBtn")
+        self.bottomHLayout.addWidget(self.resetBtn)
+        self.saveBtn = QtWidgets.QPushButton(parent=PerformanceWindow)
+        self.saveBtn.setObjectName("saveBtn")
+        self.bottomHLayout.addWidget(self.saveBtn)
+        self.verticalLayout.addLayout(self.bottomHLayout)
+
+        self.retranslateUi(PerformanceWindow)
+        QtCore.QMetaObject.connectSlotsByName(PerformanceWindow)
+
+    def retranslateUi(self, PerformanceWindow):
+        _translate = QtCore.QCoreApplication.translate
+        PerformanceWindow.setWindowTitle(_translate("PerformanceWindow", "Request Performance"))
+        self.groupCombo.setToolTip(_translate("PerformanceWindow", "How requests are grouped"))
+        self.groupCombo.setItemText(0, _translate("PerformanceWindow", "By Priority"))
+        self.groupCombo.setItemText(1, _translate("PerformanceWindow", "By URL Pattern"))
+        self.statsTree.headerItem().setText(0, _translate("PerformanceWindow", "Group / Interval"))
+        self.statsTree.headerItem().setText(1, _translate("PerformanceWindow", "Count"))
+        self.statsTree.headerItem().setText(2, _translate("PerformanceWindow", "Mean (ms)"))
+        self.statsTree.headerItem().setText(3, _translate("PerformanceWindow", "p50 (ms)"))
+        self.statsTree.headerItem().setText(4, _translate("PerformanceWindow", "p90 (ms)"))
+        self.statsTree.headerItem().setText(5, _translate("PerformanceWindow", "p99 (ms)"))
+        self.statsTree.headerItem().setText(6, _translate("PerformanceWindow", "Max (ms)"))
+        self.resetBtn.setText(_translate("PerformanceWindow", "Reset Statistics"))
+        self.saveBtn.setText(_translate("PerformanceWindow", "Save Snapshot"))
@@ -31,6 +31,13 @@ class Ui_ProfileMenu(object):
         self.verticalLayout.addWidget(self.listView)
         self.bottomHLayout = QtWidgets.QHBoxLayout()
         self.bottomHLayout.setObjectName("bottomHLayout")
+        self.importBtn = QtWidgets.QPushButton(parent=ProfileMenu)
+        self.importBtn.setObjectName("importBtn")
+        self.bottomHLayout.addWidget(self.importBtn)
+        self.exportBtn = QtWidgets.QPushButton(parent=ProfileMenu)
+        self.exportBtn.setEnabled(False)
+        self.exportBtn.setObjectName("exportBtn")
+        self.bottomHLayout.addWidget(self.exportBtn)
         self.deleteBtn = QtWidgets.QPushButton(parent=ProfileMenu)
         self.deleteBtn.setEnabled(False)
         self.deleteBtn.setObjectName("deleteBtn")
@@ -39,6 +46,14 @@ class Ui_ProfileMenu(object):
         self.renameBtn.setEnabled(False)
         self.renameBtn.setObjectName("renameBtn")
         self.bottomHLayout.addWidget(self.renameBtn)
+        self.reparseBtn = QtWidgets.QPushButton(parent=ProfileMenu)
+        self.reparseBtn.setEnabled(False)
+        self.reparseBtn.setObjectName("reparseBtn")
+        self.bottomHLayout.addWidget(self.reparseBtn)
+        self.recomputeBtn = QtWidgets.QPushButton(parent=ProfileMenu)
+        self.recomputeBtn.setEnabled(False)
+        self.recomputeBtn.setObjectName("recomputeBtn")
+        self.bottomHLayout.addWidget(self.recomputeBtn)
         self.openBtn = QtWidgets.QPushButton(parent=ProfileMenu)
         self.openBtn.setEnabled(False)
         self.openBtn.setDefault(True)
@@ -54,6 +69,14 @@ class Ui_ProfileMenu(object):
         ProfileMenu.setWindowTitle(_translate("ProfileMenu", "Form"))
         self.backBtn.setText(_translate("ProfileMenu", "Back"))
         self.mainTitle.setText(_translate("ProfileMenu", "Open Existing Scrape Profile..."))
+        self.importBtn.setToolTip(_translate("ProfileMenu", "Import a profile from a bundle, or from a Parquet or Feather file saved from its data table"))
+        self.importBtn.setText(_translate("ProfileMenu", "Import..."))
+        self.exportBtn.setToolTip(_translate("ProfileMenu", "Export the profile to a bundle that can be imported into another database"))
+        self.exportBtn.setText(_translate("ProfileMenu", "Export..."))
         self.deleteBtn.setText(_translate("ProfileMenu", "Delete"))
         self.renameBtn.setText(_translate("ProfileMenu", "Rename"))
+        self.reparseBtn.setToolTip(_translate("ProfileMenu", "Rebuild the profile\'s events from its stored case documents"))
+        self.reparseBtn.setText(_translate("ProfileMenu", "Reparse"))
+        self.recomputeBtn.setToolTip(_translate("ProfileMenu", "Recompute the derived metrics of the profile\'s events, optionally with other restitution coefficients"))
+        self.recomputeBtn.setText(_translate("ProfileMenu", "Recompute Metrics..."))
         self.openBtn.setText(_translate("ProfileMenu", "Open"))
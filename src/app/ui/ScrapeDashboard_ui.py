@@ -0,0 +1,84 @@
+# Form implementation generated from reading ui file 'c:\Users\Caden\Desktop\nhtsa-scrape\src\app\ui\ScrapeDashboard.ui'
+#
+# Created by: PyQt6 UI code generator 6.7.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic6 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class Ui_ScrapeDashboard(object):
+    def setupUi(self, ScrapeDashboard):
+        ScrapeDashboard.setObjectName("ScrapeDashboard")
+        ScrapeDashboard.resize(900, 260)
+        self.verticalLayout = QtWidgets.QVBoxLayout(ScrapeDashboard)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.scrapesTable = QtWidgets.QTableWidget(parent=ScrapeDashboard)
+        self.scrapesTable.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.scrapesTable.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.NoSelection)
+        self.scrapesTable.setObjectName("scrapesTable")
+        self.scrapesTable.setColumnCount(11)
+        self.scrapesTable.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(2, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(3, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(4, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(5, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(6, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(7, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(8, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(9, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.scrapesTable.setHorizontalHeaderItem(10, item)
+        self.scrapesTable.horizontalHeader().setStretchLastSection(True)
+        self.scrapesTable.verticalHeader().setVisible(False)
+        self.verticalLayout.addWidget(self.scrapesTable)
+        self.summaryLabel = QtWidgets.QLabel(parent=ScrapeDashboard)
+        self.summaryLabel.setText("")
+        self.summaryLabel.setObjectName("summaryLabel")
+        self.verticalLayout.addWidget(self.summaryLabel)
+
+        self.retranslateUi(ScrapeDashboard)
+        QtCore.QMetaObject.connectSlotsByName(ScrapeDashboard)
+
+    def retranslateUi(self, ScrapeDashboard):
+        _translate = QtCore.QCoreApplication.translate
+        ScrapeDashboard.setWindowTitle(_translate("ScrapeDashboard", "Scrape Progress"))
+        item = self.scrapesTable.horizontalHeaderItem(0)
+        item.setText(_translate("ScrapeDashboard", "Scrape"))
+        item = self.scrapesTable.horizontalHeaderItem(1)
+        item.setText(_translate("ScrapeDashboard", "Pages"))
+        item.setToolTip(_translate("ScrapeDashboard", "Case list pages fetched / requested"))
+        item = self.scrapesTable.horizontalHeaderItem(2)
+        item.setText(_translate("ScrapeDashboard", "Cases Found"))
+        item = self.scrapesTable.horizontalHeaderItem(3)
+        item.setText(_translate("ScrapeDashboard", "Queued"))
+        item.setToolTip(_translate("ScrapeDashboard", "Requests waiting in the request queue"))
+        item = self.scrapesTable.horizontalHeaderItem(4)
+        item.setText(_translate("ScrapeDashboard", "In Flight"))
+        item = self.scrapesTable.horizontalHeaderItem(5)
+        item.setText(_translate("ScrapeDashboard", "Done"))
+        item = self.scrapesTable.horizontalHeaderItem(6)
+        item.setText(_translate("ScrapeDashboard", "Failed"))
+        item = self.scrapesTable.horizontalHeaderItem(7)
+        item.setText(_translate("ScrapeDashboard", "Events"))
+        item = self.scrapesTable.horizontalHeaderItem(8)
+        item.setText(_translate("ScrapeDashboard", "Requests/s"))
+        item = self.scrapesTable.horizontalHeaderItem(9)
+        item.setText(_translate("ScrapeDashboard", "Avg Latency (ms)"))
+        item = self.scrapesTable.horizontalHeaderItem(10)
+        item.setText(_translate("ScrapeDashboard", "ETA"))
+        item.setToolTip(_translate("ScrapeDashboard", "Estimated time to finish the cases found so far, at the current request rate"))
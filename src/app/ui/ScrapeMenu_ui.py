@@ -303,6 +303,13 @@ class Ui_ScrapeMenu(object):
         self.multiCheckBox = QtWidgets.QCheckBox(parent=self.bottomHLayout)
         self.multiCheckBox.setObjectName("multiCheckBox")
         self.horizontalLayout_2.addWidget(self.multiCheckBox)
+        self.interleaveCheckBox = QtWidgets.QCheckBox(parent=self.bottomHLayout)
+        self.interleaveCheckBox.setObjectName("interleaveCheckBox")
+        self.horizontalLayout_2.addWidget(self.interleaveCheckBox)
+        self.statusLabel = QtWidgets.QLabel(parent=self.bottomHLayout)
+        self.statusLabel.setText("")
+        self.statusLabel.setObjectName("statusLabel")
+        self.horizontalLayout_2.addWidget(self.statusLabel)
         spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
         self.horizontalLayout_2.addItem(spacerItem1)
         self.label_3 = QtWidgets.QLabel(parent=self.bottomHLayout)
@@ -320,6 +327,20 @@ class Ui_ScrapeMenu(object):
         self.cissRadioBtn.setObjectName("cissRadioBtn")
         self.databaseBtnGroup.addButton(self.cissRadioBtn)
         self.horizontalLayout_2.addWidget(self.cissRadioBtn)
+        self.loadJobsBtn = QtWidgets.QPushButton(parent=self.bottomHLayout)
+        self.loadJobsBtn.setObjectName("loadJobsBtn")
+        self.horizontalLayout_2.addWidget(self.loadJobsBtn)
+        self.queueBtn = QtWidgets.QPushButton(parent=self.bottomHLayout)
+        self.queueBtn.setEnabled(False)
+        self.queueBtn.setObjectName("queueBtn")
+        self.horizontalLayout_2.addWidget(self.queueBtn)
+        self.runQueueBtn = QtWidgets.QPushButton(parent=self.bottomHLayout)
+        self.runQueueBtn.setEnabled(False)
+        self.runQueueBtn.setObjectName("runQueueBtn")
+        self.horizontalLayout_2.addWidget(self.runQueueBtn)
+        self.progressBtn = QtWidgets.QPushButton(parent=self.bottomHLayout)
+        self.progressBtn.setObjectName("progressBtn")
+        self.horizontalLayout_2.addWidget(self.progressBtn)
         self.stopBtn = QtWidgets.QPushButton(parent=self.bottomHLayout)
         self.stopBtn.setEnabled(True)
         self.stopBtn.setDefault(False)
@@ -369,8 +390,16 @@ class Ui_ScrapeMenu(object):
         self.label_13.setText(_translate("ScrapeMenu", "To"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_2), _translate("ScrapeMenu", "CISS Params"))
         self.multiCheckBox.setText(_translate("ScrapeMenu", "Multi-analysis"))
+        self.interleaveCheckBox.setToolTip(_translate("ScrapeMenu", "Run several queued jobs at the same time instead of one after another"))
+        self.interleaveCheckBox.setText(_translate("ScrapeMenu", "Interleave queue"))
         self.label_3.setText(_translate("ScrapeMenu", "Scrape from: "))
         self.nassRadioBtn.setText(_translate("ScrapeMenu", "NASS"))
         self.cissRadioBtn.setText(_translate("ScrapeMenu", "CISS"))
+        self.loadJobsBtn.setToolTip(_translate("ScrapeMenu", "Add scrape jobs from a JSON or CSV file to the queue"))
+        self.loadJobsBtn.setText(_translate("ScrapeMenu", "Load Jobs..."))
+        self.queueBtn.setText(_translate("ScrapeMenu", "Add to Queue"))
+        self.runQueueBtn.setText(_translate("ScrapeMenu", "Run Queue"))
+        self.progressBtn.setToolTip(_translate("ScrapeMenu", "Show the live progress of running scrapes"))
+        self.progressBtn.setText(_translate("ScrapeMenu", "Progress"))
         self.stopBtn.setText(_translate("ScrapeMenu", " Stop Scrape "))
         self.submitBtn.setText(_translate("ScrapeMenu", "Scrape"))
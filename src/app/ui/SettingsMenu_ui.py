@@ -67,6 +67,12 @@ class Ui_SettingsMenu(object):
         self.timeoutSpinBox.setSingleStep(0.5)
         self.timeoutSpinBox.setObjectName("timeoutSpinBox")
         self.formLayout.setWidget(1, QtWidgets.QFormLayout.ItemRole.FieldRole, self.timeoutSpinBox)
+        self.baseUrlLabel = QtWidgets.QLabel(parent=self.groupBox_2)
+        self.baseUrlLabel.setObjectName("baseUrlLabel")
+        self.formLayout.setWidget(2, QtWidgets.QFormLayout.ItemRole.LabelRole, self.baseUrlLabel)
+        self.baseUrlEdit = QtWidgets.QLineEdit(parent=self.groupBox_2)
+        self.baseUrlEdit.setObjectName("baseUrlEdit")
+        self.formLayout.setWidget(2, QtWidgets.QFormLayout.ItemRole.FieldRole, self.baseUrlEdit)
         self.verticalLayout_5.addWidget(self.groupBox_2)
         self.gridLayout.addWidget(self.verticalWidget_2, 1, 0, 1, 1, QtCore.Qt.AlignmentFlag.AlignTop)
         self.verticalWidget = QtWidgets.QWidget(parent=self.gridWidget)
@@ -82,6 +88,12 @@ class Ui_SettingsMenu(object):
         self.debugCheckbox.setChecked(True)
         self.debugCheckbox.setObjectName("debugCheckbox")
         self.verticalLayout_2.addWidget(self.debugCheckbox)
+        self.profileCheckbox = QtWidgets.QCheckBox(parent=self.groupBox)
+        self.profileCheckbox.setObjectName("profileCheckbox")
+        self.verticalLayout_2.addWidget(self.profileCheckbox)
+        self.memoryCheckbox = QtWidgets.QCheckBox(parent=self.groupBox)
+        self.memoryCheckbox.setObjectName("memoryCheckbox")
+        self.verticalLayout_2.addWidget(self.memoryCheckbox)
         self.verticalLayout_3.addWidget(self.groupBox)
         self.gridLayout.addWidget(self.verticalWidget, 1, 1, 1, 1, QtCore.Qt.AlignmentFlag.AlignTop)
         self.groupBox_3 = QtWidgets.QGroupBox(parent=self.gridWidget)
@@ -121,8 +133,12 @@ class Ui_SettingsMenu(object):
         self.rateLimitSpinBox.setSuffix(_translate("SettingsMenu", "s"))
         self.timeoutLabel.setText(_translate("SettingsMenu", "Timeout:"))
         self.timeoutSpinBox.setSuffix(_translate("SettingsMenu", "s"))
+        self.baseUrlLabel.setText(_translate("SettingsMenu", "Base URL:"))
+        self.baseUrlEdit.setPlaceholderText(_translate("SettingsMenu", "https://crashviewer.nhtsa.dot.gov"))
         self.groupBox.setTitle(_translate("SettingsMenu", "Logger"))
         self.debugCheckbox.setText(_translate("SettingsMenu", "Debug mode"))
+        self.profileCheckbox.setText(_translate("SettingsMenu", "Profile scrapes"))
+        self.memoryCheckbox.setText(_translate("SettingsMenu", "Trace memory while profiling"))
         self.groupBox_3.setTitle(_translate("SettingsMenu", "File Saving"))
         self.label_3.setText(_translate("SettingsMenu", "Save to:"))
         self.browseBtn.setText(_translate("SettingsMenu", "Browse"))
@@ -4,8 +4,10 @@ from .EventsTab_ui import Ui_EventsTab
 from .LogsWindow_ui import Ui_LogsWindow
 from .MainMenu_ui import Ui_MainMenu
 from .MainWindow_ui import Ui_MainWindow
+from .PerformanceWindow_ui import Ui_PerformanceWindow
 from .ProfileMenu_ui import Ui_ProfileMenu
 from .ScatterTab_ui import Ui_ScatterTab
+from .ScrapeDashboard_ui import Ui_ScrapeDashboard
 from .ScrapeMenu_ui import Ui_ScrapeMenu
 from .SettingsMenu_ui import Ui_SettingsMenu
 from .SummaryTab_ui import Ui_SummaryTab
@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -7,6 +8,8 @@ from PyQt6.QtGui import QPixmap, QIcon
 from app.main_window import MainWindow
 
 if __name__ == "__main__":
+    # Profiles are reparsed in worker processes, which frozen builds need to support
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setStyle("fusion")
 